@@ -14,6 +14,7 @@
 #from pygame.locals import *
 
 from hypatia import game
+from hypatia import atlas
 from hypatia import render
 
 __author__ = "Lillian Lemmer"
@@ -33,7 +34,8 @@ VIEWPORT_X, VIEWPORT_Y = 60, 60
 # init
 viewport_size = (VIEWPORT_X, VIEWPORT_Y)
 scene = game.Scene.from_tmx_resource('debug')
-game = game.Game(scene=scene, viewport_size=viewport_size)
+game = game.Game(scene=scene, viewport_size=viewport_size,
+                 atlas_path=atlas.DEFAULT_PATH)
 game.start_loop()
 
 ##### new
@@ -8,6 +8,9 @@ and because it avoids circular import issues.
 
 """
 
+import bisect
+import heapq
+
 import pygame
 from PIL import Image
 
@@ -333,6 +336,16 @@ class FrameAnchors(object):
 
         return self._labeled_anchors[label]
 
+    def items(self):
+        """Return (label, Anchor) pairs of every anchor.
+
+        Returns:
+            list[tuple]: --
+
+        """
+
+        return list(self._labeled_anchors.items())
+
     @staticmethod
     def from_config(anchors_config, frame_index):
         """Load the anchors from a GIF's anchor config file.
@@ -382,16 +395,21 @@ class Frame(object):
             when this frame will start being displayed.
         anchors (LabeledSurfaceAnchors): Optional positional anchors
             used when afixing other surfaces upon another.
+        palette (list|None): For frames of a palette animation,
+            the palette to give surface (an 8-bit surface shared
+            by all the frames) while this frame is displayed.
 
     See Also:
         * AnimatedSprite.frames_from_gif()
+        * AnimatedSprite.from_palette_duration_list()
         * AnimatedSprite.animation_position
         * FrameAnchors
         * Anchor
 
     """
 
-    def __init__(self, surface, start_time, duration, anchors=None):
+    def __init__(self, surface, start_time, duration, anchors=None,
+                 palette=None):
         """Create a frame using a pygame surface, the start time,
         duration time, and, optionally,  FrameAnchors.
 
@@ -406,6 +424,8 @@ class Frame(object):
             duration (integer): Milleseconds this frame lasts. See:
                 start_time argument description.
             anchors (FrameAnchors): This frame's anchor points.
+            palette (list|None): [(r, g, b), ...] to set on
+                surface when this frame is displayed.
 
         See Also:
             * FrameAnchors
@@ -417,6 +437,7 @@ class Frame(object):
         self.start_time = start_time
         self.end_time = start_time + duration
         self.anchors = anchors or None
+        self.palette = palette
 
     def __repr__(self):
         s = "<Frame duration(%s) start_time(%s) end_time(%s)>"
@@ -424,6 +445,164 @@ class Frame(object):
         return s % (self.duration, self.start_time, self.end_time)
 
 
+class AnimationClip(object):
+    """The frames of an animation and the timing derived from
+    them. A clip never changes, so any number of AnimatedSprites
+    may share one, each with an AnimationCursor of its own.
+
+    Attributes:
+        frames (tuple[Frame]): --
+        start_times (tuple[int]): The start_time of each frame,
+            in order, for binary searching.
+        total_duration (int): The total duration of the frames
+            in milliseconds.
+        uniform_duration (int|None): The duration of every frame,
+            if all the frames last as long.
+
+    Example:
+        >>> surface = pygame.Surface((1, 1))
+        >>> clip = AnimationClip([Frame(surface, 0, 100),
+        ...                       Frame(surface, 100, 50)])
+        >>> clip.total_duration
+        150
+        >>> clip.frame_index_at(120)
+        1
+        >>> clip.frames = []
+        Traceback (most recent call last):
+        AttributeError: AnimationClip is immutable
+
+    """
+
+    __slots__ = ('frames', 'start_times', 'total_duration',
+                 'uniform_duration')
+
+    def __init__(self, frames):
+        """
+
+        Args:
+            frames (list[Frame]): See AnimatedSprite.__init__().
+
+        """
+
+        frames = tuple(frames)
+        total_duration = sum(frame.duration for frame in frames)
+
+        # if every frame lasts as long, the frame index is simply
+        # the animation position divided by that duration
+        durations = set(frame.duration for frame in frames)
+
+        if len(durations) == 1 and total_duration:
+            uniform_duration = durations.pop()
+        else:
+            uniform_duration = None
+
+        set_attribute = super(AnimationClip, self).__setattr__
+        set_attribute('frames', frames)
+        set_attribute('start_times',
+                      tuple(frame.start_time for frame in frames))
+        set_attribute('total_duration', total_duration)
+        set_attribute('uniform_duration', uniform_duration)
+
+    def __setattr__(self, name, value):
+
+        raise AttributeError('AnimationClip is immutable')
+
+    def __len__(self):
+
+        return len(self.frames)
+
+    def __getitem__(self, frame_index):
+
+        return self.frames[frame_index]
+
+    def frame_index_at(self, animation_position):
+        """Return the index of the frame displayed at the supplied
+        animation position, by binary search over the start times
+        of the frames, or by division if all the frames last as
+        long. A frame is displayed from its start_time up to, but
+        not including, its end_time.
+
+        Args:
+            animation_position (int): Milliseconds into the
+                animation, less than the total duration.
+
+        Returns:
+            int: --
+
+        """
+
+        if self.uniform_duration:
+
+            return animation_position // self.uniform_duration
+
+        return bisect.bisect_right(self.start_times, animation_position) - 1
+
+
+class AnimationCursor(object):
+    """Where playback of an AnimationClip is at, and nothing more.
+
+    Attributes:
+        clip (AnimationClip): --
+        animation_position (int): Milliseconds into the clip.
+        active_frame_index (int): Index of the frame at
+            animation_position.
+
+    Example:
+        >>> surface = pygame.Surface((1, 1))
+        >>> clip = AnimationClip([Frame(surface, 0, 100),
+        ...                       Frame(surface, 100, 50)])
+        >>> cursor = AnimationCursor(clip)
+        >>> cursor.seek(270)
+        True
+        >>> cursor.animation_position, cursor.active_frame_index
+        (120, 1)
+
+    """
+
+    __slots__ = ('clip', 'animation_position', 'active_frame_index')
+
+    def __init__(self, clip, animation_position=0):
+        """
+
+        Args:
+            clip (AnimationClip): --
+            animation_position (int): --
+
+        """
+
+        self.clip = clip
+        self.animation_position = 0
+        self.active_frame_index = 0
+        self.seek(animation_position)
+
+    @property
+    def active_frame(self):
+
+        return self.clip.frames[self.active_frame_index]
+
+    def seek(self, animation_position):
+        """Move to the supplied animation position.
+
+        Args:
+            animation_position (int): Milliseconds into the
+                clip, wraps around the total duration.
+
+        Returns:
+            bool: Whether the active frame index changed.
+
+        """
+
+        if self.clip.total_duration:
+            animation_position %= self.clip.total_duration
+
+        frame_index = self.clip.frame_index_at(animation_position)
+        frame_changed = frame_index != self.active_frame_index
+        self.animation_position = animation_position
+        self.active_frame_index = frame_index
+
+        return frame_changed
+
+
 class AnimatedSprite(pygame.sprite.Sprite):
     """Animated sprite with mask, loaded from GIF.
 
@@ -442,6 +621,11 @@ class AnimatedSprite(pygame.sprite.Sprite):
         for animated tiles...
 
     Attributes:
+        clip (AnimationClip): The frames of this animation,
+            which may be shared with other AnimatedSprites.
+        cursor (AnimationCursor): Where this AnimatedSprite's
+            playback of clip is at.
+        frames (tuple[Frame]): The frames of clip.
         total_duration (int): The total duration of of this
             animation in milliseconds.
         image (pygame.Surface): Current surface belonging to
@@ -457,15 +641,27 @@ class AnimatedSprite(pygame.sprite.Sprite):
         active_frame: The current surface representing this
             animation at its current animation position. Set
             once per tick through the update() method.
+        frame_changed (bool): Whether the last update() changed
+            the image, i.e., whether the area this AnimatedSprite
+            is drawn to needs to be redrawn.
         animation_position (int): Animation position in
             milliseconds; milleseconds elapsed in this
             animation. This is used for determining
             which frame to select. Set once per tick through
             the AnimatedSprite.update() method.
+        animation_clock (AnimationClock|None): The clock which
+            advances this AnimatedSprite, if any. See AnimationClock.
+
+    Note:
+        The frames, total_duration, active_frame_index,
+        active_frame and animation_position attributes are read
+        from clip and cursor.
 
     See Also:
         * :class:`pygame.sprite.Sprite`
         * :class:`Frame`
+        * :class:`AnimationClip`
+        * :class:`AnimationCursor`
 
     """
 
@@ -474,17 +670,20 @@ class AnimatedSprite(pygame.sprite.Sprite):
         a list of Frame instances.
 
         Args:
-            frames (list[Frame]): A properly assembled list of frames,
-                which assumes that each Frame's start_time is greater
-                than the previous element and is the previous element's
-                start time + previous element/Frame's duration. Here
-                is an example of aformentioned:
+            frames (list[Frame]|AnimationClip): A properly assembled
+                list of frames, which assumes that each Frame's
+                start_time is greater than the previous element and
+                is the previous element's start time + previous
+                element/Frame's duration. Here is an example of
+                aformentioned:
 
                 >>> frame_one_surface = pygame.Surface((16, 16))
                 >>> frame_one = Frame(frame_one_surface, 0, 100)
                 >>> frame_two_surface = pygame.Surface((16, 16))
                 >>> frame_two = Frame(frame_two_surface, 100, 50)
 
+                An AnimationClip is shared rather than copied.
+
         Note:
             In the future I may add a method for verifying the
             validity of Frame start_times and durations.
@@ -492,13 +691,12 @@ class AnimatedSprite(pygame.sprite.Sprite):
         """
 
         super(AnimatedSprite, self).__init__()
-        self.frames = frames
-        self.total_duration = self.get_total_duration(self.frames)
-        self.active_frame_index = 0
-        self.active_frame = self.frames[self.active_frame_index]
 
-        # animation position in milliseconds
-        self.animation_position = 0
+        if not isinstance(frames, AnimationClip):
+            frames = AnimationClip(frames)
+
+        self.clip = frames
+        self.cursor = AnimationCursor(self.clip)
 
         # this gets updated depending on the frame/time
         # needs to be a surface.
@@ -508,6 +706,40 @@ class AnimatedSprite(pygame.sprite.Sprite):
         # on screen.
         self.rect = self.image.get_rect()
 
+        # used for dirty rect rendering
+        self.frame_changed = False
+
+        if self.frames[0].palette is not None:
+            self.image.set_palette(self.frames[0].palette)
+
+        # set by AnimationClock.add()
+        self.animation_clock = None
+
+    @property
+    def frames(self):
+
+        return self.clip.frames
+
+    @property
+    def total_duration(self):
+
+        return self.clip.total_duration
+
+    @property
+    def animation_position(self):
+
+        return self.cursor.animation_position
+
+    @property
+    def active_frame_index(self):
+
+        return self.cursor.active_frame_index
+
+    @property
+    def active_frame(self):
+
+        return self.cursor.active_frame
+
     def __getitem__(self, frame_index):
         """Return the frame corresponding to
         the supplied frame_index.
@@ -525,6 +757,47 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
         return self.frames[frame_index]
 
+    def copy(self):
+        """Return a new AnimatedSprite which shares the frames of
+        this one, but has its own playback state, e.g., its own
+        animation position.
+
+        Warning:
+            Copies of a palette animation also share its surface,
+            thus the palette of the frame displayed last.
+
+        Returns:
+            AnimatedSprite: --
+
+        Example:
+            >>> surface = pygame.Surface((1, 1))
+            >>> animation = (AnimatedSprite.
+            ...              from_surface_duration_list([(surface, 100)]))
+            >>> animation.copy().frames is animation.frames
+            True
+
+        """
+
+        return AnimatedSprite(self.clip)
+
+    def use_clip(self, clip):
+        """Play another clip of the same timing, e.g., the same
+        frames packed into an atlas, from the same position.
+
+        Args:
+            clip (AnimationClip): --
+
+        """
+
+        self.clip = clip
+        self.cursor.clip = clip
+        active_frame = self.cursor.active_frame
+
+        if active_frame.palette is not None:
+            active_frame.surface.set_palette(active_frame.palette)
+
+        self.image = active_frame.surface
+
     def largest_frame_size(self):
         """Return the largest frame's (by area)
         dimensions as tuple(int x, int y).
@@ -582,6 +855,47 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
         return AnimatedSprite(frames)
 
+    @staticmethod
+    def from_palette_duration_list(surface, palette_duration_list):
+        """Create a palette animation: every frame is the same
+        8-bit surface, each frame only differs by its palette.
+
+        Only one surface is kept no matter how many frames there
+        are, and advancing a frame merely sets a palette.
+
+        Args:
+            surface (pygame.Surface): 8-bit surface shared by
+                all the frames.
+            palette_duration_list (list[tuple]): A list of tuples,
+                first element is a palette ([(r, g, b), ...]),
+                second element being how long said palette is
+                displayed for.
+
+        Returns:
+            AnimatedSprite: --
+
+        Example:
+            >>> surface = pygame.Surface((2, 2), 0, 8)
+            >>> black_then_white = [([(0, 0, 0)], 100),
+            ...                     ([(255, 255, 255)], 100)]
+            >>> animation = (AnimatedSprite.
+            ...              from_palette_duration_list(surface,
+            ...                                         black_then_white))
+            >>> animation[0].surface is animation[1].surface
+            True
+
+        """
+
+        running_time = 0
+        frames = []
+
+        for palette, duration in palette_duration_list:
+            frame = Frame(surface, running_time, duration, palette=palette)
+            frames.append(frame)
+            running_time += duration
+
+        return AnimatedSprite(frames)
+
     @classmethod
     def from_file(cls, path_or_readable, anchors_config=None):
         """The default is to create from gif bytes, but this can
@@ -604,16 +918,77 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
         return AnimatedSprite(frames)
 
+    def frame_index_at(self, animation_position):
+        """Return the index of the frame displayed at the supplied
+        animation position, by binary search over the start times
+        of the frames, or by division if all the frames last as
+        long. A frame is displayed from its start_time up to, but
+        not including, its end_time.
+
+        Args:
+            animation_position (int): Milliseconds into the
+                animation, less than the total duration.
+
+        Returns:
+            int: --
+
+        Example:
+            >>> surface = pygame.Surface((1, 1))
+            >>> animation = (AnimatedSprite.
+            ...              from_surface_duration_list([(surface, 100),
+            ...                                          (surface, 50)]))
+            >>> animation.frame_index_at(0)
+            0
+            >>> animation.frame_index_at(99)
+            0
+            >>> animation.frame_index_at(100)
+            1
+
+        See Also:
+            * AnimationClip.frame_index_at()
+
+        """
+
+        return self.clip.frame_index_at(animation_position)
+
+    def seek(self, animation_position):
+        """Display the frame at the supplied animation position.
+
+        The image attribute (and palette, for palette animations)
+        is only touched if the frame actually changes, which is
+        what frame_changed reports.
+
+        Args:
+            animation_position (int): Milliseconds into the
+                animation, wraps around the total duration.
+
+        """
+
+        self.frame_changed = self.cursor.seek(animation_position)
+
+        if not self.frame_changed:
+
+            return None
+
+        active_frame = self.cursor.active_frame
+
+        if active_frame.palette is not None:
+            active_frame.surface.set_palette(active_frame.palette)
+
+        self.image = active_frame.surface
+        self.rect.size = self.image.get_size()
+
     def update(self, clock, absolute_position, viewport):
         """Manipulate the state of this AnimatedSprite, namely
         the on-screen/viewport position (not absolute) and
         using the clock to do animation manipulations.
 
         Using the game's clock we decipher the animation position,
-        which in turn allows us to locate the correct frame.
+        which in turn allows us to locate the correct frame, without
+        walking through the frames; see frame_index_at().
 
         Sets the image attribute to the current frame's image. Updates
-        the rect attribute to the new relative position and frame size.
+        the rect attribute to the frame size.
 
         Warning:
             Since we're changing the rect size on-the-fly, this can
@@ -628,34 +1003,20 @@ class AnimatedSprite(pygame.sprite.Sprite):
                 position. Meaning this could be outside of the
                 current viewport area.
 
-        """
-
-        self.animation_position += clock.get_time()
-
-        if self.animation_position >= self.total_duration:
-            self.animation_position = (self.animation_position %
-                                       self.total_duration)
-            self.active_frame_index = 0
-
-        while (self.animation_position >
-               self.frames[self.active_frame_index].end_time):
-
-            self.active_frame_index += 1
+        Note:
+            Does nothing if this AnimatedSprite is driven by an
+            AnimationClock, so that it's only advanced once per tick.
 
-        # NOTE: the fact that I'm using -1 here seems sloppy/hacky
-        self.image = self.frames[self.active_frame_index - 1].surface
+        See Also:
+            * AnimatedSprite.seek()
 
-        image_size = self.image.get_size()
+        """
 
-        # NOTE: temporarily disabling this until i fully implement
-        # absolute_position... in our current setup we never
-        # touch the rect of frame surfaces, only the walkabout
-        # relative_position = absolute_position.relative(viewport)
-        relative_position = (0, 0)
+        if self.animation_clock is not None:
 
-        self.rect = pygame.rect.Rect(relative_position, image_size)
+            return None
 
-        self.active_frame = self.frames[self.active_frame_index]
+        self.seek(self.animation_position + clock.get_time())
 
     @staticmethod
     def get_total_duration(frames):
@@ -688,40 +1049,99 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
         """
 
-        pil_gif = Image.open(path_or_readable)
+        decoded_frames = cls.decode_gif(path_or_readable)
 
-        frame_index = 0
-        frames = []
-        time_position = 0
+        return cls.frames_from_decoded_gif(decoded_frames, anchors_config)
+
+    @staticmethod
+    def decode_gif(path_or_readable):
+        """Decode the frames of an animated GIF into RGBA pixels,
+        without creating any pygame object, so that it can be done
+        outside of the main thread. PIL releases the GIL while it
+        decodes.
+
+        Args:
+            path_or_readable (str|file-like-object): Path to
+                an animated-or-not GIF.
+
+        Returns:
+            list[tuple]: (pixels, size, duration) of each frame,
+                see frames_from_decoded_gif().
+
+        """
+
+        pil_gif = Image.open(path_or_readable)
+        decoded_frames = []
 
         try:
 
             while True:
-                duration = pil_gif.info['duration']
-                frame_sprite = cls.pil_image_to_pygame_surface(pil_gif)
-
-                if anchors_config:
-                    frame_anchors = FrameAnchors.from_config(anchors_config,
-                                                             frame_index)
-
-                else:
-                    frame_anchors = None
-
-                frame = Frame(surface=frame_sprite,
-                              start_time=time_position,
-                              duration=duration,
-                              anchors=frame_anchors)
-                frames.append(frame)
-                frame_index += 1
-                time_position += duration
+                pixels = pil_gif.convert('RGBA').tobytes()
+                decoded_frames.append((pixels,
+                                       pil_gif.size,
+                                       pil_gif.info['duration']))
                 pil_gif.seek(pil_gif.tell() + 1)
 
         except EOFError:
 
             pass  # end of sequence
 
+        return decoded_frames
+
+    @staticmethod
+    def frames_from_decoded_gif(decoded_frames, anchors_config=None):
+        """Create the frames of a GIF decoded by decode_gif().
+
+        Args:
+            decoded_frames (list[tuple]): --
+            anchors_config (configparser): The anchors ini file
+                associated with this GIF.
+
+        Returns:
+            list[Frame]: --
+
+        """
+
+        frames = []
+        time_position = 0
+
+        for frame_index, (pixels, size, duration) in enumerate(decoded_frames):
+            # the surface uses the bytes as they are, rather than a copy
+            frame_sprite = pygame.image.frombuffer(pixels, size, 'RGBA')
+
+            if anchors_config:
+                frame_anchors = FrameAnchors.from_config(anchors_config,
+                                                         frame_index)
+
+            else:
+                frame_anchors = None
+
+            frame = Frame(surface=frame_sprite,
+                          start_time=time_position,
+                          duration=duration,
+                          anchors=frame_anchors)
+            frames.append(frame)
+            time_position += duration
+
         return frames
 
+    @staticmethod
+    def size_from_gif(path_or_readable):
+        """Return the size of the frames frames_from_gif() creates
+        from a GIF, which is the size of the GIF, without decoding
+        any frame.
+
+        Args:
+            path_or_readable (str|file-like-object): Path to
+                an animated-or-not GIF.
+
+        Returns:
+            tuple (x, y): --
+
+        """
+
+        return Image.open(path_or_readable).size
+
     @staticmethod
     def pil_image_to_pygame_surface(pil_image):
         """Convert PIL Image() to RGBA pygame Surface.
@@ -747,7 +1167,8 @@ class AnimatedSprite(pygame.sprite.Sprite):
 
         image_as_string = pil_image.convert('RGBA').tobytes()
 
-        return pygame.image.fromstring(image_as_string,
+        # the surface uses the bytes as they are, rather than a copy
+        return pygame.image.frombuffer(image_as_string,
                                        pil_image.size,
                                        'RGBA')
 
@@ -759,10 +1180,160 @@ class AnimatedSprite(pygame.sprite.Sprite):
         pygame.surface.convert() to speed up game play.
 
         Convert each frame's surface to an optimized
-        format for pygame gameplay.
+        format for pygame gameplay. Palette animations are
+        left alone, converting would discard the palette.
 
         """
 
         for frame in self.frames:
+
+            if frame.palette is not None:
+
+                continue
+
             frame.surface.convert()
             frame.surface.convert_alpha()
+
+
+class AnimationClock(object):
+    """Advances many AnimatedSprites from one place, each of them
+    exactly once per tick, no matter how many times it is drawn.
+
+    The time at which each AnimatedSprite next changes frame is
+    kept in a heap, so a tick only touches the AnimatedSprites
+    whose frame changes; the cost of a tick is proportional to
+    the number of changed frames, not to the number of
+    AnimatedSprites.
+
+    Attributes:
+        time (int): Milliseconds this clock has been ticked for.
+        changed (list[AnimatedSprite]): The AnimatedSprites which
+            changed frame during the last tick.
+
+    Example:
+        >>> surface = pygame.Surface((1, 1))
+        >>> animation = (AnimatedSprite.
+        ...              from_surface_duration_list([(surface, 100),
+        ...                                          (surface, 50)]))
+        >>> animation_clock = AnimationClock()
+        >>> animation_clock.add(animation)
+        >>> animation_clock.tick(99)
+        []
+        >>> animation_clock.tick(1) == [animation]
+        True
+        >>> animation.active_frame_index
+        1
+
+    """
+
+    def __init__(self):
+        self.time = 0
+        self.changed = []
+
+        # (next frame change time, entry number, animated sprite)
+        self._schedule = []
+        self._entry_count = 0
+
+        # animated sprite -> (clock time of its animation position 0,
+        # entry number of its pending schedule entry)
+        self._sprites = {}
+
+    def __contains__(self, animated_sprite):
+
+        return animated_sprite in self._sprites
+
+    def __len__(self):
+
+        return len(self._sprites)
+
+    def add(self, animated_sprite):
+        """Have this clock advance animated_sprite from now on,
+        starting from its current animation position.
+
+        Args:
+            animated_sprite (AnimatedSprite): --
+
+        """
+
+        epoch = self.time - animated_sprite.animation_position
+        self._sprites[animated_sprite] = (epoch, None)
+        animated_sprite.animation_clock = self
+        self._schedule_next_change(animated_sprite)
+
+    def remove(self, animated_sprite):
+        """Stop advancing animated_sprite.
+
+        Args:
+            animated_sprite (AnimatedSprite): --
+
+        Raises:
+            KeyError: animated_sprite was never added.
+
+        """
+
+        # its entry in the heap is skipped once it comes up
+        del self._sprites[animated_sprite]
+        animated_sprite.animation_clock = None
+
+    def _schedule_next_change(self, animated_sprite):
+        epoch, __ = self._sprites[animated_sprite]
+        total_duration = animated_sprite.total_duration
+
+        if not total_duration:
+            self._sprites[animated_sprite] = (epoch, None)
+
+            return None
+
+        position = (self.time - epoch) % total_duration
+        cycle_start = self.time - position
+        frame_index = animated_sprite.frame_index_at(position)
+        frame = animated_sprite.frames[frame_index]
+        next_change = cycle_start + frame.end_time
+
+        self._entry_count += 1
+        self._sprites[animated_sprite] = (epoch, self._entry_count)
+        heapq.heappush(self._schedule,
+                       (next_change, self._entry_count, animated_sprite))
+
+    def tick(self, milliseconds):
+        """Advance time by milliseconds, updating the
+        AnimatedSprites whose frame changes.
+
+        Args:
+            milliseconds (int): Typically the game clock's
+                get_time().
+
+        Returns:
+            list[AnimatedSprite]: The AnimatedSprites which changed
+                frame, also kept as the changed attribute.
+
+        """
+
+        self.time += milliseconds
+
+        for animated_sprite in self.changed:
+            animated_sprite.frame_changed = False
+
+        changed = []
+        schedule = self._schedule
+
+        while schedule and schedule[0][0] <= self.time:
+            __, entry, animated_sprite = heapq.heappop(schedule)
+            epoch, pending_entry = self._sprites.get(animated_sprite,
+                                                     (None, None))
+
+            # removed, or added again since this entry was pushed
+            if entry != pending_entry:
+
+                continue
+
+            animated_sprite.seek(self.time - epoch)
+
+            if animated_sprite.frame_changed:
+                changed.append(animated_sprite)
+
+            self._schedule_next_change(animated_sprite)
+
+        self.changed = changed
+
+        return changed
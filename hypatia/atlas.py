@@ -0,0 +1,484 @@
+# This module is part of Hypatia and is released under the
+# MIT license: http://opensource.org/licenses/MIT
+
+"""Texture atlases: many small surfaces, e.g., the frames of
+animations, packed into a few large surfaces (pages).
+
+Packing an animation gives it a new clip whose frames are
+subsurfaces of the pages, so nothing else needs to know about the
+atlas, while the pixel data of all the frames ends up in a handful
+of surfaces.
+
+An atlas can be saved and loaded again, see open_atlas(): the
+frames which are already in it are not copied again, unless the
+resource they come from was modified since.
+
+See Also:
+    * :class:`animatedsprite.AnimatedSprite`
+    * :meth:`game.Scene.pack`
+
+"""
+
+import os
+import zipfile
+from io import BytesIO
+
+try:
+    import ConfigParser as configparser
+    from cStringIO import StringIO
+
+except ImportError:
+    import configparser
+    from io import StringIO
+
+import pygame
+
+from hypatia import resources
+from hypatia import animatedsprite
+
+
+DEFAULT_PATH = os.path.join('resources', 'atlas.zip')
+
+
+class TextureAtlas(object):
+    """Surfaces packed into pages with a shelf packer: each page
+    is split into horizontal shelves, a surface goes on the first
+    shelf which is tall enough and has room left, otherwise on a
+    new shelf, otherwise on a new page.
+
+    Attributes:
+        page_size (tuple): (x, y) pixel dimensions of a page.
+            Surfaces larger than this get a page of their own.
+        pages (list[pygame.Surface]): 32-bit surfaces with
+            per-pixel alpha which the packed surfaces are
+            copied to.
+        regions (dict): key -> (page index, pygame.Rect) for the
+            surfaces which were added with a key.
+        sources (dict): "category/name" -> modification time of
+            the resource, for the keys which start with the
+            category and name of a resource, e.g.,
+            "walkabouts/slime/walk_north.gif/0".
+        modified (bool): Whether the atlas changed since it was
+            created, loaded or saved, i.e., whether it should be
+            saved again.
+
+    Example:
+        >>> atlas = TextureAtlas((64, 64))
+        >>> surface = pygame.Surface((10, 20), pygame.SRCALPHA, 32)
+        >>> packed = atlas.add(surface, 'square')
+        >>> packed.get_parent() is atlas.pages[0]
+        True
+        >>> atlas['square'].get_offset()
+        (0, 0)
+        >>> atlas.add(surface).get_offset()
+        (10, 0)
+
+    """
+
+    PAGE_SIZE = (512, 512)
+
+    def __init__(self, page_size=None):
+        """
+
+        Args:
+            page_size (tuple|None): (x, y) pixel dimensions of a
+                page; defaults to TextureAtlas.PAGE_SIZE.
+
+        """
+
+        self.page_size = page_size or self.PAGE_SIZE
+        self.pages = []
+        self.regions = {}
+        self.sources = {}
+        self.modified = False
+
+        # for each page, a list of [top, height, used width]
+        self._shelves = []
+
+        # AnimationClip -> the AnimationClip of its packed frames
+        self._packed_clips = {}
+
+    def __contains__(self, key):
+
+        return key in self.regions
+
+    def __getitem__(self, key):
+        """Return the subsurface of the page which the surface
+        added with key was packed into.
+
+        Args:
+            key (str): --
+
+        Raises:
+            KeyError: nothing was added with key.
+
+        Returns:
+            pygame.Surface: --
+
+        """
+
+        page_index, rect = self.regions[key]
+
+        return self.pages[page_index].subsurface(rect)
+
+    def _new_page(self, size):
+        page = pygame.Surface(size, pygame.SRCALPHA, 32)
+        self.pages.append(page)
+        self._shelves.append([])
+
+        return len(self.pages) - 1
+
+    def _find_space(self, size):
+        """Return (page index, topleft) of where to put a surface
+        of the supplied size, reserving that space.
+
+        """
+
+        width, height = size
+        page_width, page_height = self.page_size
+
+        if width > page_width or height > page_height:
+
+            return self._new_page(size), (0, 0)
+
+        for page_index, shelves in enumerate(self._shelves):
+            page = self.pages[page_index]
+
+            # pages of oversized surfaces are not shared
+            if page.get_size() != self.page_size:
+
+                continue
+
+            for shelf in shelves:
+                top, shelf_height, used_width = shelf
+
+                if height <= shelf_height and used_width + width <= page_width:
+                    shelf[2] += width
+
+                    return page_index, (used_width, top)
+
+            if shelves:
+                last_top, last_height, __ = shelves[-1]
+                top = last_top + last_height
+            else:
+                top = 0
+
+            if top + height <= page_height:
+                shelves.append([top, height, width])
+
+                return page_index, (0, top)
+
+        page_index = self._new_page(self.page_size)
+        self._shelves[page_index].append([0, height, width])
+
+        return page_index, (0, 0)
+
+    def add(self, surface, key=None):
+        """Copy surface into a page.
+
+        Args:
+            surface (pygame.Surface): --
+            key (str|None): If supplied, the region is recorded in
+                regions, so it can be looked up (and saved). If
+                something was already added with key, surface is
+                not copied again.
+
+        Returns:
+            pygame.Surface: The subsurface of the page which now
+                holds a copy of surface.
+
+        """
+
+        if key is not None and key in self.regions:
+
+            return self[key]
+
+        page_index, topleft = self._find_space(surface.get_size())
+        rect = pygame.Rect(topleft, surface.get_size())
+        page = self.pages[page_index]
+
+        # the area is still fully transparent black, so taking the
+        # maximum of each channel copies surface exactly, rather
+        # than blending it
+        page.blit(surface, topleft, special_flags=pygame.BLEND_RGBA_MAX)
+        self.modified = True
+
+        if key is not None:
+            self.regions[key] = (page_index, rect)
+            self._add_source(key)
+
+        return page.subsurface(rect)
+
+    def _add_source(self, key):
+        """Record the modification time of the resource key
+        belongs to, if any, see the sources attribute.
+
+        """
+
+        key_parts = key.split('/')
+
+        if (len(key_parts) < 3 or
+                key_parts[0] not in resources.BUNDLED_CATEGORIES):
+
+            return None
+
+        source = '/'.join(key_parts[:2])
+
+        if source in self.sources:
+
+            return None
+
+        try:
+            self.sources[source] = resources.resource_mtime(*key_parts[:2])
+        except OSError:
+            pass
+
+    def can_pack(self, surface):
+        """Whether surface should be packed: only standalone
+        surfaces with per-pixel alpha are. Subsurfaces already
+        share their pixels with a larger surface, e.g., tiles
+        with their tilesheet, and surfaces without per-pixel
+        alpha may rely on a colorkey.
+
+        Args:
+            surface (pygame.Surface): --
+
+        Returns:
+            bool: --
+
+        """
+
+        return (surface.get_parent() is None and
+                bool(surface.get_flags() & pygame.SRCALPHA))
+
+    def add_animation(self, animated_sprite, name=None):
+        """Pack the frames of animated_sprite, and have it play an
+        AnimationClip of the packed frames from then on.
+
+        The clip animated_sprite played is not modified, since it
+        is shared, e.g., by the copies of the animation (see
+        AnimatedSprite.copy()). The packed clip is shared as well:
+        any AnimatedSprite added with the same clip gets the same
+        packed clip.
+
+        Frames of palette animations are left alone, since they
+        share one 8-bit surface.
+
+        Args:
+            animated_sprite (animatedsprite.AnimatedSprite): --
+            name (str|None): If supplied, each frame is added with
+                the key "name/frame index."
+
+        Returns:
+            animatedsprite.AnimationClip: the clip animated_sprite
+                now plays.
+
+        """
+
+        clip = animated_sprite.clip
+
+        try:
+            packed_clip = self._packed_clips[clip]
+        except KeyError:
+            packed_clip = self.pack_clip(clip, name)
+            self._packed_clips[clip] = packed_clip
+            self._packed_clips[packed_clip] = packed_clip
+
+        if packed_clip is not clip:
+            animated_sprite.use_clip(packed_clip)
+
+        return packed_clip
+
+    def pack_clip(self, clip, name=None):
+        """Return a new AnimationClip of the frames of clip, packed.
+
+        Args:
+            clip (animatedsprite.AnimationClip): --
+            name (str|None): see add_animation().
+
+        Returns:
+            animatedsprite.AnimationClip: clip itself if none of
+                its frames can be packed.
+
+        """
+
+        # frames may share a surface
+        packed_surfaces = {}
+        frames = []
+
+        for frame_index, frame in enumerate(clip.frames):
+            surface = frame.surface
+
+            if (frame.palette is None and
+                    id(surface) not in packed_surfaces and
+                    self.can_pack(surface)):
+
+                if name is None:
+                    key = None
+                else:
+                    key = '%s/%d' % (name, frame_index)
+
+                packed_surfaces[id(surface)] = self.add(surface, key)
+
+            if id(surface) in packed_surfaces:
+                frame = animatedsprite.Frame(packed_surfaces[id(surface)],
+                                             frame.start_time,
+                                             frame.duration,
+                                             frame.anchors,
+                                             frame.palette)
+
+            frames.append(frame)
+
+        if not packed_surfaces:
+
+            return clip
+
+        return animatedsprite.AnimationClip(frames)
+
+    def save(self, path):
+        """Save this atlas as a ZIP archive of the pages, as PNG,
+        and an atlas.ini which lists the regions.
+
+        Args:
+            path (str): --
+
+        """
+
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        config.add_section('meta')
+        config.set('meta', 'page_width', str(self.page_size[0]))
+        config.set('meta', 'page_height', str(self.page_size[1]))
+        config.set('meta', 'pages', str(len(self.pages)))
+        config.add_section('regions')
+
+        for key, (page_index, rect) in sorted(self.regions.items()):
+            region = (page_index,) + tuple(rect)
+            config.set('regions', key, ','.join(str(n) for n in region))
+
+        config.add_section('sources')
+
+        for source, modification_time in sorted(self.sources.items()):
+            config.set('sources', source, repr(modification_time))
+
+        config_file = StringIO()
+        config.write(config_file)
+
+        # the atlas at path may be in use, thus replace it as a whole
+        temporary_path = path + '.tmp'
+
+        with zipfile.ZipFile(temporary_path, 'w') as zip_file:
+            zip_file.writestr('atlas.ini', config_file.getvalue())
+
+            for page_index, page in enumerate(self.pages):
+                page_name = 'page%d.png' % page_index
+                page_file = BytesIO()
+                pygame.image.save(page, page_file, page_name)
+                zip_file.writestr(page_name, page_file.getvalue())
+
+        getattr(os, 'replace', os.rename)(temporary_path, path)
+        self.modified = False
+
+    @classmethod
+    def load(cls, path):
+        """Load an atlas saved with TextureAtlas.save().
+
+        Surfaces added to the loaded atlas go on new pages. The
+        regions of the resources which were modified (or removed)
+        since they were added are dropped, see the sources
+        attribute.
+
+        Args:
+            path (str): --
+
+        Returns:
+            TextureAtlas: --
+
+        """
+
+        with zipfile.ZipFile(path) as zip_file:
+            config = configparser.ConfigParser()
+            config.optionxform = str
+            config_file = StringIO(zip_file.read('atlas.ini').decode('utf-8'))
+            config.readfp(config_file)
+
+            page_size = (config.getint('meta', 'page_width'),
+                         config.getint('meta', 'page_height'))
+            atlas = cls(page_size)
+            stale_sources = set()
+
+            if config.has_section('sources'):
+
+                for source, modification_time in config.items('sources'):
+
+                    try:
+                        current_mtime = resources.resource_mtime(
+                            *source.split('/'))
+                    except OSError:
+                        current_mtime = None
+
+                    if current_mtime == float(modification_time):
+                        atlas.sources[source] = current_mtime
+                    else:
+                        stale_sources.add(source)
+
+            regions = {}
+
+            for key, region in config.items('regions'):
+
+                if '/'.join(key.split('/')[:2]) in stale_sources:
+
+                    continue
+
+                page_index, x, y, width, height = (int(n) for n
+                                                   in region.split(','))
+                regions[key] = (page_index, pygame.Rect(x, y, width, height))
+
+            # only the pages which still hold regions are loaded
+            saved_page_indexes = sorted(set(page_index for page_index, __
+                                            in regions.values()))
+
+            for saved_page_index in saved_page_indexes:
+                page_name = 'page%d.png' % saved_page_index
+                page_file = BytesIO(zip_file.read(page_name))
+                atlas.pages.append(pygame.image.load(page_file, page_name))
+
+                # full, as far as the packer is concerned
+                atlas._shelves.append([[0, page_size[1], page_size[0]]])
+
+        for key, (saved_page_index, rect) in regions.items():
+            page_index = saved_page_indexes.index(saved_page_index)
+            atlas.regions[key] = (page_index, rect)
+
+        # regions were dropped, the atlas on disk is out of date
+        atlas.modified = bool(stale_sources)
+
+        return atlas
+
+
+def open_atlas(path=None):
+    """Load the atlas saved at path, or create an empty one if
+    there is none or it can't be read.
+
+    Args:
+        path (str|None): defaults to DEFAULT_PATH.
+
+    Returns:
+        TextureAtlas: --
+
+    """
+
+    path = path or DEFAULT_PATH
+
+    if not os.path.exists(path):
+
+        return TextureAtlas()
+
+    try:
+
+        return TextureAtlas.load(path)
+
+    except (zipfile.BadZipfile, KeyError, configparser.Error,
+            pygame.error, ValueError):
+
+        return TextureAtlas()
@@ -0,0 +1,540 @@
+# This module is part of Hypatia and is released under the
+# MIT license: http://opensource.org/licenses/MIT
+
+"""Resource bundles: resources compiled ahead of time into one
+binary file, so that loading them involves next to no decoding.
+
+A bundle holds the raw bytes of every file of every resource,
+and, compiled:
+
+  * for GIFs, the decoded frames as raw RGBA pixel buffers along
+    with their timing and anchors;
+  * for images, e.g., tilesheet.png, the decoded pixel buffer;
+  * for INI files, e.g., the flags and animations of a
+    tilesheet.ini, the parsed sections.
+
+It is read through mmap, and frames and images are surfaces over
+the mapped pixel buffers: they are not copied, and processes which
+load the same bundle share the pages of memory they occupy.
+
+Compile the resources of the current directory like so:
+
+  $ python -m hypatia.bundle
+
+Resource uses the bundle at DEFAULT_PATH for any resource which
+has not been modified since the bundle was compiled.
+
+Format:
+    MAGIC, the byte length of the index as a little-endian
+    unsigned 32-bit integer, the index as UTF-8 JSON, then
+    the data which the offsets of the index are relative to.
+    The data starts at a multiple of ALIGNMENT, and so do the
+    pixels of each GIF and image; the frames of a GIF follow
+    each other.
+
+See Also:
+    * :class:`resources.Resource`
+    * :func:`resources.compile_bundle`
+
+"""
+
+import os
+import json
+import mmap
+import struct
+
+try:
+    import ConfigParser as configparser
+except ImportError:
+    import configparser
+
+import pygame
+
+from hypatia import animatedsprite
+
+
+DEFAULT_PATH = os.path.join('resources', 'resources.bundle')
+MAGIC = b'HYPATIA\x01'
+HEADER = struct.Struct('<8sI')
+ALIGNMENT = 16
+
+# absolute path -> (modification time, Bundle)
+_open_bundles = {}
+
+
+class BadBundle(Exception):
+    """The file is not a resource bundle, or is of a version
+    which is not supported.
+
+    Attributes:
+        path (str): --
+
+    """
+
+    def __init__(self, path):
+        super(BadBundle, self).__init__(path)
+        self.path = path
+
+
+class Bundle(object):
+    """A resource bundle, memory-mapped.
+
+    Attributes:
+        path (str): --
+        resources (dict): "category/name" -> the index of that
+            resource, see BundleEntry.
+
+    """
+
+    def __init__(self, path):
+        """Map the bundle at path and read its index.
+
+        Args:
+            path (str): --
+
+        Raises:
+            BadBundle: The file is not a bundle.
+
+        """
+
+        self.path = path
+
+        # Copy-on-write: pages are shared with the file, thus with
+        # other processes, unless something draws on a frame.
+        with open(path, 'rb') as bundle_file:
+            self._mmap = mmap.mmap(bundle_file.fileno(), 0,
+                                   access=mmap.ACCESS_COPY)
+
+        if len(self._mmap) < HEADER.size:
+
+            raise BadBundle(path)
+
+        magic, index_length = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC:
+
+            raise BadBundle(path)
+
+        index_end = HEADER.size + index_length
+        index = json.loads(self._mmap[HEADER.size:index_end].decode('utf-8'))
+        self.resources = index['resources']
+        self._data_start = index_end
+
+    def read(self, offset, length):
+        """Return length bytes of data at offset.
+
+        Args:
+            offset (int): relative to the data, as in the index.
+            length (int): --
+
+        Returns:
+            bytes: --
+
+        """
+
+        start = self._data_start + offset
+
+        return self._mmap[start:start + length]
+
+    def view(self, offset, length):
+        """Like Bundle.read(), but return a view of the mapped
+        bundle instead of a copy.
+
+        Args:
+            offset (int): relative to the data, as in the index.
+            length (int): --
+
+        Returns:
+            memoryview: --
+
+        """
+
+        start = self._data_start + offset
+
+        return memoryview(self._mmap)[start:start + length]
+
+    def entry(self, resource_category, resource_name):
+        """Return the bundled resource of the supplied category
+        and name, or None if it is not in this bundle.
+
+        Args:
+            resource_category (str): E.g., tilesheets, walkabouts.
+            resource_name (str): E.g., debug.
+
+        Returns:
+            BundleEntry|None: --
+
+        """
+
+        key = resource_category + '/' + resource_name
+
+        if key not in self.resources:
+
+            return None
+
+        return BundleEntry(self, self.resources[key])
+
+
+class BundleEntry(object):
+    """A resource in a Bundle.
+
+    Attributes:
+        bundle (Bundle): --
+        mtime (float): The modification time of the resource
+            when it was compiled into the bundle.
+
+    """
+
+    def __init__(self, bundle, resource_index):
+        """
+
+        Args:
+            bundle (Bundle): --
+            resource_index (dict): The part of the bundle's index
+                about this resource.
+
+        """
+
+        self.bundle = bundle
+        self.mtime = resource_index['mtime']
+        self._files = resource_index['files']
+
+    def __contains__(self, file_name):
+        """Whether file_name was compiled, i.e., whether
+        BundleEntry.load() can load it.
+
+        """
+
+        file_index = self._files.get(file_name, {})
+
+        return 'frames' in file_index or 'sections' in file_index
+
+    def has_surface(self, file_name):
+        """Whether the image file_name was compiled, i.e., whether
+        BundleEntry.surface() can load it.
+
+        """
+
+        return 'pixels' in self._files.get(file_name, {})
+
+    def raw_files(self):
+        """Return the raw bytes of every file of the resource.
+
+        Returns:
+            dict: file name -> bytes.
+
+        """
+
+        return {file_name: self.bundle.read(file_index['offset'],
+                                            file_index['length'])
+                for file_name, file_index in self._files.items()}
+
+    def load(self, file_name):
+        """Load a compiled GIF or INI file, see
+        BundleEntry.load_animation() and BundleEntry.load_config().
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            animatedsprite.AnimatedSprite|ConfigParser: --
+
+        """
+
+        if 'sections' in self._files[file_name]:
+
+            return self.load_config(file_name)
+
+        return self.load_animation(file_name)
+
+    def load_config(self, file_name):
+        """Create a ConfigParser from the compiled sections of an
+        INI file, without parsing it.
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            ConfigParser: --
+
+        """
+
+        config = configparser.ConfigParser()
+
+        for section, items in self._files[file_name]['sections']:
+            config.add_section(section)
+
+            for option, value in items:
+                # the values are raw: skip the interpolation syntax
+                # check of ConfigParser.set(), as reading a file does
+                configparser.RawConfigParser.set(config, section,
+                                                 option, value)
+
+        return config
+
+    def surface(self, file_name):
+        """Create a surface over the compiled pixels of an image,
+        without decoding the image, nor copying its pixels.
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            pygame.Surface: --
+
+        """
+
+        pixels_index = self._files[file_name]['pixels']
+        pixels = self.bundle.view(pixels_index['offset'],
+                                  pixels_index['length'])
+        surface = pygame.image.frombuffer(pixels,
+                                          tuple(pixels_index['size']),
+                                          pixels_index['format'])
+
+        # e.g., palette_cycle() relies on the palette of a tilesheet
+        if pixels_index['palette'] is not None:
+            surface.set_palette([tuple(color)
+                                 for color in pixels_index['palette']])
+
+        if pixels_index['colorkey'] is not None:
+            surface.set_colorkey(tuple(pixels_index['colorkey']))
+
+        return surface
+
+    def load_animation(self, file_name):
+        """Create an AnimatedSprite from the compiled frames of a
+        GIF, without decoding the GIF, nor copying its pixels.
+
+        The frames of a GIF are the size of the GIF and follow each
+        other, so they are loaded as one tall surface over the
+        mapped pixels, and each frame is a subsurface of it.
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            animatedsprite.AnimatedSprite: --
+
+        """
+
+        frames_index = self._files[file_name]['frames']
+        frame_sizes = set(tuple(frame_index['size'])
+                          for frame_index in frames_index)
+        contiguous = all(frame_index['offset'] ==
+                         previous_index['offset'] + previous_index['length']
+                         for previous_index, frame_index
+                         in zip(frames_index, frames_index[1:]))
+
+        if len(frame_sizes) == 1 and contiguous:
+            width, height = frame_sizes.pop()
+            first_offset = frames_index[0]['offset']
+            length = sum(frame_index['length']
+                         for frame_index in frames_index)
+            sheet = pygame.image.frombuffer(self.bundle.view(first_offset,
+                                                             length),
+                                            (width,
+                                             height * len(frames_index)),
+                                            'RGBA')
+            surfaces = [sheet.subsurface((0, height * i, width, height))
+                        for i in range(len(frames_index))]
+
+        else:
+            surfaces = [pygame.image.frombuffer(
+                            self.bundle.view(frame_index['offset'],
+                                             frame_index['length']),
+                            tuple(frame_index['size']),
+                            'RGBA')
+                        for frame_index in frames_index]
+
+        frames = []
+        start_time = 0
+
+        for surface, frame_index in zip(surfaces, frames_index):
+
+            if frame_index['anchors'] is None:
+                anchors = None
+            else:
+                labeled_anchors = {label: animatedsprite.Anchor(x, y)
+                                   for label, (x, y)
+                                   in frame_index['anchors'].items()}
+                anchors = animatedsprite.FrameAnchors(labeled_anchors)
+
+            frame = animatedsprite.Frame(surface=surface,
+                                         start_time=start_time,
+                                         duration=frame_index['duration'],
+                                         anchors=anchors)
+            frames.append(frame)
+            start_time += frame.duration
+
+        return animatedsprite.AnimatedSprite(frames)
+
+
+def open_bundle(path=None):
+    """Return the Bundle at path, opening it again if it was
+    modified since it was last opened.
+
+    Args:
+        path (str|None): defaults to DEFAULT_PATH.
+
+    Returns:
+        Bundle|None: None if there is no file at path.
+
+    """
+
+    path = os.path.abspath(path or DEFAULT_PATH)
+
+    try:
+        modification_time = os.path.getmtime(path)
+    except OSError:
+
+        return None
+
+    if path in _open_bundles:
+        opened_mtime, bundle = _open_bundles[path]
+
+        if opened_mtime == modification_time:
+
+            return bundle
+
+    bundle = Bundle(path)
+    _open_bundles[path] = (modification_time, bundle)
+
+    return bundle
+
+
+def write_bundle(path, bundled_resources):
+    """Write a bundle of the supplied resources.
+
+    Args:
+        path (str): --
+        bundled_resources (list[tuple]): (category, name,
+            modification time, raw files, compiled files) for each
+            resource, where raw files is a dict of file name ->
+            bytes, and compiled files a dict of file name ->
+            AnimatedSprite, pygame.Surface or ConfigParser for
+            the files to compile.
+
+    """
+
+    index = {}
+    data = []
+    offset = 0
+
+    for (resource_category, resource_name, modification_time,
+         raw_files, compiled_files) in bundled_resources:
+
+        files_index = {}
+
+        for file_name, file_data in sorted(raw_files.items()):
+            files_index[file_name] = {'offset': offset,
+                                      'length': len(file_data)}
+            data.append(file_data)
+            offset += len(file_data)
+
+        for file_name, compiled_file in sorted(compiled_files.items()):
+
+            if isinstance(compiled_file, configparser.RawConfigParser):
+                files_index[file_name]['sections'] = [
+                    [section, compiled_file.items(section, raw=True)]
+                    for section in compiled_file.sections()
+                ]
+
+                continue
+
+            # for the sake of the pixel buffers, which are used as is
+            padding = b'\0' * (-offset % ALIGNMENT)
+            data.append(padding)
+            offset += len(padding)
+
+            if isinstance(compiled_file, pygame.Surface):
+                palette = None
+
+                # keep images as they are: palettes, colorkeys and all
+                if compiled_file.get_bitsize() == 8:
+                    pixels_format = 'P'
+                    palette = [color[:3]
+                               for color in compiled_file.get_palette()]
+                elif compiled_file.get_flags() & pygame.SRCALPHA:
+                    pixels_format = 'RGBA'
+                else:
+                    pixels_format = 'RGB'
+
+                colorkey = compiled_file.get_colorkey()
+                pixels = pygame.image.tostring(compiled_file, pixels_format)
+                files_index[file_name]['pixels'] = {
+                    'offset': offset,
+                    'length': len(pixels),
+                    'size': compiled_file.get_size(),
+                    'format': pixels_format,
+                    'palette': palette,
+                    'colorkey': colorkey and tuple(colorkey),
+                }
+                data.append(pixels)
+                offset += len(pixels)
+
+                continue
+
+            frames_index = []
+
+            for frame in compiled_file.frames:
+                pixels = pygame.image.tostring(frame.surface, 'RGBA')
+
+                if frame.anchors is None:
+                    anchors = None
+                else:
+                    anchors = {label: anchor.as_tuple()
+                               for label, anchor in frame.anchors.items()}
+
+                frames_index.append({'offset': offset,
+                                     'length': len(pixels),
+                                     'size': frame.surface.get_size(),
+                                     'duration': frame.duration,
+                                     'anchors': anchors})
+                data.append(pixels)
+                offset += len(pixels)
+
+            files_index[file_name]['frames'] = frames_index
+
+        key = resource_category + '/' + resource_name
+        index[key] = {'mtime': modification_time, 'files': files_index}
+
+    index = json.dumps({'resources': index}, sort_keys=True).encode('utf-8')
+
+    # JSON may end in whitespace, which aligns the data
+    index += b' ' * (-(HEADER.size + len(index)) % ALIGNMENT)
+
+    # the bundle at path may be mapped, thus replace it as a whole
+    temporary_path = path + '.tmp'
+
+    with open(temporary_path, 'wb') as bundle_file:
+        bundle_file.write(HEADER.pack(MAGIC, len(index)))
+        bundle_file.write(index)
+
+        for file_data in data:
+            bundle_file.write(file_data)
+
+    getattr(os, 'replace', os.rename)(temporary_path, path)
+
+
+def main():
+    """Compile the resources of the current directory into a
+    bundle, see resources.compile_bundle().
+
+    """
+
+    import argparse
+
+    # resources uses this module
+    from hypatia import resources
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--output', default=DEFAULT_PATH,
+                        help='where to write the bundle')
+    args = parser.parse_args()
+
+    resources.compile_bundle(args.output)
+    print('compiled %s' % args.output)
+
+
+if __name__ == "__main__":
+    main()
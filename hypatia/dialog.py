@@ -50,6 +50,9 @@ class DialogBox(object):
         self.viewport_rect = None
         self.reset_viewport_rect()
 
+        # what was displayed last, see dirty_rects()
+        self._last_state = (False, None, None)
+
     def reset_viewport_rect(self):
         viewport_dimensions = (self.viewport_width,
                                self.lines_at_a_time * self.character_size[1])
@@ -91,6 +94,28 @@ class DialogBox(object):
             self.active = False
             self.reset_viewport_rect()
 
+    def dirty_rects(self):
+        """Report the area of the viewport which needs to be
+        redrawn because what this DialogBox displays changed
+        since the last call, e.g., it appeared or disappeared.
+
+        Used for dirty rect rendering.
+
+        Returns:
+            list[pygame.Rect]: empty if nothing changed.
+
+        """
+
+        state = (self.active, self.full_surface, tuple(self.viewport_rect))
+
+        if state == self._last_state:
+
+            return []
+
+        self._last_state = state
+
+        return [pygame.Rect((0, 0), self.viewport_rect.size)]
+
     # incomplete
     def blit(self, to_surface):
         """Blit current viewport of text to_surface.
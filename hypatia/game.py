@@ -21,6 +21,11 @@ Note:
 
 import os
 import sys
+import zlib
+import array
+import base64
+import bisect
+import threading
 import xml.etree.ElementTree as ET
 
 try:
@@ -31,6 +36,7 @@ except ImportError:
 
 import pygame
 
+from hypatia import atlas
 from hypatia import tiles
 from hypatia import dialog
 from hypatia import render
@@ -40,6 +46,7 @@ from hypatia import physics
 from hypatia import resources
 from hypatia import constants
 from hypatia import controllers
+from hypatia import animatedsprite
 
 
 class TMXException(Exception):
@@ -66,29 +73,6 @@ class TMXMissingPlayerStartPosition(TMXException):
         super(TMXMissingPlayerStartPosition, self).__init__(message)
 
 
-class TMXTooManyTilesheets(TMXException):
-    """A TMX file was attempted to be imported through
-    `TileMap.from_tmx()`, but the TMX defined more than
-    one tilesheet. This is a feature Hypatia does not
-    support.
-
-    See Also:
-        :meth:`TileMap.from_tmx()` and :class:`TMX`.
-
-    """
-
-    def __init__(self):
-        """The exception message is this class' docstring.
-
-        Note:
-            Mostly scaffolding, plus won't be here for long.
-
-        """
-
-        message = TMXTooManyTilesheets.__docstring__
-        super(TMXTooManyTilesheets, self).__init__(message)
-
-
 class TMXVersionUnsupported(TMXException):
     """Attempted to create a TileMap from a TMX map, but
     the TMX map version is unsupported.
@@ -114,8 +98,9 @@ class TMXVersionUnsupported(TMXException):
 
 
 class TMXLayersNotCSV(TMXException):
-    """The data encoding used for layers during Tilemap.from_tmx()
-    is not supported. Only CSV is supported.
+    """The data encoding or compression used for layers during
+    Tilemap.from_tmx() is not supported. CSV and base64, either
+    uncompressed, zlib or gzip, are supported.
 
     Attribs:
         data_encoding (str): the failed data encoding.
@@ -145,21 +130,95 @@ class Hypatia(object):
 
 
 class Game(object):
-    """Simulates the interaction between game components."""
+    """Simulates the interaction between game components.
+
+    Attributes:
+        use_dirty_rects (bool): Opt-in; only redraw and update
+            the display in the areas which changed each frame,
+            instead of redrawing the whole scene and flipping.
+        scene_loader (SceneLoader|None): the scene being loaded in
+            the background, see Game.load_scene().
+        atlas_path (str|None): Opt-in; where the atlas of every
+            scene is saved, to be reused by the next run, e.g.,
+            atlas.DEFAULT_PATH, see Scene.runtime_setup().
+
+    """
 
     def __init__(self, screen=None, scene=None,
-                 viewport_size=None, dialogbox=None):
+                 viewport_size=None, dialogbox=None, dirty_rects=False,
+                 atlas_path=None):
 
         self.screen = screen or render.Screen()
         self.viewport = render.Viewport(viewport_size)
         self.dialogbox = dialogbox or dialog.DialogBox(self.viewport.rect.size)
+        self.use_dirty_rects = dirty_rects
+        self.atlas_path = atlas_path
 
         # everything has been added, run runtime_setup() on each
         # relevant item
+        self.scene_loader = None
         self.scene = scene
-        self.scene.runtime_setup()
+        self.scene.runtime_setup(atlas_path)
         self.start_loop()
 
+    def load_scene(self, scene_preparer, *args, **kwargs):
+        """Start loading the next scene in the background, e.g.,
+        the scene behind a door, while the current scene is still
+        being played. The game loop switches to it once it is
+        loaded, see Game.poll_scene_loader().
+
+        Args:
+            scene_preparer (callable): E.g., Scene.prepare_resource,
+                see SceneLoader.
+            *args: passed to scene_preparer.
+            **kwargs: passed to scene_preparer.
+
+        Returns:
+            SceneLoader: --
+
+        """
+
+        self.scene_loader = SceneLoader(scene_preparer, *args, **kwargs)
+
+        return self.scene_loader
+
+    def change_scene(self, scene):
+        """Switch to scene, between two frames.
+
+        Args:
+            scene (Scene): --
+
+        """
+
+        # converting surfaces requires the display, thus the main thread
+        scene.runtime_setup(self.atlas_path)
+        self.scene = scene
+
+    def poll_scene_loader(self):
+        """Switch to the scene being loaded in the background, if
+        it is loaded. Does not block on the background thread; the
+        pygame objects of the scene are created here, in the main
+        thread, see SceneLoader.result().
+
+        Returns:
+            bool: Whether the scene was switched.
+
+        Raises:
+            Exception: whatever the scene preparer, or the function
+                it returned, raised.
+
+        """
+
+        if self.scene_loader is None or not self.scene_loader.done():
+
+            return False
+
+        scene_loader = self.scene_loader
+        self.scene_loader = None
+        self.change_scene(scene_loader.result())
+
+        return True
+
     # will be removed
     def old_render(self):
         """Drawing behavior for game objects.
@@ -202,23 +261,140 @@ class Game(object):
 
         Needs to be updated to use sprite groups.
 
+        Returns:
+            list[pygame.Rect]|None: The areas of the viewport
+                which were redrawn if using dirty rects,
+                otherwise None (everything was redrawn).
+
         """
 
+        if self.use_dirty_rects:
+            dirty_rects = (self.scene.
+                           render_dirty(self.viewport,
+                                        self.screen.clock,
+                                        self.dialogbox.dirty_rects()))
+            self.dialogbox.blit(self.viewport.surface)
+
+            return dirty_rects
+
         self.scene.render(self.viewport, self.screen.clock)
         self.dialogbox.blit(self.viewport.surface)
 
     def start_loop(self):
         controller = controllers.WorldController(self)
+        dirty_rects = None
 
         while controller.handle_input():
             controller.handle_input()
-            self.screen.update(self.viewport.surface)
-            self.render()
+
+            # a new scene has to be drawn and displayed in full
+            if self.poll_scene_loader():
+                dirty_rects = None
+
+            self.screen.update(self.viewport.surface, dirty_rects)
+            dirty_rects = self.render()
 
         pygame.quit()
         sys.exit()
 
 
+class SceneLoader(object):
+    """Loads a Scene in a background thread, so that the current
+    scene can still be played meanwhile.
+
+    No pygame object is created in the background, as pygame and
+    SDL expect them to be created in the main thread: the
+    background thread only reads and parses the resources of the
+    scene, and decodes its images into bytes, see
+    Scene.prepare_resource(). The surfaces, the tilemap, the
+    walkabouts and the scene itself are created from those in the
+    main thread, by SceneLoader.result().
+
+    Example:
+        >>> loader = SceneLoader(Scene.prepare_resource, 'debug')
+        >>> isinstance(loader.result(), Scene)
+        True
+        >>> loader.done()
+        True
+
+    """
+
+    def __init__(self, scene_preparer, *args, **kwargs):
+        """Start loading the scene.
+
+        Args:
+            scene_preparer (callable): E.g., Scene.prepare_resource;
+                run in the background, it returns a function which
+                creates the scene, in the main thread.
+            *args: passed to scene_preparer.
+            **kwargs: passed to scene_preparer.
+
+        """
+
+        self._create_scene = None
+        self._scene = None
+        self._exception = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._load,
+                                        args=(scene_preparer,
+                                              args,
+                                              kwargs))
+
+        # don't keep the game from quitting
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _load(self, scene_preparer, args, kwargs):
+
+        try:
+            self._create_scene = scene_preparer(*args, **kwargs)
+        except Exception as exception:
+            self._exception = exception
+        finally:
+            self._done.set()
+
+    def done(self):
+        """Whether the scene is ready to be created, or failed
+        to load.
+
+        Returns:
+            bool: --
+
+        """
+
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the scene to be loaded, then create it (once)
+        and return it. Call this in the main thread.
+
+        Args:
+            timeout (float|None): in seconds; wait indefinitely
+                if None.
+
+        Returns:
+            Scene|None: None if the timeout expired.
+
+        Raises:
+            Exception: whatever the scene preparer, or the function
+                it returned, raised.
+
+        """
+
+        if not self._done.wait(timeout):
+
+            return None
+
+        if self._exception is not None:
+
+            raise self._exception
+
+        if self._scene is None:
+            self._scene = self._create_scene()
+
+        return self._scene
+
+
 class Scene(object):
     """A map with configuration data/meta, e.g., NPCs.
 
@@ -228,12 +404,28 @@ class Scene(object):
         denoting the starting position for human player.
       human_player (hypatia.player.Player): the human player object.
       npcs (list): a list of hypatia.player.NPC objects
+      animation_clock (animatedsprite.AnimationClock): advances
+        the animated tiles of the tilemap.
+      atlas (atlas.TextureAtlas|None): the frames of the
+        animations of this Scene, optionally saved to be reused
+        by the next run, see runtime_setup().
+
+    Constants:
+      MAX_DIRTY_RECTS (int): render_dirty() merges the areas to
+        redraw into one once there are more than this many.
+      HUMAN_PLAYER_WALKABOUTS (tuple): the walkabout resources
+        create_human_player() uses, for preload().
 
     Notes:
-        Should have methods for managing npcs, e.g., add/remove.
+        NPCs should be managed through add_npc(), remove_npc() and
+        npc_moved(), which keep the NPCs in the tilemap's
+        collision grid up to date.
 
     """
 
+    MAX_DIRTY_RECTS = 16
+    HUMAN_PLAYER_WALKABOUTS = ('slime', 'bow')
+
     def __init__(self, tilemap, player_start_position,
                  human_player, npcs=None):
         """
@@ -252,10 +444,62 @@ class Scene(object):
         self.player_start_position = player_start_position
         self.human_player = human_player
 
-        self.npcs = npcs or []
+        # every animated tile is advanced once per update(), no
+        # matter how many times it appears on the map
+        self.animation_clock = animatedsprite.AnimationClock()
+
+        for tilesheet in tilemap.tilesheets:
+
+            for tile_animation in tilesheet.animated_tiles.values():
+                self.animation_clock.add(tile_animation)
+
+        self.npcs = []
+        self.npc_sprite_group = pygame.sprite.Group()
+
+        for npc in npcs or []:
+            self.add_npc(npc)
+
+        # see runtime_setup()
+        self.atlas = None
+
+        # where the viewport was during the last render_dirty()
+        self._last_viewport_rect = None
+
+    def add_npc(self, npc):
+        """Add an NPC to this scene, indexing its walkabout
+        in the tilemap's collision grid.
+
+        Args:
+            npc (player.Npc): --
+
+        """
+
+        self.npcs.append(npc)
+        self.npc_sprite_group.add(npc.walkabout)
+        self.tilemap.collision_grid.add(npc.walkabout, npc.walkabout.rect)
+
+    def remove_npc(self, npc):
+        """Remove an NPC from this scene and the collision grid.
+
+        Args:
+            npc (player.Npc): --
+
+        """
+
+        self.npcs.remove(npc)
+        self.npc_sprite_group.remove(npc.walkabout)
+        self.tilemap.collision_grid.remove(npc.walkabout)
+
+    def npc_moved(self, npc):
+        """Update the collision grid after an NPC's
+        walkabout rect has changed.
+
+        Args:
+            npc (player.Npc): --
+
+        """
 
-        npc_walkabouts = [n.walkabout for n in self.npcs]
-        self.npc_sprite_group = pygame.sprite.Group(*npc_walkabouts)
+        self.tilemap.collision_grid.move(npc.walkabout, npc.walkabout.rect)
 
     @staticmethod
     def create_human_player(start_position):
@@ -282,6 +526,54 @@ class Scene(object):
 
         return human_player
 
+    @classmethod
+    def preload(cls, tilesheet_names, walkabout_names,
+                progress=None, workers=None):
+        """Load the resources of a scene, decoding their images in
+        a pool of worker threads, so that creating the tilemap and
+        the walkabouts involves no decoding. See resources.preload().
+
+        Args:
+            tilesheet_names (list[str]): --
+            walkabout_names (list[str]): those of the NPCs; the
+                human player's are added.
+            progress (callable|None): progress(done, total), called
+                as each file is decoded.
+            workers (int|None): defaults to the number of CPUs.
+
+        """
+
+        resources.preload(cls.resource_keys(tilesheet_names,
+                                            walkabout_names),
+                          workers, progress)
+
+    @classmethod
+    def resource_keys(cls, tilesheet_names, walkabout_names):
+        """The resources of a scene, see Scene.preload().
+
+        Args:
+            tilesheet_names (list[str]): --
+            walkabout_names (list[str]): those of the NPCs; the
+                human player's are added.
+
+        Returns:
+            list[tuple]: (category, name) of each resource.
+
+        Example:
+            >>> Scene.resource_keys(['debug'], ['debug'])[0]
+            ('tilesheets', 'debug')
+
+        """
+
+        resource_keys = [('tilesheets', tilesheet_name)
+                         for tilesheet_name in tilesheet_names]
+        resource_keys.extend(('walkabouts', walkabout_name)
+                             for walkabout_name
+                             in (list(cls.HUMAN_PLAYER_WALKABOUTS) +
+                                 list(walkabout_names)))
+
+        return resource_keys
+
     def to_tmx_resource(self, tmx_name):
         """Scaffolding.
 
@@ -290,27 +582,64 @@ class Scene(object):
         pass
 
     @classmethod
-    def from_tmx_resource(cls, tmx_name):
+    def from_tmx_resource(cls, tmx_name, progress=None, workers=None):
         """Create a scene from a Tiled editor TMX file in
         the scenes resource directory.
 
+        Args:
+            tmx_name (str): --
+            progress (callable|None): see Scene.preload().
+            workers (int|None): see Scene.preload().
+
         Returns:
             Scene: A scene created using all compatible
                 data from designated TMX file.
 
         """
 
+        return cls.prepare_tmx_resource(tmx_name, progress, workers)()
+
+    @classmethod
+    def prepare_tmx_resource(cls, tmx_name, progress=None, workers=None):
+        """Read and parse a TMX file, and decode the images of the
+        scene, without creating any pygame object, thus in any
+        thread, e.g., that of a SceneLoader.
+
+        Args:
+            tmx_name (str): --
+            progress (callable|None): see Scene.preload().
+            workers (int|None): see Scene.preload().
+
+        Returns:
+            callable: creates the Scene, with the surfaces of the
+                decoded images; call it in the main thread.
+
+        """
+
+        decoded_files = []
+
+        def preload(tilesheet_names, walkabout_names):
+            decoded_files.extend(resources.decode_resources(
+                cls.resource_keys(tilesheet_names, walkabout_names),
+                workers, progress))
+
         file_path = os.path.join('resources', 'scenes', tmx_name + '.tmx')
-        tmx = TMX(file_path)
-        human_player = cls.create_human_player(tmx.player_start_position)
+        tmx = TMX(file_path, preload=preload, create=False)
 
-        return Scene(tilemap=tmx.tilemap,
-                     player_start_position=tmx.player_start_position,
-                     human_player=human_player,
-                     npcs=tmx.npcs)
+        def create_scene():
+            resources.finish_decoding(decoded_files)
+            tmx.create()
+            human_player = cls.create_human_player(tmx.player_start_position)
+
+            return Scene(tilemap=tmx.tilemap,
+                         player_start_position=tmx.player_start_position,
+                         human_player=human_player,
+                         npcs=tmx.npcs)
+
+        return create_scene
 
     @classmethod
-    def from_resource(self, scene_name):
+    def from_resource(self, scene_name, progress=None, workers=None):
         """The native format, and hopefully most reliable,
         stable, and generally best way of saving, loading,
         or creating Hypatia scenes.
@@ -321,6 +650,27 @@ class Scene(object):
         Args:
           scene_name (str): the name of the directory which corresponds
             to the map you want to load from resources/maps.
+          progress (callable|None): see Scene.preload().
+          workers (int|None): see Scene.preload().
+
+        """
+
+        return self.prepare_resource(scene_name, progress, workers)()
+
+    @classmethod
+    def prepare_resource(cls, scene_name, progress=None, workers=None):
+        """Read and parse a scene resource, and decode the images
+        of the scene, without creating any pygame object, thus in
+        any thread, e.g., that of a SceneLoader.
+
+        Args:
+            scene_name (str): see Scene.from_resource().
+            progress (callable|None): see Scene.preload().
+            workers (int|None): see Scene.preload().
+
+        Returns:
+            callable: creates the Scene, with the surfaces of the
+                decoded images; call it in the main thread.
 
         """
 
@@ -328,11 +678,24 @@ class Scene(object):
         # the general scene configuration, first.
         resource = resources.Resource('scenes', scene_name)
         scene_ini = resource['scene.ini']
+        npcs_ini = resource['npcs.ini']
 
-        # Construct a TileMap from the tilemap.txt
-        # contents from the scene resource.
+        # Decode the images of the tilesheets and of every
+        # walkabout at once, in parallel.
         tilemap_string = resource['tilemap.txt']
-        tilemap = tiles.TileMap.from_string(tilemap_string)
+        tilesheets_string = tilemap_string.split('\n', 1)[0]
+        tilesheet_names = [name for name, __ in (tiles.TileMap.
+                           tilesheets_from_string(tilesheets_string))]
+        walkabout_names = [npcs_ini.get(npc_name, 'walkabout')
+                           for npc_name in npcs_ini.sections()
+                           if npcs_ini.has_option(npc_name, 'walkabout')]
+        decoded_files = resources.decode_resources(
+            cls.resource_keys(tilesheet_names, walkabout_names),
+            workers, progress)
+
+        # Parse the tilemap.txt contents from the scene resource,
+        # the TileMap is constructed from them in create_scene().
+        tilemap_blueprint = tiles.TileMap.parse_string(tilemap_string)
 
         # Get the player's starting position from the
         # general scene configuration.
@@ -340,16 +703,41 @@ class Scene(object):
         player_start_y = scene_ini.getint('general', 'player_start_y')
         player_start_position = (player_start_x, player_start_y)
 
+        # everything from here on creates pygame objects
+        def create_scene():
+            resources.finish_decoding(decoded_files)
+            tilemap = tiles.TileMap(*tilemap_blueprint)
+
+            return cls.create_scene_from_resource(tilemap,
+                                                  player_start_position,
+                                                  npcs_ini)
+
+        return create_scene
+
+    @classmethod
+    def create_scene_from_resource(cls, tilemap, player_start_position,
+                                   npcs_ini):
+        """The part of Scene.from_resource() which creates pygame
+        objects, see Scene.prepare_resource().
+
+        Args:
+            tilemap (tiles.TileMap): --
+            player_start_position (tuple): --
+            npcs_ini (ConfigParser): the npcs.ini of the scene.
+
+        Returns:
+            Scene: --
+
+        """
+
         # Create a player using the player
         # start position found.
-        human_player = self.create_human_player(player_start_position)
+        human_player = cls.create_human_player(player_start_position)
 
         # npcs.ini
         #
         # Create a list of NPCs using a configuration file
         # from the scene resource.
-        npcs_ini = resource['npcs.ini']
-
         npcs = []
 
         # each section title is the npc's name,
@@ -398,23 +786,54 @@ class Scene(object):
                 the tilemap's wallmap.
 
         Notes:
-            Should use pygame.sprite.spritecollide()
+            Only the cells which rect overlaps are checked,
+            regardless of the size of the map.
+
+        See Also:
+            Scene.collide_check_bounds()
 
         """
 
-        possible_collisions = self.tilemap.impassable_rects
+        return self.collide_check_bounds(rect.left, rect.top,
+                                         rect.right, rect.bottom)
 
-        for npc in self.npcs:
-            possible_collisions.append(npc.walkabout.rect)
+    def collide_check_bounds(self, left, top, right, bottom):
+        """Returns True if there are collisions within the
+        supplied pixel area.
+
+        The tilemap's passability grid is checked first, which
+        does not involve any pygame.Rect, then the NPCs in the
+        tilemap's collision grid.
+
+        Args:
+            left (int): --
+            top (int): --
+            right (int): exclusive, like pygame.Rect.right.
+            bottom (int): exclusive, like pygame.Rect.bottom.
+
+        """
 
-        return rect.collidelist(possible_collisions) != -1
+        if self.tilemap.passability.blocked(left, top, right, bottom):
 
-    def runtime_setup(self):
+            return True
+
+        area = pygame.Rect(left, top, right - left, bottom - top)
+
+        return self.tilemap.collision_grid.collides(area)
+
+    def runtime_setup(self, atlas_path=None):
         """Initialize all the NPCs, tilemap, etc.
 
         Is this a horrible way of doing this? I dunno,
         not the fondest...
 
+        Args:
+            atlas_path (str|None): If supplied, the frames already
+                packed into the atlas saved there by an earlier run
+                are reused, and the atlas is saved there again if
+                anything was added. Otherwise, nothing is read from
+                or written to disk.
+
         """
 
         npcs_to_setup = tuple(npc.walkabout for npc in self.npcs)
@@ -424,42 +843,171 @@ class Scene(object):
         for object_to_setup in objects_to_setup + npcs_to_setup:
             object_to_setup.runtime_setup()
 
-    def render(self, viewport, clock):
-        """Render this Scene onto viewport.
+        # everything is loaded by now; frames which were packed
+        # in an earlier run are not copied again
+        if atlas_path is None:
+            self.atlas = atlas.TextureAtlas()
+        else:
+            self.atlas = atlas.open_atlas(atlas_path)
+
+        self.pack(self.atlas)
+
+        if atlas_path is not None and self.atlas.modified:
+
+            # the atlas on disk is only a cache
+            try:
+                self.atlas.save(atlas_path)
+            except (IOError, OSError):
+                pass
+
+    def pack(self, atlas):
+        """Pack the frames of the animated tiles and of the
+        walkabouts of this Scene into atlas.
 
         Args:
-            viewport (render.Viewport): The global/master viewport,
-                where stuff will be blitted to. Also used for some
-                calculations.
+            atlas (atlas.TextureAtlas): --
+
+        """
+
+        for tilesheet in self.tilemap.tilesheets:
+            tilesheet.pack(atlas)
+
+        self.human_player.walkabout.pack(atlas)
+
+        for npc in self.npcs:
+            npc.walkabout.pack(atlas)
+
+    def update(self, viewport, clock):
+        """Advance the animations of this Scene and center
+        viewport on the human player.
+
+        Args:
+            viewport (render.Viewport): The global/master viewport.
             clock (pygame.time.Clock): Global/master/the game
                 clock used for timing in this game.
 
         """
 
-        (self.tilemap.tilesheet.animated_tiles_group.
-         update(clock, viewport.surface, viewport.rect.topleft))
+        self.animation_clock.tick(clock.get_time())
         first_tilemap_layer = self.tilemap.layer_images[0]
         viewport.center_on(self.human_player.walkabout,
                            first_tilemap_layer.get_rect())
-        viewport.blit(first_tilemap_layer)
+
+        for npc in self.npcs:
+            npc.walkabout.update(clock,
+                                 viewport.surface,
+                                 viewport.rect.topleft)
+
+        self.human_player.walkabout.update(clock,
+                                           viewport.surface,
+                                           viewport.rect.topleft)
+
+    def draw(self, viewport):
+        """Draw this Scene as it currently stands onto viewport,
+        without advancing any animation. Only the clip area of
+        the viewport surface is affected.
+
+        Args:
+            viewport (render.Viewport): --
+
+        """
+
+        viewport.blit(self.tilemap.layer_images[0])
         self.tilemap.blit_layer_animated_tiles(viewport, 0)
 
         # render each npc walkabout
         # should use group draw
         for npc in self.npcs:
-            npc.walkabout.blit(clock,
-                               viewport.surface,
-                               viewport.rect.topleft)
+            npc.walkabout.draw(viewport.surface, viewport.rect.topleft)
 
         # finally human and rest map layers last
-        self.human_player.walkabout.blit(clock,
-                                         viewport.surface,
+        self.human_player.walkabout.draw(viewport.surface,
                                          viewport.rect.topleft)
 
         for i, layer in enumerate(self.tilemap.layer_images[1:], 1):
             viewport.blit(layer)
             self.tilemap.blit_layer_animated_tiles(viewport, i)
 
+    def render(self, viewport, clock):
+        """Render this Scene onto viewport.
+
+        Args:
+            viewport (render.Viewport): The global/master viewport,
+                where stuff will be blitted to. Also used for some
+                calculations.
+            clock (pygame.time.Clock): Global/master/the game
+                clock used for timing in this game.
+
+        """
+
+        self.update(viewport, clock)
+
+        # everything is drawn, edited tiles included
+        self.tilemap.pop_changed_rects()
+        self.draw(viewport)
+
+    def render_dirty(self, viewport, clock, dirty_rects=None):
+        """Render this Scene onto viewport, only redrawing the
+        areas which changed since the last call.
+
+        Walkabouts and animated tiles report the areas they
+        changed. If the viewport scrolled, everything is redrawn.
+
+        Args:
+            viewport (render.Viewport): --
+            clock (pygame.time.Clock): --
+            dirty_rects (list[pygame.Rect]): Additional areas,
+                relative to viewport, to redraw, e.g., where
+                the dialog box was.
+
+        Returns:
+            list[pygame.Rect]: the areas of viewport which were
+                redrawn, relative to viewport. Empty if nothing
+                changed.
+
+        """
+
+        self.update(viewport, clock)
+
+        # every walkabout has to be asked, so that it keeps track
+        # of what was drawn last, even if we redraw everything.
+        changed_areas = []
+        walkabouts = ([npc.walkabout for npc in self.npcs] +
+                      [self.human_player.walkabout])
+
+        for walkabout in walkabouts:
+            changed_areas.extend(walkabout.dirty_rects())
+
+        changed_areas.extend(self.tilemap.
+                             changed_animated_tile_rects(viewport.rect))
+        changed_areas.extend(self.tilemap.pop_changed_rects())
+
+        viewport_area = viewport.surface.get_rect()
+
+        if viewport.rect != self._last_viewport_rect:
+            self._last_viewport_rect = viewport.rect.copy()
+            dirty_rects = [viewport_area]
+
+        else:
+            offset_x, offset_y = viewport.rect.topleft
+            dirty_rects = list(dirty_rects or [])
+            dirty_rects.extend(area.move(-offset_x, -offset_y)
+                               for area in changed_areas)
+            dirty_rects = [rect.clip(viewport_area) for rect in dirty_rects]
+            dirty_rects = [rect for rect in dirty_rects
+                           if rect.width and rect.height]
+
+            if len(dirty_rects) > self.MAX_DIRTY_RECTS:
+                dirty_rects = [dirty_rects[0].unionall(dirty_rects[1:])]
+
+        for rect in dirty_rects:
+            viewport.surface.set_clip(rect)
+            self.draw(viewport)
+
+        viewport.surface.set_clip(None)
+
+        return dirty_rects
+
 
 class TMX(object):
     """`TMX` object to represent and "translate"
@@ -471,24 +1019,33 @@ class TMX(object):
     TMX file must have the following settings:
 
       * orientation: orthogonal
-      * tile layer format: csv
+      * tile layer format: csv, or base64 (uncompressed,
+        zlib or gzip compressed)
       * tile render order: right down
 
+    Flipped tiles are drawn unflipped.
+
     You must also specify the tilesheet name you want to use
-    in Hypatia, as your tileset image name. You may only use
-    one image.
+    in Hypatia, as your tileset name (or, for an external
+    tileset, its file name). A map may use several tilesets of
+    the same tile size; only those its layers use are loaded.
 
     Constants:
         SUPPORTED (str): the TMX file format which is supported.
+        GID_MASK (int): the bits of a global tile ID which are
+            not flags, e.g., for flipping.
 
     Attributes:
-        root (ElementTree): the XML ElementTree root of the TMX file.
+        root (ElementTree.Element): the XML root of the TMX file,
+            i.e., <map>, without the contents of its layers.
         player_start_position (tuple): (x, y) coordinate in which
             the player begins this scene at.
-        layers (list): a 3D list of tile IDs referring to a tile
-            by id in a Tilesheet. This data is extrapolated from
-            a CSV-format list of tile IDs.
-        npcs (List[players.Npc]): --
+        layers (list[array.array]): the tile IDs of each layer,
+            as in tiles.TileMap.tile_ids.
+        tilesheet_specs (list[tuple]): (tilesheet name, first global
+            ID) of each tileset the layers use.
+        tilemap (tiles.TileMap|None): None until TMX.create().
+        npcs (List[players.Npc]|None): None until TMX.create().
 
     See Also:
         http://doc.mapeditor.org/reference/tmx-map-format/
@@ -496,85 +1053,149 @@ class TMX(object):
     """
 
     SUPPORTED = '1.0'
+    GID_MASK = 0x1fffffff
+
+    # array typecode of unsigned 32-bit integers
+    _GLOBAL_ID_TYPECODE = 'I' if array.array('I').itemsize == 4 else 'L'
 
-    def __init__(self, path_or_readable):
+    def __init__(self, path_or_readable, preload=None, create=True):
         """Read XML from path_or_readable, validate the TMX as being
         supported by Hypatia, and set all supported information as
         attributes.
 
         Args:
             path_or_readable (str|file-like-object): This is
-                plopped right into ElementTree.parse().
+                plopped right into ElementTree.iterparse().
+            preload (callable|None): called as
+                preload(tilesheet names, walkabout names) before the
+                tilemap and NPCs are created, e.g., Scene.preload().
+            create (bool): Whether to create the tilemap and the
+                NPCs, see TMX.create(). If not, no pygame object is
+                created, thus this may run in any thread.
 
         Note:
             This method is under-documented!
 
         """
 
-        # parse TMXML for TileMap-specific/supported data
-        tree = ET.parse(path_or_readable)
-        self.root = tree.getroot()  # <map ...>
+        # Stream TMXML for TileMap-specific/supported data: each
+        # layer is decoded into an array as soon as it has been
+        # read, then cleared, so that the whole document is never
+        # in memory. Everything else is kept in self.root.
+        self.root = None  # <map ...>
 
-        # check the version first, make sure it's supported
-        map_version = self.root.attrib['version']
+        # get the 3D constructor/blueprint of TileMap,
+        # which simply references, by integer, the
+        # tile from tilesheet.
+        layers = []
+        width_tiles = None
 
-        if map_version != self.SUPPORTED:
+        for event, element in ET.iterparse(path_or_readable,
+                                           events=('start', 'end')):
 
-            raise TMXVersionUnsupported(map_version)
+            if self.root is None:
+                self.root = element
 
-        # Get the Tilesheet (tileset) name from the tileset
-        tileset_images = self.root.findall('.//tileset/image')
+                # check the version first, make sure it's supported
+                map_version = self.root.attrib['version']
 
-        if len(tileset_images) > 1:
+                if map_version != self.SUPPORTED:
 
-            # too many tilesets!
-            raise TMXTooManyTilesheets()
+                    raise TMXVersionUnsupported(map_version)
 
-        tileset = self.root.find('.//tileset')
-        tilesheet_name = tileset.attrib['name']
+            elif event == 'end' and element.tag == 'layer':
+                width_tiles = int(element.attrib['width'])
+                layers.append(self.decode_layer(element.find('data')))
+                element.clear()
 
-        # get the 3D constructor/blueprint of TileMap,
-        # which simply references, by integer, the
-        # tile from tilesheet.
-        layers = []
+        # Get the Tilesheet (tileset) names from the tilesets which
+        # are used, by their range of global tile IDs
+        tilesets = sorted(self.root.findall('.//tileset'),
+                          key=lambda tileset: int(tileset.attrib['firstgid']))
+        first_global_ids = [int(tileset.attrib['firstgid'])
+                            for tileset in tilesets]
+        used_tilesets = set()
 
-        for layer_data in self.root.findall(".//layer/data"):
-            data_encoding = layer_data.attrib['encoding']
+        for global_id in set().union(*layers):
 
-            if data_encoding != 'csv':
+            # 0 is nothing, which is in no tileset
+            if global_id == 0:
 
-                raise TMXLayersNotCSV(data_encoding)
+                continue
 
-            layer_csv = layer_data.text.strip()
-            rows = layer_csv.split('\n')
-            parsed_rows = []
+            tileset_index = bisect.bisect_right(first_global_ids,
+                                                global_id) - 1
+            used_tilesets.add(max(tileset_index, 0))
 
-            for row in rows:
-                # TMX tilesets start their ids at 1, Hypatia Tilesheets
-                # starts ids at 0.
-                cells = row.split(',')[:-1]  # trailing comma
-                parsed_row = [int(tile_id) - 1 for tile_id in cells]
-                parsed_rows.append(parsed_row)
+        tilesheet_specs = []
 
-            layers.append(parsed_rows)
+        for tileset_index in sorted(used_tilesets or [0]):
+            tileset = tilesets[tileset_index]
 
-        self.tilemap = tiles.TileMap(tilesheet_name, layers)
+            if 'name' in tileset.attrib:
+                tilesheet_name = tileset.attrib['name']
+            else:
+                tileset_file_name = os.path.basename(tileset.attrib['source'])
+                tilesheet_name = os.path.splitext(tileset_file_name)[0]
 
-        # loop through objects in the object layer to find the player's
-        # start position and NPC information.
-        self.npcs = []
+            tilesheet_specs.append((tilesheet_name,
+                                    first_global_ids[tileset_index]))
+
+        tilesheet_names = [name for name, __ in tilesheet_specs]
+
+        tmx_objects = self.root.findall(".//objectgroup/object")
+        xpath = ".//property[@name='%s']"
+
+        if preload is not None:
+            walkabout_names = [(tmx_object.find('properties').
+                                find(xpath % 'walkabout').attrib['value'])
+                               for tmx_object in tmx_objects
+                               if tmx_object.attrib['type'] == 'npc']
+            preload(tilesheet_names, walkabout_names)
+
+        self.layers = layers
+        self.tilesheet_specs = tilesheet_specs
+        self._width_tiles = width_tiles
+        self.tilemap = None
+        self.npcs = None
+
+        # find the player's start position in the object layer
         self.player_start_position = None
 
+        for tmx_object in tmx_objects:
+
+            if tmx_object.attrib['type'] == 'player_start_position':
+                self.player_start_position = (int(tmx_object.attrib['x']),
+                                              int(tmx_object.attrib['y']))
+
+        if self.player_start_position is None:
+
+            raise TMXMissingPlayerStartPosition()
+
+        if create:
+            self.create()
+
+    def create(self):
+        """Create the tilemap and the NPCs, from what was read.
+        Call this in the main thread.
+
+        """
+
+        self.tilemap = tiles.TileMap(self.tilesheet_specs, self.layers,
+                                     self._width_tiles)
+
+        # loop through objects in the object layer to find
+        # NPC information.
+        self.npcs = []
+        xpath = ".//property[@name='%s']"
+
         for tmx_object in self.root.findall(".//objectgroup/object"):
             object_type = tmx_object.attrib['type']
             x = int(tmx_object.attrib['x'])
             y = int(tmx_object.attrib['y'])
 
-            if object_type == 'player_start_position':
-                self.player_start_position = (x, y)
-            elif object_type == 'npc':
+            if object_type == 'npc':
                 properties = tmx_object.find('properties')
-                xpath = ".//property[@name='%s']"
 
                 position = (x, y)
                 walkabout_name = (properties.find(xpath % 'walkabout').
@@ -585,7 +1206,80 @@ class TMX(object):
                 npc = player.Npc(walkabout=walkabout, say_text=say_text)
                 self.npcs.append(npc)
 
-        # should use xpath before loading all npcs...
-        if self.player_start_position is None:
+    @classmethod
+    def decode_layer(cls, layer_data):
+        """Decode the global tile IDs of a layer, CSV or base64,
+        into an array.
 
-            raise TMXMissingPlayerStartPosition()
+        TMX global tile IDs start at 1, and 0 is nothing, which is
+        how tiles.TileMap stores Tilesheet tile IDs, so they are
+        kept as they are, only without their flip flags.
+
+        Args:
+            layer_data (ElementTree.Element): the <data> of a <layer>.
+
+        Returns:
+            array.array: of typecode 'H', see tiles.TileMap.tile_ids.
+
+        Raises:
+            TMXLayersNotCSV: The encoding or compression is not
+                supported.
+            tiles.BadTileID: A tile ID does not fit in 16 bits.
+
+        Example:
+            >>> layer_data = ET.fromstring('<data encoding="csv">'
+            ...                            '1,2,\\n3,0</data>')
+            >>> list(TMX.decode_layer(layer_data))
+            [1, 2, 3, 0]
+            >>> layer_data = ET.fromstring('<data encoding="base64">'
+            ...                            'AQAAAAIAAIA=</data>')
+            >>> list(TMX.decode_layer(layer_data))
+            [1, 2]
+
+        """
+
+        data_encoding = layer_data.get('encoding')
+        compression = layer_data.get('compression')
+        global_ids = array.array(cls._GLOBAL_ID_TYPECODE)
+
+        if data_encoding == 'csv' and compression is None:
+            global_ids.extend([int(global_id) for global_id
+                               in layer_data.text.strip().split(',')])
+
+        elif data_encoding == 'base64':
+            layer_bytes = base64.b64decode(layer_data.text.strip())
+
+            if compression == 'zlib':
+                layer_bytes = zlib.decompress(layer_bytes)
+            elif compression == 'gzip':
+                layer_bytes = zlib.decompress(layer_bytes,
+                                              16 + zlib.MAX_WBITS)
+            elif compression is not None:
+
+                raise TMXLayersNotCSV('%s+%s' % (data_encoding, compression))
+
+            # little-endian unsigned 32-bit integers
+            if bytes is str:
+                global_ids.fromstring(layer_bytes)
+            else:
+                global_ids.frombytes(layer_bytes)
+
+            if sys.byteorder == 'big':
+                global_ids.byteswap()
+
+        else:
+
+            raise TMXLayersNotCSV(data_encoding)
+
+        # flipped tiles are rare, only mask when there are some
+        if global_ids and max(global_ids) > cls.GID_MASK:
+            global_ids = [global_id & cls.GID_MASK
+                          for global_id in global_ids]
+
+        try:
+
+            return array.array('H', global_ids)
+
+        except OverflowError:
+
+            raise tiles.BadTileID(max(global_ids) - 1)
@@ -62,3 +62,142 @@ class AbsolutePosition(Position):
     """
 
     pass
+
+
+class CollisionGrid(object):
+    """A spatial hash of rects: a uniform grid whose cells know
+    which rects overlap them, so checking a rect for collisions
+    only looks at the cells it overlaps.
+
+    It is for things which move, e.g., NPCs; each rect is stored
+    by a key so it may be moved or removed later. The tiles have
+    their own grid, see tiles.PassabilityGrid.
+
+    Attributes:
+        cell_size (tuple): (x, y) pixel dimensions of a cell.
+
+    Example:
+        >>> grid = CollisionGrid((10, 10))
+        >>> grid.collides(pygame.Rect(0, 0, 10, 10))
+        False
+        >>> grid.add('npc', pygame.Rect(0, 0, 5, 5))
+        >>> grid.collides(pygame.Rect(0, 0, 10, 10))
+        True
+        >>> grid.move('npc', pygame.Rect(40, 40, 5, 5))
+        >>> grid.collides(pygame.Rect(0, 0, 10, 10))
+        False
+
+    """
+
+    def __init__(self, cell_size):
+        """
+
+        Args:
+            cell_size (tuple): (x, y) pixel dimensions of a cell,
+                typically the tile size of a TileMap.
+
+        """
+
+        self.cell_size = cell_size
+
+        # (cell x, cell y) -> set of keys, key -> rect
+        self._cells = {}
+        self._rects = {}
+
+    def cells(self, rect):
+        """Yield every (x, y) cell which rect overlaps.
+
+        Args:
+            rect (pygame.Rect): --
+
+        """
+
+        if rect.width <= 0 or rect.height <= 0:
+
+            return
+
+        cell_width, cell_height = self.cell_size
+
+        for cell_y in range(rect.top // cell_height,
+                            (rect.bottom - 1) // cell_height + 1):
+
+            for cell_x in range(rect.left // cell_width,
+                                (rect.right - 1) // cell_width + 1):
+
+                yield (cell_x, cell_y)
+
+    def add(self, key, rect):
+        """Index a rect which may move, as key.
+
+        Args:
+            key: anything hashable which identifies the rect,
+                e.g., an NPC's Walkabout.
+            rect (pygame.Rect): --
+
+        """
+
+        if key in self._rects:
+            self.remove(key)
+
+        rect = pygame.Rect(rect)
+        self._rects[key] = rect
+
+        for cell in self.cells(rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        """Stop indexing the rect stored as key.
+
+        Args:
+            key: --
+
+        Raises:
+            KeyError: nothing is stored as key.
+
+        """
+
+        rect = self._rects.pop(key)
+
+        for cell in self.cells(rect):
+            keys_in_cell = self._cells[cell]
+            keys_in_cell.discard(key)
+
+            if not keys_in_cell:
+                del self._cells[cell]
+
+    def move(self, key, rect):
+        """Update the rect stored as key, e.g., after an NPC moved.
+
+        Args:
+            key: --
+            rect (pygame.Rect): the new area key occupies.
+
+        """
+
+        self.add(key, rect)
+
+    def collides(self, rect, ignore=None):
+        """Check rect for collisions against the rects indexed.
+
+        Args:
+            rect (pygame.Rect): --
+            ignore: optional key to skip, e.g., the one doing
+                the moving.
+
+        Returns:
+            bool: True if rect collides with anything.
+
+        """
+
+        cell_keys = self._cells
+        rects = self._rects
+
+        for cell in self.cells(rect):
+
+            for key in cell_keys.get(cell, ()):
+
+                if key is not ignore and rect.colliderect(rects[key]):
+
+                    return True
+
+        return False
@@ -58,12 +58,24 @@ class HumanPlayer(actor.Actor):
             elif direction == constants.Direction.west:
                 new_topleft_x -= pixels * adj_speed
 
-            destination_rect = pygame.Rect((new_topleft_x, new_topleft_y),
-                                           self.walkabout.size)
-            collision_rect = self.walkabout.rect.union(destination_rect)
-
-            if not game.scene.collide_check(collision_rect):
+            # the area swept from the current position to the
+            # new one; pygame.Rect truncates, so we do as well.
+            current_rect = self.walkabout.rect
+            destination_left = int(new_topleft_x)
+            destination_top = int(new_topleft_y)
+            destination_width, destination_height = self.walkabout.size
+            swept_bounds = (min(current_rect.left, destination_left),
+                            min(current_rect.top, destination_top),
+                            max(current_rect.right,
+                                destination_left + destination_width),
+                            max(current_rect.bottom,
+                                destination_top + destination_height))
+
+            if not game.scene.collide_check_bounds(*swept_bounds):
                 # we're done, we can move!
+                destination_rect = pygame.Rect((new_topleft_x,
+                                                new_topleft_y),
+                                               self.walkabout.size)
                 new_topleft = (new_topleft_x, new_topleft_y)
                 self.walkabout.action = constants.Action.walk
                 animation = self.walkabout.current_animation()
@@ -36,17 +36,21 @@ class Screen(object):
         the two most recent frames/updates in milliseconds.
       screen_size (tuple):
       screen (pygame.display surface): --
+      scale2x (bool): use pygame.transform.scale2x() instead of
+        plain nearest-neighbour scaling when the screen is exactly
+        twice the size of the surface being displayed.
 
     """
 
     FPS = 60
 
-    def __init__(self, filters=None):
+    def __init__(self, filters=None, scale2x=False):
         """Will init pygame.
 
         Args:
           filters (list): list of functions which takes and
             returns a surface.
+          scale2x (bool): see the scale2x attribute.
 
         """
 
@@ -59,24 +63,167 @@ class Screen(object):
         self.screen = pygame.display.set_mode(self.screen_size,
                                               FULLSCREEN | DOUBLEBUF)
         self.filters = filters
+        self.scale2x = scale2x
 
-    def update(self, surface):
+        # Reused every frame in place of a newly scaled surface
+        # when the display surface can't be scaled into directly.
+        self._scaled_surface = None
+
+    @staticmethod
+    def same_format(surface, other_surface):
+        """Whether both surfaces have the same pixel format, which
+        is required for scaling one straight into the other.
+
+        Args:
+            surface (pygame.Surface): --
+            other_surface (pygame.Surface): --
+
+        Returns:
+            bool: --
+
+        Example:
+            >>> surface = pygame.Surface((2, 2), 0, 32)
+            >>> Screen.same_format(surface, pygame.Surface((8, 8), 0, 32))
+            True
+            >>> Screen.same_format(surface, pygame.Surface((8, 8), 0, 8))
+            False
+
+        """
+
+        return (surface.get_bitsize() == other_surface.get_bitsize() and
+                surface.get_masks() == other_surface.get_masks())
+
+    def scale(self, surface, destination):
+        """Scale surface to fill destination, without allocating
+        a new surface.
+
+        Args:
+            surface (pygame.Surface): --
+            destination (pygame.Surface): must have the same pixel
+                format as surface, see Screen.same_format().
+
+        """
+
+        surface_width, surface_height = surface.get_size()
+        destination_size = destination.get_size()
+
+        if (self.scale2x and
+                destination_size == (surface_width * 2, surface_height * 2)):
+            pygame.transform.scale2x(surface, destination)
+
+        else:
+            pygame.transform.scale(surface, destination_size, destination)
+
+    def scaled_surface(self, surface):
+        """The surface to scale surface onto, when it can't be
+        the display surface. Only allocated again if the format
+        of surface changes.
+
+        Args:
+            surface (pygame.Surface): --
+
+        Returns:
+            pygame.Surface: the size of the screen.
+
+        """
+
+        if (self._scaled_surface is None or
+                not self.same_format(surface, self._scaled_surface)):
+            self._scaled_surface = pygame.Surface(self.screen_size,
+                                                  0,
+                                                  surface)
+
+        return self._scaled_surface
+
+    def update(self, surface, dirty_rects=None):
         """Update the screen; apply surface to screen, automatically
         rescaling for fullscreen.
 
+        Args:
+            surface (pygame.Surface): typically the viewport surface.
+            dirty_rects (list[pygame.Rect]|None): If supplied, only
+                these areas of surface are rescaled and updated on
+                the display; an empty list updates nothing. Filters
+                need the whole frame, so they disable this.
+
         """
 
-        scaled_surface = pygame.transform.scale(surface, self.screen_size)
+        if dirty_rects is not None and not self.filters:
+            self.update_rects(surface, dirty_rects)
+            self.time_elapsed_milliseconds = self.clock.tick(Screen.FPS)
+
+            return None
+
+        # Scale straight onto the display surface if possible:
+        # nothing is allocated and there's no extra blit.
+        if not self.filters and self.same_format(surface, self.screen):
+            self.scale(surface, self.screen)
 
-        if self.filters:
+        else:
+            scaled_surface = self.scaled_surface(surface)
+            self.scale(surface, scaled_surface)
 
-            for filter_function in self.filters:
+            for filter_function in self.filters or []:
                 scaled_surface = filter_function(scaled_surface)
 
-        self.screen.blit(scaled_surface, (0, 0))
+            self.screen.blit(scaled_surface, (0, 0))
+
         pygame.display.flip()
         self.time_elapsed_milliseconds = self.clock.tick(Screen.FPS)
 
+    def update_rects(self, surface, rects):
+        """Rescale only the supplied areas of surface onto the
+        screen and update only those areas of the display.
+
+        Note:
+            The edges of each area are scaled the same way as
+            if the whole surface was scaled, so areas line up
+            exactly when the screen is an integer multiple of
+            surface, and within a pixel otherwise.
+
+        Args:
+            surface (pygame.Surface): --
+            rects (list[pygame.Rect]): areas of surface.
+
+        Returns:
+            list[pygame.Rect]: the updated areas of the screen.
+
+        """
+
+        surface_width, surface_height = surface.get_size()
+        screen_width, screen_height = self.screen_size
+        surface_area = surface.get_rect()
+        screen_rects = []
+
+        for rect in rects:
+            rect = rect.clip(surface_area)
+
+            if not rect.width or not rect.height:
+
+                continue
+
+            left = rect.left * screen_width // surface_width
+            top = rect.top * screen_height // surface_height
+            right = rect.right * screen_width // surface_width
+            bottom = rect.bottom * screen_height // surface_height
+            screen_rect = pygame.Rect(left, top, right - left, bottom - top)
+
+            area = surface.subsurface(rect)
+
+            if self.same_format(surface, self.screen):
+                self.scale(area, self.screen.subsurface(screen_rect))
+
+            else:
+                scaled_area = pygame.transform.scale(area, screen_rect.size)
+                self.screen.blit(scaled_area, screen_rect.topleft)
+
+            screen_rects.append(screen_rect)
+
+        if screen_rects:
+            pygame.display.update(screen_rects)
+
+        return screen_rects
+
 
 # how much of this is redundant due to pygame Surface.scroll?
 class Viewport(object):
@@ -154,8 +301,9 @@ class Viewport(object):
         """Draw the correct portion of supplied surface onto viewport.
 
         Args:
-          surface (pygame.Surface): will only draw the area described
-            by viewport coordinates.
+          surface (pygame.Surface|tiles.ChunkedLayer): will only
+            draw the area described by viewport coordinates. A
+            chunked layer only bakes/draws the chunks in view.
 
         Example:
           >>> viewport = Viewport((100, 100))
@@ -164,9 +312,15 @@ class Viewport(object):
 
         """
 
-        self.surface.blit(surface,
-                          (0, 0),
-                          self.rect)
+        if hasattr(surface, 'chunks_in_rect'):
+
+            for chunk, position in surface.chunks_in_rect(self.rect):
+                self.surface.blit(chunk, self.relative_position(position))
+
+        else:
+            self.surface.blit(surface,
+                              (0, 0),
+                              self.rect)
 
 
 if __name__ == "__main__":
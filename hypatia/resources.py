@@ -10,7 +10,11 @@ assist other modules, and does not do much on its own.
 
 import os
 import zipfile
+import threading
+import collections
 from io import BytesIO
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 
 try:
     import ConfigParser as configparser
@@ -21,18 +25,45 @@ except ImportError:
     from io import StringIO
 
 import pygame
+from PIL import Image
+
+from hypatia import bundle
 from hypatia.animatedsprite import AnimatedSprite
 
 
+# the resource categories which compile_bundle() compiles
+BUNDLED_CATEGORIES = ('walkabouts', 'tilesheets', 'scenes')
+
+
 class Resource(object):
     """A zip archive in the resources directory, located by
     supplying a resource category and name. Files are stored
     as a str, BytesIO, PygAnimation, or ConfigParser, in a
     dictionary. Files are referenced by filepath/filename.
 
+    Files are only run through their file handler, e.g., GIFs
+    decoded into AnimatedSprites, once they are accessed.
+
+    If the resource is in the bundle (see the bundle module), and
+    was not modified since it was compiled, its files are read
+    from the bundle: its GIFs and images are not decoded, and its
+    INI files not parsed, at all.
+
     Attributes:
-        files (dict): Key is file name, value can be one of str,
-            BytesIO, PygAnim, or ConfigParser objects.
+        category (str): E.g., tilesheets, walkabouts.
+        name (str): E.g., debug.
+        raw_files (dict): Key is file name, value is the
+            file contents as bytes.
+        files (dict): The files which have been accessed so far.
+            Key is file name, value can be one of str, BytesIO,
+            PygAnim, or ConfigParser objects.
+        bundle_entry (bundle.BundleEntry|None): where this
+            resource was read from, if from the bundle.
+        surfaces (dict): image file name -> pygame.Surface, for
+            the images loaded so far, see Resource.surface().
+        cache (ResourceCache|None): the cache this Resource is in,
+            which is told whenever a file is loaded, since it
+            makes the Resource larger.
 
     Example:
         >>> from hypatia import animatedsprite as anim
@@ -47,15 +78,20 @@ class Resource(object):
 
     """
 
-    def __init__(self, resource_category, resource_name):
+    def __init__(self, resource_category, resource_name, use_bundle=True):
         """Load a resource ZIP using a category and zip name.
 
         Args:
             resource_category (str): E.g., tilesheets, walkabouts.
             resource_name (str): E.g., debug.
+            use_bundle (bool): Whether to read the resource from
+                the bundle, if it is there and up to date.
 
         """
 
+        self.category = resource_category
+        self.name = resource_name
+
         # The default path for a resource is:
         #   ./resource_category/resource_name
         # We'll be looking for an archive or directory that
@@ -83,9 +119,18 @@ class Resource(object):
         # of using x.open(path).read().
         files = {}
 
-        # choose between loading as an unpacked directory, or a zip file.
+        if use_bundle:
+            self.bundle_entry = bundle_entry(resource_category, resource_name)
+        else:
+            self.bundle_entry = None
+
+        # a precompiled bundle takes priority, then choose between
+        # loading as an unpacked directory, or a zip file.
         # unpacked takes priority.
-        if os.path.isdir(path):
+        if self.bundle_entry is not None:
+            files = self.bundle_entry.raw_files()
+
+        elif os.path.isdir(path):
 
             # go through each file in the supplied path, making an
             # entry in the files dictionary, whose value is the
@@ -112,36 +157,102 @@ class Resource(object):
                     file_data = zip_file.open(file_name).read()
                     files[file_name] = file_data
 
-        # 2. "Prepare" the "raw file data" from the files
-        # dictionary we just created. If a given file's
-        # file extension is in file_handlers, the data
-        # will be updated by an associated function.
-        for file_name in files.keys():
-            file_data = files[file_name]
-            file_extension = os.path.splitext(file_name)[1]
+        # 2. The "raw file data" from the files dictionary we just
+        # created is only "prepared" once a file is accessed: if
+        # the file's extension is in file_handlers, the data
+        # is the output of the associated function.
+        #
+        # See: Resource.__getitem__()
+        self.raw_files = files
+        self.files = {}
+        self.surfaces = {}
+        self.cache = None
+        self._file_handlers = file_handlers
+
+        # The files which can be decoded outside of the main thread,
+        # see Resource.decode() and preload().
+        self._file_decoders = {
+            '.gif': decode_gif,
+            '.png': decode_png,
+        }
 
-            # if there is a known "handler" for this extension,
-            # we want the file data for this file to be the output
-            # of said handler
-            if file_extension in file_handlers:
-                file_data = file_handlers[file_extension](files, file_name)
+    def __getitem__(self, file_name):
+        """Return the file, running its file handler on first
+        access. The result is kept, so the handler runs once.
 
-            files[file_name] = file_data
+        Args:
+            file_name (str): --
 
-        self.files = files
+        Raises:
+            KeyError: There is no such file in this resource.
 
-    def __getitem__(self, file_name):
+        """
+
+        try:
+
+            return self.files[file_name]
+
+        except KeyError:
+            file_data = self.raw_files[file_name]
+
+        file_extension = os.path.splitext(file_name)[1]
+
+        # if there is a known "handler" for this extension,
+        # we want the file data for this file to be the output
+        # of said handler, unless it was compiled into the bundle
+        if self.bundle_entry is not None and file_name in self.bundle_entry:
+            file_data = self.bundle_entry.load(file_name)
 
-        return self.files[file_name]
+        elif file_extension in self._file_handlers:
+            file_handler = self._file_handlers[file_extension]
+            file_data = file_handler(self.raw_files, file_name)
+
+        self.files[file_name] = file_data
+        self._loaded(file_data)
+
+        return file_data
+
+    def _loaded(self, file_data):
+        """Tell the cache this Resource is in, if any, that a file
+        was loaded: GIFs and images take up more than their raw
+        bytes once decoded.
+
+        """
+
+        if self.cache is not None:
+            self.cache.grow(self, ResourceCache.estimate_data_size(file_data))
 
     def __contains__(self, item):
 
-        return item in self.files
+        return item in self.raw_files
+
+    def file_names(self, file_extension=None):
+        """Return the names of the files in this resource, without
+        loading any of them.
+
+        Args:
+            file_extension (str|None): If supplied, only the names of
+                the files with this extension (including the dot).
+
+        Returns:
+            list[str]: --
+
+        Example:
+            >>> Resource('walkabouts', 'debug').file_names('.gif')
+            ['only.gif']
+
+        """
+
+        return [file_name for file_name in self.raw_files
+                if (file_extension is None or
+                    os.path.splitext(file_name)[1] == file_extension)]
 
     def get_type(self, file_extension):
         """Return a dictionary of files which have the file extension
         specified. Remember to include the dot, e.g., ".gif"!
 
+        Loads all of those files, see Resource.file_names() otherwise.
+
         Arg:
             file_extension (str): the file extension (including dot) of
                 the files to return.
@@ -158,13 +269,611 @@ class Resource(object):
 
         matching_files = {}
 
-        for file_name, file_content in self.files.items():
-
-            if os.path.splitext(file_name)[1] == file_extension:
-                matching_files[file_name] = file_content
+        for file_name in self.file_names(file_extension):
+            matching_files[file_name] = self[file_name]
 
         return matching_files or None
 
+    def surface(self, file_name):
+        """Return the image file_name as a pygame Surface, loading
+        it on first call. The surface is kept, and shared by
+        every caller.
+
+        Args:
+            file_name (str): E.g., tilesheet.png.
+
+        Returns:
+            pygame.Surface: --
+
+        """
+
+        try:
+
+            return self.surfaces[file_name]
+
+        except KeyError:
+            pass
+
+        if (self.bundle_entry is not None and
+                self.bundle_entry.has_surface(file_name)):
+            surface = self.bundle_entry.surface(file_name)
+        else:
+            surface = pygame.image.load(BytesIO(self.raw_files[file_name]))
+
+        self.surfaces[file_name] = surface
+        self._loaded(surface)
+
+        return surface
+
+    def undecoded_file_names(self):
+        """Return the names of the files which Resource.decode()
+        can decode, and which have not been loaded yet.
+
+        Returns:
+            list[str]: --
+
+        """
+
+        undecoded_file_names = []
+
+        for file_name in sorted(self.raw_files):
+            file_extension = os.path.splitext(file_name)[1]
+
+            if (file_extension not in self._file_decoders or
+                    file_name in self.files or
+                    file_name in self.surfaces):
+
+                continue
+
+            # already as good as decoded
+            if (self.bundle_entry is not None and
+                    (file_name in self.bundle_entry or
+                     self.bundle_entry.has_surface(file_name))):
+
+                continue
+
+            undecoded_file_names.append(file_name)
+
+        return undecoded_file_names
+
+    def decode(self, file_name):
+        """Decode a GIF or an image file without creating any
+        pygame object, thus in any thread, and without keeping
+        the result. See Resource.finish_decoding().
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            object: what finish_decoding() expects.
+
+        """
+
+        file_extension = os.path.splitext(file_name)[1]
+
+        return self._file_decoders[file_extension](self.raw_files, file_name)
+
+    def finish_decoding(self, file_name, decoded):
+        """Create the pygame objects of a file decoded by
+        Resource.decode(), in the main thread, and keep them as if
+        the file had been accessed: GIFs in Resource.files, images
+        in Resource.surfaces.
+
+        Args:
+            file_name (str): --
+            decoded (object): what Resource.decode() returned.
+
+        """
+
+        # it may have been loaded since it was decoded, e.g., by the
+        # main thread while a game.SceneLoader was decoding it
+        if file_name in self.files or file_name in self.surfaces:
+
+            return
+
+        if os.path.splitext(file_name)[1] == '.gif':
+            file_data = build_gif(self.raw_files, file_name, decoded)
+            self.files[file_name] = file_data
+
+        else:
+            pixels, size, pixel_format, palette, colorkey = decoded
+            file_data = pygame.image.frombuffer(pixels, size, pixel_format)
+
+            # as pygame.image.load() would, see decode_png()
+            if palette is not None:
+                file_data.set_palette(palette)
+
+            if colorkey is not None:
+                file_data.set_colorkey(colorkey)
+
+            self.surfaces[file_name] = file_data
+
+        self._loaded(file_data)
+
+
+class ResourceCache(object):
+    """Least recently used store of Resources, so that a resource
+    is only read and decoded once, however many times it is used.
+
+    A Resource is loaded again if its archive or directory was
+    modified since it was cached.
+
+    Warning:
+        The cached Resources are shared: don't modify them, nor the
+        objects in their files. See AnimatedSprite.copy() for
+        getting playback state of your own.
+
+    Attributes:
+        max_bytes (int): once the estimated size of the cached
+            Resources exceeds this, the least recently used ones
+            are evicted. The most recently used Resource is kept
+            regardless. Resources grow as their files are loaded,
+            which they report, see ResourceCache.grow().
+        size (int): the estimated size of the cached Resources
+            in bytes, see ResourceCache.estimate_size().
+
+    Example:
+        >>> cache = ResourceCache()
+        >>> resource = cache.get('walkabouts', 'debug')
+        >>> cache.get('walkabouts', 'debug') is resource
+        True
+        >>> ('walkabouts', 'debug') in cache
+        True
+
+    """
+
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes=None):
+        """
+
+        Args:
+            max_bytes (int|None): defaults to ResourceCache.MAX_BYTES.
+
+        """
+
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.size = 0
+
+        # (category, name) -> (modification time, size, resource)
+        self._resources = collections.OrderedDict()
+
+        # scenes may be loaded in the background, see game.SceneLoader
+        self._lock = threading.Lock()
+
+    def __len__(self):
+
+        return len(self._resources)
+
+    def __contains__(self, key):
+
+        return key in self._resources
+
+    def get(self, resource_category, resource_name):
+        """Return the Resource of the supplied category and name,
+        loading it if it is not cached or is out of date, and
+        marking it as the most recently used.
+
+        Args:
+            resource_category (str): E.g., tilesheets, walkabouts.
+            resource_name (str): E.g., debug.
+
+        Returns:
+            Resource: --
+
+        """
+
+        key = (resource_category, resource_name)
+
+        try:
+            modification_time = resource_mtime(resource_category,
+                                               resource_name)
+
+        # only in the bundle
+        except OSError:
+            modification_time = None
+
+        with self._lock:
+
+            try:
+                cached_mtime, size, resource = self._resources.pop(key)
+            except KeyError:
+                resource = None
+            else:
+                self.size -= size
+
+            # the modification time is None for a resource which is
+            # only in the bundle, and for one which is nowhere
+            if resource is None or cached_mtime != modification_time:
+                resource = Resource(resource_category, resource_name)
+                resource.cache = self
+
+            # files may have been loaded before it was cached
+            size = self.estimate_size(resource)
+
+            self._resources[key] = (modification_time, size, resource)
+            self.size += size
+            self._evict()
+
+        return resource
+
+    def grow(self, resource, size):
+        """Add to the estimated size of a cached Resource, e.g.,
+        once one of its files is decoded, evicting the least
+        recently used Resources if over max_bytes.
+
+        Args:
+            resource (Resource): --
+            size (int): bytes.
+
+        """
+
+        key = (resource.category, resource.name)
+
+        with self._lock:
+
+            try:
+                modification_time, cached_size, cached_resource = (
+                    self._resources[key])
+            except KeyError:
+
+                return None
+
+            # replaced by a newer version meanwhile
+            if cached_resource is not resource:
+
+                return None
+
+            self._resources[key] = (modification_time,
+                                    cached_size + size,
+                                    resource)
+            self.size += size
+            self._evict()
+
+    def _evict(self):
+        """Evict the least recently used Resources until under
+        max_bytes, keeping at least the most recently used. The
+        lock must be held.
+
+        """
+
+        while self.size > self.max_bytes and len(self._resources) > 1:
+            __, (__, evicted_size, evicted_resource) = (self._resources.
+                                                        popitem(last=False))
+            self.size -= evicted_size
+            evicted_resource.cache = None
+
+    def clear(self):
+        """Forget every Resource."""
+
+        with self._lock:
+
+            for __, __, resource in self._resources.values():
+                resource.cache = None
+
+            self._resources.clear()
+            self.size = 0
+
+    @staticmethod
+    def estimate_size(resource):
+        """Estimate how many bytes resource takes up: the length of
+        its raw files and the pixels of the frames of the
+        animations which were decoded so far.
+
+        Args:
+            resource (Resource): --
+
+        Returns:
+            int: --
+
+        """
+
+        size = sum(len(file_data) for file_data in resource.raw_files.values())
+
+        # files may be loaded by another thread meanwhile
+        for file_data in list(resource.files.values()):
+            size += ResourceCache.estimate_data_size(file_data)
+
+        for surface in list(resource.surfaces.values()):
+            size += ResourceCache.estimate_data_size(surface)
+
+        return size
+
+    @staticmethod
+    def estimate_data_size(file_data):
+        """Estimate how many bytes a loaded file takes up on top
+        of its raw bytes: the pixels of a surface, or of the
+        frames of an animation.
+
+        Args:
+            file_data (object): as in Resource.files or
+                Resource.surfaces.
+
+        Returns:
+            int: 0 for anything else.
+
+        """
+
+        if isinstance(file_data, AnimatedSprite):
+            surfaces = set(frame.surface for frame in file_data.frames)
+        elif isinstance(file_data, pygame.Surface):
+            surfaces = [file_data]
+        else:
+            surfaces = []
+
+        size = 0
+
+        for surface in surfaces:
+            width, height = surface.get_size()
+            size += width * height * surface.get_bytesize()
+
+        return size
+
+
+# the process-wide ResourceCache
+cache = ResourceCache()
+
+
+def resource_mtime(resource_category, resource_name):
+    """Return when the resource of the supplied category and
+    name was last modified: the modification time of its zip
+    archive, or of its directory and the files therein.
+
+    Args:
+        resource_category (str): E.g., tilesheets, walkabouts.
+        resource_name (str): E.g., debug.
+
+    Returns:
+        float: --
+
+    See Also:
+        * Resource.__init__()
+
+    """
+
+    path = os.path.join('resources', resource_category, resource_name)
+
+    if os.path.isdir(path):
+        file_paths = [os.path.join(path, file_name)
+                      for file_name in os.listdir(path)]
+
+        return max(os.path.getmtime(file_path)
+                   for file_path in [path] + file_paths)
+
+    return os.path.getmtime(path + '.zip')
+
+
+def bundle_entry(resource_category, resource_name):
+    """Return the resource of the supplied category and name
+    from the bundle at bundle.DEFAULT_PATH, if the bundle exists,
+    has the resource, and the resource was not modified since.
+
+    A resource which only exists in the bundle is always
+    up to date.
+
+    Args:
+        resource_category (str): E.g., tilesheets, walkabouts.
+        resource_name (str): E.g., debug.
+
+    Returns:
+        bundle.BundleEntry|None: --
+
+    """
+
+    resource_bundle = bundle.open_bundle()
+
+    if resource_bundle is None:
+
+        return None
+
+    entry = resource_bundle.entry(resource_category, resource_name)
+
+    if entry is None:
+
+        return None
+
+    try:
+        modification_time = resource_mtime(resource_category, resource_name)
+    except OSError:
+
+        return entry
+
+    if entry.mtime != modification_time:
+
+        return None
+
+    return entry
+
+
+def compile_bundle(bundle_path=None):
+    """Compile every resource of BUNDLED_CATEGORIES in the
+    resources directory into a bundle, decoding the GIFs and
+    images, and parsing the INI files.
+
+    Args:
+        bundle_path (str|None): defaults to bundle.DEFAULT_PATH.
+
+    See Also:
+        * bundle.write_bundle()
+
+    """
+
+    bundled_resources = []
+
+    for resource_category in BUNDLED_CATEGORIES:
+        category_path = os.path.join('resources', resource_category)
+
+        if not os.path.isdir(category_path):
+
+            continue
+
+        # resources are directories or zip archives
+        resource_names = set()
+
+        for file_name in os.listdir(category_path):
+            file_path = os.path.join(category_path, file_name)
+            resource_name, file_extension = os.path.splitext(file_name)
+
+            if os.path.isdir(file_path):
+                resource_names.add(file_name)
+
+            elif file_extension == '.zip':
+                resource_names.add(resource_name)
+
+        for resource_name in sorted(resource_names):
+            resource = Resource(resource_category, resource_name,
+                                use_bundle=False)
+            compiled_files = {}
+
+            for file_name in resource.file_names('.gif'):
+                compiled_files[file_name] = resource[file_name]
+
+            for file_name in resource.file_names('.png'):
+                compiled_files[file_name] = resource.surface(file_name)
+
+            for file_name in resource.file_names('.ini'):
+                compiled_files[file_name] = resource[file_name]
+
+            modification_time = resource_mtime(resource_category,
+                                               resource_name)
+            bundled_resources.append((resource_category, resource_name,
+                                      modification_time,
+                                      resource.raw_files, compiled_files))
+
+    bundle.write_bundle(bundle_path or bundle.DEFAULT_PATH,
+                        bundled_resources)
+
+
+def preload(resource_keys, workers=None, progress=None):
+    """Get the supplied resources from the cache, and decode all
+    of their GIFs and images which were not loaded yet, in a pool
+    of worker threads, see decode_resources(). Their pygame
+    objects are then created in the calling thread, see
+    finish_decoding().
+
+    Args:
+        resource_keys (iter): (category, name) of each resource.
+        workers (int|None): see decode_resources().
+        progress (callable|None): see decode_resources().
+
+    Returns:
+        list[Resource]: in the order of resource_keys.
+
+    Example:
+        >>> resource, = preload([('walkabouts', 'debug')], workers=2)
+        >>> 'only.gif' in resource.files
+        True
+
+    """
+
+    resource_keys = list(resource_keys)
+    preloaded_resources = [cache.get(resource_category, resource_name)
+                           for resource_category, resource_name
+                           in resource_keys]
+    finish_decoding(decode_resources(resource_keys, workers, progress))
+
+    return preloaded_resources
+
+
+def decode_resources(resource_keys, workers=None, progress=None):
+    """Get the supplied resources from the cache, and decode all
+    of their GIFs and images which were not loaded yet, in a pool
+    of worker threads, without creating any pygame object: this
+    may run in any thread, e.g., that of a game.SceneLoader.
+
+    PIL releases the GIL for most of the decoding, so this scales
+    with the number of cores.
+
+    Args:
+        resource_keys (iter): (category, name) of each resource.
+        workers (int|None): the number of worker threads, defaults
+            to the number of CPUs.
+        progress (callable|None): called in the calling thread as
+            progress(files_decoded, files_total) after each file
+            is decoded.
+
+    Returns:
+        list[tuple]: (resource, file name, decoded) of each file,
+            for finish_decoding().
+
+    """
+
+    # the same resource may be supplied more than once
+    undecoded_files = []
+    seen_resources = set()
+
+    for resource_category, resource_name in resource_keys:
+        resource = cache.get(resource_category, resource_name)
+
+        if id(resource) in seen_resources:
+
+            continue
+
+        seen_resources.add(id(resource))
+        undecoded_files.extend((resource, file_name) for file_name
+                               in resource.undecoded_file_names())
+
+    if workers is None:
+
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+
+    if workers == 1 or len(undecoded_files) < 2:
+        pool = None
+        decoded_files = (_decode(undecoded_file)
+                         for undecoded_file in undecoded_files)
+    else:
+        pool = ThreadPool(workers)
+        decoded_files = pool.imap_unordered(_decode, undecoded_files)
+
+    results = []
+
+    try:
+
+        for files_decoded, decoded_file in enumerate(decoded_files, 1):
+            results.append(decoded_file)
+
+            if progress is not None:
+                progress(files_decoded, len(undecoded_files))
+
+    finally:
+
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return results
+
+
+def finish_decoding(decoded_files):
+    """Create the pygame objects of the files decoded by
+    decode_resources(). Call this in the main thread.
+
+    Args:
+        decoded_files (list[tuple]): what decode_resources()
+            returned.
+
+    See Also:
+        * Resource.finish_decoding()
+
+    """
+
+    for resource, file_name, decoded in decoded_files:
+        resource.finish_decoding(file_name, decoded)
+
+
+def _decode(undecoded_file):
+    """Decode (resource, file name) in a worker thread of
+    decode_resources().
+
+    """
+
+    resource, file_name = undecoded_file
+
+    return resource, file_name, resource.decode(file_name)
+
 
 def load_png(files, file_name):
     """Return an BytesIO object based on supplied file. This is
@@ -230,11 +939,44 @@ def load_gif(files, file_name):
 
     """
 
-    file_data = files[file_name]
+    return build_gif(files, file_name, decode_gif(files, file_name))
+
+
+def decode_gif(files, file_name):
+    """Decode the frames of a GIF, see load_gif(). This is a
+    file decoder, it may run in any thread.
+
+    Args:
+        files (dict): Resources files, whereas key is the file name,
+            and the value is the untouched file contents itself.
+        file_name (str): --
+
+    Returns:
+        list[tuple]: see AnimatedSprite.decode_gif().
+
+    """
 
     # NOTE: i used to handle this just in
     # Resources.__init__()
-    gif_bytesio = BytesIO(file_data)
+    gif_bytesio = BytesIO(files[file_name])
+
+    return AnimatedSprite.decode_gif(gif_bytesio)
+
+
+def build_gif(files, file_name, decoded_frames):
+    """Create the AnimatedSprite of a GIF decoded by
+    decode_gif(), with the anchors of its INI, if any.
+
+    Args:
+        files (dict): Resources files, whereas key is the file name,
+            and the value is the untouched file contents itself.
+        file_name (str): --
+        decoded_frames (list[tuple]): --
+
+    Returns:
+        AnimatedSprite: --
+
+    """
 
     # get the corersponding INI which configures our anchor points
     # for this gif, from the files
@@ -255,7 +997,64 @@ def load_gif(files, file_name):
     except KeyError:
         anchor_config_ini = None
 
-    return AnimatedSprite.from_file(gif_bytesio, anchor_config_ini)
+    frames = AnimatedSprite.frames_from_decoded_gif(decoded_frames,
+                                                    anchor_config_ini)
+
+    return AnimatedSprite(frames)
+
+
+def decode_png(files, file_name):
+    """Decode an image into pixels the way pygame.image.load()
+    would: palette images into 8-bit pixels, with their palette
+    and their transparent color, if any, as the colorkey; other
+    images into RGB or RGBA pixels, depending on whether they have
+    transparency. This is a file decoder, it may run in any thread.
+
+    Args:
+        files (dict): Resources files, whereas key is the file name,
+            and the value is the untouched file contents itself.
+        file_name (str): --
+
+    Returns:
+        tuple: (pixels, size, format) for pygame.image.frombuffer(),
+            then the palette, a list of (r, g, b), and the colorkey,
+            a palette index, or None, see finish_decoding().
+
+    """
+
+    image = Image.open(BytesIO(files[file_name]))
+    transparency = image.info.get('transparency')
+
+    if image.mode == 'P':
+
+        # the alpha of each palette index; only one which is fully
+        # transparent, the rest opaque, makes a colorkey
+        if isinstance(transparency, bytes):
+            alphas = bytearray(transparency)
+            translucent = [(index, alpha)
+                           for index, alpha in enumerate(alphas)
+                           if alpha != 255]
+
+            if not translucent:
+                transparency = None
+            elif len(translucent) == 1 and translucent[0][1] == 0:
+                transparency = translucent[0][0]
+
+        if transparency is None or isinstance(transparency, int):
+            flat_palette = image.getpalette()
+            palette = [tuple(flat_palette[i:i + 3])
+                       for i in range(0, len(flat_palette), 3)]
+
+            return (image.tobytes(), image.size, 'P',
+                    palette, transparency)
+
+    if 'A' in image.getbands() or transparency is not None:
+        pixel_format = 'RGBA'
+    else:
+        pixel_format = 'RGB'
+
+    return (image.convert(pixel_format).tobytes(), image.size, pixel_format,
+            None, None)
 
 
 def load_ini(files, file_name):
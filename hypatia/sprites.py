@@ -34,6 +34,7 @@ import os
 import copy
 import itertools
 import collections
+from io import BytesIO
 
 try:
     import ConfigParser as configparser
@@ -43,6 +44,11 @@ except ImportError:
 import pygame
 from PIL import Image
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from hypatia import constants
 from hypatia import resources
 from hypatia import animatedsprite
@@ -95,7 +101,13 @@ class Walkabout(pygame.sprite.Sprite):
     Attributes:
         resource (Resource): --
         animations (dict): 2D dictionary [action][direction] whose
-            values are PygAnimations.
+            values are PygAnimations, for the animations which
+            have been loaded so far; see Walkabout.animation().
+        animation_file_names (dict): 2D dictionary
+            [action][direction] whose values are GIF file names.
+        animation_files (dict): GIF file name -> AnimatedSprite;
+            this Walkabout's playback of each GIF of its resource
+            which has been loaded so far.
         animation_anchors (dict): 2D dictionary [action][direction]
             whose values are AnimAnchors.
         rect (pygame.Rect): position on tilemap
@@ -104,6 +116,9 @@ class Walkabout(pygame.sprite.Sprite):
         direction (constnts.Direction): --
         topleft_float (x,y tuple): --
         position_rect
+        atlas (atlas.TextureAtlas|None): the atlas the animations
+            were packed into, see Walkabout.pack(). The animations
+            loaded later on are packed into it as well.
 
     See Also:
         * actor.Actor: The Walkabout class represents an
@@ -133,10 +148,17 @@ class Walkabout(pygame.sprite.Sprite):
 
         # the attributes we're generating
         self.animations = {}
+        self.animation_file_names = {}
+        self.animation_files = {}
         self.animation_anchors = {}
         self.actions = []
         self.directions = []
         self.size = None  # will be removed in future?
+        self.atlas = None
+
+        # whether runtime_setup() ran, after which the animations
+        # are converted as they are loaded
+        self._set_up = False
 
         if not position:
             position = (0, 0)
@@ -145,15 +167,21 @@ class Walkabout(pygame.sprite.Sprite):
 
         # specify the files to load
         # how will i glob a resource
-        resource = resources.Resource('walkabouts', directory)
-        sprite_files = resource.get_type('.gif')
+        #
+        # The resource is shared by every Walkabout of the same
+        # directory, thus so are the frames; each Walkabout only
+        # has its own copy of the playback state of the animations.
+        resource = resources.cache.get('walkabouts', directory)
+        sprite_paths = resource.file_names('.gif')
 
         # no sprites matching pattern!
-        if not sprite_files:
+        if not sprite_paths:
 
             raise BadWalkabout(directory)
 
-        for sprite_path in sprite_files.keys():
+        # The GIFs are only decoded once their animation is
+        # needed, see Walkabout.animation().
+        for sprite_path in sprite_paths:
             file_name, file_ext = os.path.splitext(sprite_path)
             file_name = os.path.split(file_name)[1]
 
@@ -169,26 +197,19 @@ class Walkabout(pygame.sprite.Sprite):
             self.actions.append(action)
             self.directions.append(direction)
 
-            # load pyganim from gif file
-            animation = sprite_files[sprite_path]
-
             try:
-                self.animations[action][direction] = animation
+                self.animation_file_names[action][direction] = sprite_path
             except KeyError:
-                self.animations[action] = {direction: animation}
+                self.animation_file_names[action] = {direction: sprite_path}
 
         # If the last file_name from the above for loop is "only,"
         # that means that that name denotes the fact that there is
         # ONLY one sprite for the supplied Walkabout resource.
         if file_name == 'only':
 
-            # We want to set all the appropriate action/direction
-            # animations in the self.animations dictionary to the
-            # only animation provided, which was assigned as the
+            # We want every action/direction to use the only
+            # animation provided, which was assigned as the
             # "Stand South" animation.
-            animation = (self.animations[constants.Action.stand][
-                         constants.Direction.south])
-
             for action in constants.Action.all():
 
                 for direction in constants.Direction.cardinals_and_ordinals():
@@ -196,16 +217,22 @@ class Walkabout(pygame.sprite.Sprite):
                     # We set everything to the Stand South animation since
                     # it was set first.
                     try:
-                        self.animations[action][direction] = animation
+                        (self.animation_file_names[action]
+                         [direction]) = sprite_path
                     except KeyError:
-                        self.animations[action] = {direction: animation}
+                        self.animation_file_names[action] = {direction:
+                                                             sprite_path}
 
         # ... set the rest of the attribs
         self.resource = resource
 
         # NOTE: this is lazy and results in smaller frames
         # having a bunch of "padding"
-        self.size = animation.largest_frame_size()
+        #
+        # every frame of a GIF is the size of the GIF, which is
+        # read without decoding the GIF
+        gif_file = BytesIO(resource.raw_files[sprite_path])
+        self.size = animatedsprite.AnimatedSprite.size_from_gif(gif_file)
 
         self.rect = pygame.Rect(position, self.size)
         self.topleft_float = topleft_float
@@ -213,7 +240,11 @@ class Walkabout(pygame.sprite.Sprite):
         self.direction = constants.Direction.south
         self.child_walkabouts = children or []
 
-        self.image = self.animations[self.action][self.direction]
+        self.image = self.current_animation()
+
+        # what was drawn last, see Walkabout.dirty_rects()
+        self._last_blit_positions = None
+        self._last_drawn_area = None
 
     def __getitem__(self, key):
         """Fetch sprites associated with action (key).
@@ -232,7 +263,53 @@ class Walkabout(pygame.sprite.Sprite):
 
         """
 
-        return self.animations[key]
+        return {direction: self.animation(key, direction)
+                for direction in self.animation_file_names[key]}
+
+    def animation(self, action, direction):
+        """Return the animation for action and direction, decoding
+        its GIF from the resource the first time it is needed.
+
+        Args:
+            action (constants.Action): --
+            direction (constants.Direction): --
+
+        Raises:
+            KeyError: There is no animation for action and direction.
+
+        Returns:
+            AnimatedSprite: --
+
+        """
+
+        try:
+
+            return self.animations[action][direction]
+
+        except KeyError:
+            file_name = self.animation_file_names[action][direction]
+
+        # the resource decodes the GIF once, for every Walkabout
+        if file_name not in self.animation_files:
+            animation = self.resource[file_name].copy()
+            self.animation_files[file_name] = animation
+
+            # as runtime_setup() and pack() did to those loaded before
+            if self._set_up:
+                animation.convert_alpha()
+
+            if self.atlas is not None:
+                self.atlas.add_animation(animation,
+                                         self.animation_name(file_name))
+
+        animation = self.animation_files[file_name]
+
+        try:
+            self.animations[action][direction] = animation
+        except KeyError:
+            self.animations[action] = {direction: animation}
+
+        return animation
 
     def current_animation(self):
         """Returns the animation selected by the current action
@@ -249,13 +326,16 @@ class Walkabout(pygame.sprite.Sprite):
 
         """
 
-        return self.animations[self.action][self.direction]
+        return self.animation(self.action, self.direction)
 
     def update(self, clock, screen, offset):
         """Call this once per main loop iteration (tick). Advance
         the active animation's frame according to the clock, use
         said surface/image/frame as this Walkabout's "image" attribute.
 
+        The child walkabouts take on this Walkabout's action and
+        direction, and are updated likewise.
+
         Args:
             clock (pygame.time.Clock): The system clock. Typically
                 and defaultly the game.screen.clock. It will control
@@ -278,24 +358,68 @@ class Walkabout(pygame.sprite.Sprite):
                                 screen)
         self.image = active_animation.image
 
-    def blit(self, clock, screen, offset):
-        """Draw the appropriate/active animation to screen.
+        for child_walkabout in self.child_walkabouts:
+            # We update the current animation to reflect this
+            # Walkabout's current action and direction.
+            child_walkabout.action = self.action
+            child_walkabout.direction = self.direction
+            child_walkabout.update(clock, screen, offset)
+
+    def pack(self, atlas):
+        """Pack the frames of the animations of this Walkabout which
+        have been loaded so far, and of its children, into atlas.
+        The animations loaded from then on are packed as they are
+        loaded, see Walkabout.animation().
+
+        The frames are keyed by resource, so Walkabouts of the same
+        resource end up sharing the frames in atlas.
+
+        Args:
+            atlas (atlas.TextureAtlas): --
+
+        """
+
+        self.atlas = atlas
+
+        for file_name, animation in self.animation_files.items():
+            atlas.add_animation(animation, self.animation_name(file_name))
+
+        for child_walkabout in self.child_walkabouts:
+            child_walkabout.pack(atlas)
+
+    def animation_name(self, file_name):
+        """The name the frames of a GIF are packed under, see
+        Walkabout.pack().
+
+        Args:
+            file_name (str): --
+
+        Returns:
+            str: --
+
+        Example:
+            >>> Walkabout('debug').animation_name('only.gif')
+            'walkabouts/debug/only.gif'
+
+        """
+
+        return '/'.join((self.resource.category,
+                         self.resource.name,
+                         file_name))
+
+    def blit_positions(self, offset):
+        """The surfaces which make up this Walkabout as it stands,
+        along with where they go on screen: first this Walkabout's
+        image, then the image of each child.
 
         Args:
-            clock (pygame.time.Clock): The system clock. Typically
-                and defaultly the game.screen.clock. It will control
-                the animation. Time is a key factor in updating the
-                animations.
-            screen (pygame.Surface): the primary display/screen.
             offset (x, y tuple): the x, y coords of the absolute
                 starting top left corner for the current
-                screen/viewport position.
+                screen/viewport position. Use (0, 0) for
+                absolute positions.
 
-        Note:
-            All sprites will be sync'd because of how clock
-            ticks work. The clock is ticked once per main
-            loop iteration, and animations are advanced by
-            getting the difference between two ticks.
+        Returns:
+            list[tuple]: (pygame.Surface, (x, y)) pairs.
 
         """
 
@@ -311,21 +435,15 @@ class Walkabout(pygame.sprite.Sprite):
         # sprite position on viewport
         # There are no half-pixels, thus we don't use floats.
         position_on_screen = (int(x), int(y))
+        positions = [(self.image, position_on_screen)]
 
-        # Update the state of the current animation. This affects
-        # this Walkabout's `image` property.
-        #
-        # See: Walkabout.update()
-        self.update(clock, screen, offset)
+        if not self.child_walkabouts:
 
-        # Blit the current image for this Walkabout to the
-        # supplied viewport surface (`screen`) at the supplied
-        # `position_on_screen`, which we figured out earlier.
-        screen.blit(self.image, position_on_screen)
+            return positions
 
-        # Render and update child walkabouts. Render a child
-        # Walkabout so that its head anchor occupies the same
-        # position as its parent head anchor (THIS Walkabout).
+        # Render child walkabouts. Render a child Walkabout so
+        # that its head anchor occupies the same position as its
+        # parent head anchor (THIS Walkabout).
         #
         # This means getting the difference between the following
         # child anchors and THIS Walkabout's (parent) anchors and
@@ -339,21 +457,10 @@ class Walkabout(pygame.sprite.Sprite):
         parent_anchor = parent_anchor + position_on_screen
 
         for child_walkabout in self.child_walkabouts:
-            # We update the current animation to reflect this
-            # Walkabout's current action and direction.
-            child_walkabout.action = self.action
-            child_walkabout.direction = self.direction
-
-            # Get and update this child walkabout's
-            # current animation.
+            # Get the active frame of the child animation,
+            # which was updated along with this Walkabout,
+            # in order to find its head anchor.
             child_active_anim = child_walkabout.current_animation()
-            child_active_anim.update(clock,
-                                     self.topleft_float,
-                                     screen)
-
-            # Now that the child walkabout's current animation
-            # has been updated, get the active frame of the
-            # child animation in order to find its head anchor.
             child_active_frame = child_active_anim.active_frame
             child_frame_anchor = child_active_frame.anchors['head_anchor']
 
@@ -361,13 +468,90 @@ class Walkabout(pygame.sprite.Sprite):
             # position by subtracting the child's anchor from
             # the adjusted parent anchor.
             child_position = (parent_anchor - child_frame_anchor).as_tuple()
-            screen.blit(child_active_anim.image, child_position)
+            positions.append((child_active_anim.image, child_position))
+
+        return positions
+
+    def draw(self, screen, offset):
+        """Draw this Walkabout and its children as they currently
+        stand, without advancing any animation.
+
+        Args:
+            screen (pygame.Surface): the primary display/screen.
+            offset (x, y tuple): the x, y coords of the absolute
+                starting top left corner for the current
+                screen/viewport position.
+
+        """
+
+        for surface, position in self.blit_positions(offset):
+            screen.blit(surface, position)
+
+    def blit(self, clock, screen, offset):
+        """Draw the appropriate/active animation to screen.
+
+        Args:
+            clock (pygame.time.Clock): The system clock. Typically
+                and defaultly the game.screen.clock. It will control
+                the animation. Time is a key factor in updating the
+                animations.
+            screen (pygame.Surface): the primary display/screen.
+            offset (x, y tuple): the x, y coords of the absolute
+                starting top left corner for the current
+                screen/viewport position.
+
+        Note:
+            All sprites will be sync'd because of how clock
+            ticks work. The clock is ticked once per main
+            loop iteration, and animations are advanced by
+            getting the difference between two ticks.
+
+        """
+
+        # Update the state of the current animation. This affects
+        # this Walkabout's `image` property.
+        #
+        # See: Walkabout.update()
+        self.update(clock, screen, offset)
+        self.draw(screen, offset)
+
+    def dirty_rects(self):
+        """Report the absolute areas which need to be redrawn
+        because this Walkabout changed since the last call: the
+        area it used to cover and the area it covers now.
+
+        Used for dirty rect rendering.
+
+        Returns:
+            list[pygame.Rect]: empty if nothing changed.
+
+        """
+
+        positions = self.blit_positions((0, 0))
+
+        if positions == self._last_blit_positions:
+
+            return []
+
+        area = pygame.Rect(positions[0][1], positions[0][0].get_size())
+        area.unionall_ip([pygame.Rect(position, surface.get_size())
+                          for surface, position in positions[1:]])
+        rects = [area]
+
+        if self._last_drawn_area is not None:
+            rects.append(self._last_drawn_area)
+
+        self._last_blit_positions = positions
+        self._last_drawn_area = area
+
+        return rects
 
     def runtime_setup(self):
         """Perform actions to setup the walkabout. Actions performed
         once pygame is running and walkabout has been initialized.
 
-        Convert and play all the animations, run init for children.
+        Convert the animations loaded so far, and those loaded from
+        then on, see Walkabout.animation(); run init for children.
 
         Note:
             It MAY be bad to leave the sprites in play mode in startup
@@ -375,35 +559,191 @@ class Walkabout(pygame.sprite.Sprite):
 
         """
 
-        if len(self.animations) == 1:
-            actions = (constants.Action.stand,)
-            directions = (constants.Direction.south,)
-
-        else:
-            actions = (constants.Action.walk, constants.Action.stand)
-            directions = (constants.Direction.north, constants.Direction.south,
-                          constants.Direction.east, constants.Direction.west)
+        for animated_sprite in self.animation_files.values():
+            animated_sprite.convert_alpha()
 
-        for action in actions:
-
-            for direction in directions:
-                animated_sprite = self.animations[action][direction]
-                animated_sprite.convert_alpha()
+        self._set_up = True
 
         for walkabout_child in self.child_walkabouts:
             walkabout_child.runtime_setup()
 
 
 def palette_cycle(surface):
-    """get_palette is not sufficient; it generates superflous colors.
+    """Create an animation by cycling through the colors of a
+    surface: each frame, every pixel takes on the color which
+    comes before its own in the surface's list of colors.
+
+    get_palette is not sufficient; it generates superflous colors.
+    Colors are listed in the order they first appear, column
+    by column.
+
+    If the surface is opaque and has at most 256 colors, the
+    animation is a palette animation: a single 8-bit surface whose
+    palette is swapped every frame. Otherwise, each frame is an
+    RGBA copy of the surface.
 
     Note:
-      Need to see if I can convert 32bit alpha to 8 bit temporarily,
-      to be converted back at end of palette/color manipulations.
+      Uses pygame.surfarray when NumPy is available, otherwise
+      falls back to (much slower) get_at()/set_at() per pixel.
+
+    Args:
+      surface (pygame.Surface): --
+
+    Returns:
+      animatedsprite.AnimatedSprite: one frame per color; the
+        last frame is the original surface.
+
+    """
+
+    ordered_colors, color_indexes = palette_cycle_color_indexes(surface)
+    opaque = all(color[3] == 255 for color in ordered_colors)
+
+    if opaque and len(ordered_colors) <= 256:
+        indexed_surface = pygame.image.fromstring(color_indexes,
+                                                  surface.get_size(),
+                                                  'P')
+        palettes = []
+
+        for rotation in range(1, len(ordered_colors) + 1):
+            rotated_colors = collections.deque(ordered_colors)
+            rotated_colors.rotate(rotation)
+            palette = [color[:3] for color in rotated_colors]
+            palettes.append((palette, 250))
+
+        return (animatedsprite.AnimatedSprite.
+                from_palette_duration_list(indexed_surface, palettes))
+
+    if numpy is None:
+        cycled_surfaces = palette_cycle_surfaces_get_at(surface)
+
+    else:
+        cycled_surfaces = palette_cycle_surfaces_surfarray(surface)
+
+    frames = [(cycled_surface, 250) for cycled_surface in cycled_surfaces]
+
+    return animatedsprite.AnimatedSprite.from_surface_duration_list(frames)
+
+
+def palette_cycle_color_indexes(surface):
+    """List the colors of surface in the order palette_cycle()
+    cycles them, and which of them each pixel is.
+
+    Args:
+      surface (pygame.Surface): --
+
+    Returns:
+      tuple: (list of (r, g, b, a) colors, bytes with the index
+        of the color of each pixel, row by row). The bytes are
+        None if there are more than 256 colors.
+
+    """
+
+    width, height = surface.get_size()
+
+    if numpy is not None:
+        # mapped pixel values, indexed [x][y]; flattening gives
+        # the column by column order
+        pixels = pygame.surfarray.array2d(surface)
+        colors, first_seen, color_indexes = numpy.unique(pixels.ravel(),
+                                                         return_index=True,
+                                                         return_inverse=True)
+        order = numpy.argsort(first_seen)
+        position_of_color = numpy.empty_like(order)
+        position_of_color[order] = numpy.arange(len(order))
+        ordered_colors = [tuple(surface.unmap_rgb(int(color)))
+                          for color in colors[order]]
+
+        if len(ordered_colors) > 256:
+
+            return ordered_colors, None
+
+        pixel_positions = position_of_color[color_indexes.ravel()]
+        pixel_positions = pixel_positions.reshape(pixels.shape)
+
+        return ordered_colors, pixel_positions.T.astype(numpy.uint8).tobytes()
+
+    ordered_colors = []
+    position_of_color = {}
+
+    for coordinate in itertools.product(range(0, width), range(0, height)):
+        color = tuple(surface.get_at(coordinate))
+
+        if color not in position_of_color:
+            position_of_color[color] = len(ordered_colors)
+            ordered_colors.append(color)
+
+    if len(ordered_colors) > 256:
+
+        return ordered_colors, None
+
+    color_indexes = bytearray(width * height)
+
+    for y in range(height):
+
+        for x in range(width):
+            color = tuple(surface.get_at((x, y)))
+            color_indexes[(y * width) + x] = position_of_color[color]
+
+    return ordered_colors, bytes(color_indexes)
+
+
+def palette_cycle_surfaces_surfarray(surface):
+    """The frames of palette_cycle(), built with NumPy.
+
+    All pixels are read at once, each pixel's position in the
+    list of colors is found with numpy.unique(), and each frame
+    is written at once with a lookup into the rotated colors.
+
+    Args:
+      surface (pygame.Surface): --
+
+    Returns:
+      list[pygame.Surface]: --
+
+    """
+
+    # mapped pixel values, indexed [x][y]; flattening gives
+    # the column by column order
+    pixels = pygame.surfarray.array2d(surface)
+    flat_pixels = pixels.ravel()
+    colors, first_seen, color_indexes = numpy.unique(flat_pixels,
+                                                     return_index=True,
+                                                     return_inverse=True)
+
+    # sort the colors by the order in which they first appear
+    order = numpy.argsort(first_seen)
+    ordered_colors = colors[order]
+    position_of_color = numpy.empty_like(order)
+    position_of_color[order] = numpy.arange(len(order))
+    pixel_positions = position_of_color[color_indexes.ravel()]
+    pixel_positions = pixel_positions.reshape(pixels.shape)
+
+    number_of_colors = len(ordered_colors)
+    cycled_surfaces = []
+
+    for rotation in range(1, number_of_colors + 1):
+        rotated_positions = (pixel_positions - rotation) % number_of_colors
+        cycled_surface = surface.copy()
+        pygame.surfarray.blit_array(cycled_surface,
+                                    ordered_colors[rotated_positions])
+        cycled_surfaces.append(cycled_surface)
+
+    return cycled_surfaces
+
+
+def palette_cycle_surfaces_get_at(surface):
+    """The frames of palette_cycle(), built pixel by pixel.
+
+    Used when NumPy isn't available.
+
+    Args:
+      surface (pygame.Surface): --
+
+    Returns:
+      list[pygame.Surface]: --
 
     """
 
-    original_surface = surface.copy()  # don't touch! used for later calc
     width, height = surface.get_size()
     ordered_color_list = []
     seen_colors = set()
@@ -422,7 +762,7 @@ def palette_cycle(surface):
     # reverse the color list but not the pixel arrays, then replace!
     old_color_list = collections.deque(ordered_color_list)
     new_surface = surface.copy()
-    frames = []
+    cycled_surfaces = []
 
     for rotation_i in range(len(ordered_color_list)):
         new_surface = new_surface.copy()
@@ -439,8 +779,7 @@ def palette_cycle(surface):
             new_color = color_translations[color]
             new_surface.set_at(coordinate, new_color)
 
-        frame = new_surface.copy()
-        frames.append((frame, 250))
+        cycled_surfaces.append(new_surface.copy())
         old_color_list = copy.copy(new_color_list)
 
-    return animatedsprite.AnimatedSprite.from_surface_duration_list(frames)
+    return cycled_surfaces
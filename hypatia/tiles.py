@@ -15,293 +15,1679 @@ See Also:
 
 import os
 import sys
+import copy
 import glob
 import zlib
+import array
+import bisect
+import struct
 import string
 import itertools
+import operator
+import collections
 
 import pygame
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from hypatia import sprites
+from hypatia import physics
 from hypatia import resources
 from hypatia import animatedsprite
 
 
-class BadTileID(Exception):
-    """Tilesheet: tile was referenced by an
-    ID which does not exist.
+class BadTileID(Exception):
+    """Tilesheet: tile was referenced by an
+    ID which does not exist.
+
+    Args:
+        bad_tile_id (int): the tile id referenced which
+            does not actually exist in a Tilesheet.
+
+    Attributes:
+        bad_tile_id (int): the tile ID referenced
+            which does not exist.
+
+    """
+
+    def __init__(self, bad_tile_id):
+        message = ('no tile by id #%d' % bad_tile_id)
+        super(BadTileID, self).__init__(message)
+        self.bad_tile_id = bad_tile_id
+
+
+class TileMap(object):
+    """Layers created from graphical tiles specified in tilesheets.
+
+    Note:
+      Makes map-specific data accessible.
+
+      A map may use several tilesheets, of the same tile size. As in
+      TMX, each tilesheet is assigned a range of global tile IDs
+      starting at its first global ID, and a cell stores the global
+      ID of its tile. See TileMap.resolve().
+
+      Layer graphics are not baked into one surface per layer. Each
+      layer is cut into chunks of CHUNK_SIZE x CHUNK_SIZE tiles,
+      which are only baked once they are first drawn, and at most
+      MAX_CHUNKS of them are kept around at any given time.
+
+    Constants:
+      CHUNK_SIZE (int): width and height, in tiles, of a layer chunk.
+      MAX_CHUNKS (int): how many baked chunks (across all layers)
+        are kept before the least recently drawn one is evicted.
+      BINARY_MAGIC (bytes): the start of the binary format, see
+        to_bytes().
+      BINARY_HEADER (struct.Struct): magic, flags, width, height
+        and depth in tiles, and the byte length of the tilesheets
+        string which follows, see tilesheets_to_string().
+      BINARY_ZLIB (int): flag; the layers are zlib-compressed.
+
+    Attributes:
+      tilesheet (Tilesheet): the first of tilesheets.
+      tilesheets (list[Tilesheet]): only those the map uses.
+      first_global_ids (list[int]): the first global tile ID of
+        each of tilesheets, in ascending order.
+      dimensions_in_tiles:
+      tile_ids (list[array.array]): one array('H') per layer, of
+        the global tile ID of every cell, row after row. With one
+        tilesheet starting at 1, it is the Tilesheet tile ID + 1.
+        0 is -1, i.e., nothing: the empty Tile, see Tile.empty().
+      layer_images (list[ChunkedLayer]): one per layer, bottom
+        layer first.
+      chunk_cache (ChunkCache): the baked chunks of every layer.
+      flag_registry (FlagRegistry): the bit of each flag name in
+        cell_flags.
+      cell_flags (array.array): the flags of every cell, merged
+        from all layers, as a bitmask, row after row.
+      passability (PassabilityGrid): passability flags of every
+        cell, merged from all layers.
+      collision_grid (physics.CollisionGrid): the Scene keeps NPCs
+        in it.
+      animated_tile_stack (dict): z -> (chunk_x, chunk_y) -> set
+        of (AnimatedSprite, (x, y) absolute pixel position) of the
+        animated tiles of that layer chunk, so that only those in
+        view are looked at.
+
+    """
+
+    CHUNK_SIZE = 16
+    MAX_CHUNKS = 128
+    BINARY_MAGIC = b'HYPTMAP\x01'
+    BINARY_HEADER = struct.Struct('<8sBHHHH')
+    BINARY_ZLIB = 1
+
+    def __init__(self, tilesheet_name, tile_ids, width_tiles=None):
+        """Index tiles from swatch for the layer chunks.
+
+        Piece together layers from corresponding tile graphic
+        names, using the specified tile swatch. Keep track of
+        metadata, including passability.
+
+        Args:
+          tilesheet_name (str|list[tuple]): directory name of the
+            swatch to use, or (name, first global tile ID) of each
+            of the tilesheets to use.
+          tile_ids (list): 3d list where list[layer][row][tile] of
+            global tile ID - 1, or, if width_tiles is supplied, a
+            list of array('H') as in TileMap.tile_ids, which are
+            used as they are.
+          width_tiles (int|None): the width of the map in tiles, only
+            when tile_ids is a list of arrays.
+
+        Raises:
+          ValueError: The tilesheets do not have the same tile size.
+
+        Examples:
+          Make a 2x2x1 tilemap:
+          >>> tiles = [[[0, 0], [0, 0]]]
+          >>> tilemap = TileMap('debug', tiles)
+          >>> list(tilemap.tile_ids[0])
+          [1, 1, 1, 1]
+
+        """
+
+        if isinstance(tilesheet_name, (list, tuple)):
+            tilesheet_specs = sorted(tilesheet_name, key=lambda spec: spec[1])
+        else:
+            tilesheet_specs = [(tilesheet_name, 1)]
+
+        if width_tiles is None:
+            first_layer = tile_ids[0]
+            width_tiles = len(first_layer[0])
+            tile_ids = [self.layer_from_rows(layer) for layer in tile_ids]
+
+        height_tiles = len(tile_ids[0]) // width_tiles
+        depth_tiles = len(tile_ids)
+
+        for layer in tile_ids:
+
+            if len(layer) != width_tiles * height_tiles:
+
+                raise ValueError('the layers are not all %dx%d tiles'
+                                 % (width_tiles, height_tiles))
+
+        # create the layer chunks and tile properties
+        tilesheets = [Tilesheet.from_resources(name)
+                      for name, __ in tilesheet_specs]
+        self.tilesheets = tilesheets
+        self.first_global_ids = [first_global_id for __, first_global_id
+                                 in tilesheet_specs]
+        tilesheet = tilesheets[0]
+
+        if len(set(sheet.tile_size for sheet in tilesheets)) > 1:
+
+            raise ValueError('the tilesheets differ in tile size')
+
+        dimensions_in_tiles = (width_tiles, height_tiles, depth_tiles)
+
+        tile_size = tilesheet.tile_size
+        tile_width, tile_height = tile_size
+
+        passability = PassabilityGrid(width_tiles, height_tiles, tile_size)
+        animated_tile_stack = {i: {} for i in range(depth_tiles)}
+
+        # global tile ID -> (Tile, its AnimatedSprite or None,
+        # bitmask of its flags), see resolve_tile()
+        resolved_tiles = {}
+        flag_registry = FlagRegistry()
+        self._resolved_tiles = resolved_tiles
+        self.flag_registry = flag_registry
+
+        for global_id in set().union(*tile_ids):
+            self.resolve_tile(global_id)
+
+        # global tile ID -> bitmask of the flags of its Tile
+        global_id_flags = {global_id: bits for global_id, (__, __, bits)
+                           in resolved_tiles.items()}
+
+        # merge the flags of every layer into the cells
+        flag_layers = [layer for layer in tile_ids
+                       if any(global_id_flags[global_id]
+                              for global_id in set(layer))]
+        cell_flags = self.merge_layer_flags(flag_layers, global_id_flags,
+                                            flag_registry.typecode(),
+                                            width_tiles * height_tiles)
+        passability.set_cells(cell_flags, flag_registry)
+
+        # the cells of the animated tiles
+        animated_ids = set(global_id for global_id, (__, tile_animation, __)
+                           in resolved_tiles.items()
+                           if tile_animation is not None)
+
+        for z, layer in enumerate(tile_ids):
+
+            if animated_ids.isdisjoint(layer):
+
+                continue
+
+            for tile_index, global_id in enumerate(layer):
+
+                if global_id not in animated_ids:
+
+                    continue
+
+                y, x = divmod(tile_index, width_tiles)
+                tile_position = (x * tile_width, y * tile_height)
+                tile_animation = resolved_tiles[global_id][1]
+                animation_info = (tile_animation, tile_position)
+                chunk_coord = (x // self.CHUNK_SIZE, y // self.CHUNK_SIZE)
+                (animated_tile_stack[z].setdefault(chunk_coord, set()).
+                 add(animation_info))
+
+        self.tilesheet = tilesheet
+        self.passability = passability
+        self.cell_flags = cell_flags
+        self.collision_grid = physics.CollisionGrid(tile_size)
+        self.animated_tile_stack = animated_tile_stack
+        self.dimensions_in_tiles = dimensions_in_tiles
+
+        # (global tile ID, bitmask) -> the Tile of a cell, see
+        # __getitem__()
+        self._cell_tiles = {}
+
+        # the Tilesheet tile IDs which constructed this TileMap
+        self.tile_ids = tile_ids
+
+        # layer graphics are baked chunk by chunk, on demand
+        self.chunk_cache = ChunkCache(self.MAX_CHUNKS)
+        self.layer_images = [ChunkedLayer(self, z)
+                             for z in range(depth_tiles)]
+
+        # the areas edited since the last pop_changed_rects()
+        self._changed_rects = []
+
+    @property
+    def impassable_rects(self):
+        """A pygame.Rect for every impassable cell, built on
+        demand from the passability grid.
+
+        Warning:
+            This is for compatibility only; it allocates a Rect
+            per impassable cell. Use passability.blocked() instead.
+
+        Returns:
+            list[pygame.Rect]: --
+
+        """
+
+        return list(self.passability.rects(PassabilityGrid.IMPASS_ALL))
+
+    def bake_chunk(self, z, chunk_x, chunk_y):
+        """Stitch the tiles of one layer chunk onto a new surface.
+
+        Args:
+            z (int): the layer the chunk belongs to.
+            chunk_x (int): chunk column, in chunks (not tiles).
+            chunk_y (int): chunk row, in chunks (not tiles).
+
+        Returns:
+            pygame.Surface: the chunk, sized to the part of the
+                map it covers (edge chunks may be smaller).
+
+        Examples:
+          >>> tiles = [[[0, 0], [0, 0]]]
+          >>> tilemap = TileMap('debug', tiles)
+          >>> tilemap.bake_chunk(0, 0, 0).get_size()
+          (20, 20)
+
+        """
+
+        tile_width, tile_height = self.tilesheet.tile_size
+        chunk_rect = self.chunk_rect_in_tiles(chunk_x, chunk_y)
+        chunk_size = (chunk_rect.width * tile_width,
+                      chunk_rect.height * tile_height)
+
+        chunk = pygame.Surface(chunk_size, pygame.SRCALPHA, 32)
+        chunk.fill([0, 0, 0, 0])
+        layer = self.tile_ids[z]
+        width_tiles = self.dimensions_in_tiles[0]
+
+        for y in range(chunk_rect.height):
+            row_start = (chunk_rect.top + y) * width_tiles + chunk_rect.left
+            row_in_chunk = layer[row_start:row_start + chunk_rect.width]
+
+            for x, global_id in enumerate(row_in_chunk):
+                # -1 is air/nothing
+                if global_id == 0:
+
+                    continue
+
+                tile = self.tile(global_id)
+
+                # blit tile subsurface onto the chunk
+                tile_position = (x * tile_width, y * tile_height)
+                chunk.blit(tile.subsurface, tile_position)
+
+        # only possible once the display has been set
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
+
+        return chunk
+
+    def resolve(self, global_id):
+        """Find the tilesheet of a global tile ID, as stored in
+        TileMap.tile_ids, by its range of global IDs.
+
+        Args:
+            global_id (int): --
+
+        Returns:
+            tuple: (index in TileMap.tilesheets, Tilesheet tile ID).
+                0 is (0, -1), nothing, which resolve_tile() gives
+                the empty Tile.
+
+        Raises:
+            BadTileID: global_id is before the first tilesheet.
+
+        Examples:
+          >>> tilemap = TileMap([('debug', 1), ('debug', 121)],
+          ...                   [[[0, 120, 121]]])
+          >>> tilemap.resolve(1), tilemap.resolve(122), tilemap.resolve(0)
+          ((0, 0), (1, 1), (0, -1))
+
+        """
+
+        # -1 is air/nothing
+        if global_id == 0:
+
+            return 0, -1
+
+        tilesheet_index = bisect.bisect_right(self.first_global_ids,
+                                              global_id) - 1
+
+        if tilesheet_index < 0:
+
+            raise BadTileID(global_id - 1)
+
+        return (tilesheet_index,
+                global_id - self.first_global_ids[tilesheet_index])
+
+    def tile(self, global_id):
+        """Return the Tile of a global tile ID, see resolve().
+
+        Args:
+            global_id (int): --
+
+        Returns:
+            Tile: --
+
+        """
+
+        return self.resolve_tile(global_id)[0]
+
+    def resolve_tile(self, global_id):
+        """Return the Tile of a global tile ID with its animation
+        and the bitmask of its flags, memoized.
+
+        Args:
+            global_id (int): --
+
+        Returns:
+            tuple: (Tile, its AnimatedSprite or None, bitmask of
+                its flags, see flag_registry).
+
+        Raises:
+            BadTileID: No tilesheet has this tile.
+
+        Examples:
+          >>> tilemap = TileMap('debug', [[[0, -1]]])
+          >>> tile, tile_animation, bits = tilemap.resolve_tile(0)
+          >>> tile.tilesheet_id, tile.subsurface, tile_animation, bits
+          (-1, None, None, 0)
+
+        """
+
+        try:
+
+            return self._resolved_tiles[global_id]
+
+        except KeyError:
+
+            # -1 is air/nothing
+            if global_id == 0:
+                tile_size = self.tilesheets[0].tile_size
+                resolved = (Tile.empty(tile_size), None, 0)
+                self._resolved_tiles[global_id] = resolved
+
+                return resolved
+
+            tilesheet_index, local_id = self.resolve(global_id)
+            tilesheet = self.tilesheets[tilesheet_index]
+            tile = tilesheet[local_id]
+            tile_animation = tilesheet.animated_tiles.get(tile.tilesheet_id)
+            resolved = (tile, tile_animation,
+                        self.flag_registry.bits(tile.flags))
+            self._resolved_tiles[global_id] = resolved
+
+            return resolved
+
+    def set_tile(self, x, y, z, tile_id):
+        """Change the tile of one cell of one layer.
+
+        Only that cell is updated: it is drawn again on its chunk,
+        if the chunk is baked, and its flags, passability and
+        animated tile are updated.
+
+        Args:
+            x (int): column, in tiles.
+            y (int): row, in tiles.
+            z (int): layer.
+            tile_id (int): global tile ID - 1, as in the 3D list
+                TileMap() accepts; -1 is nothing: the cell of the
+                layer is cleared, and has no flags.
+
+        Raises:
+            BadTileID: No tilesheet has this tile.
+            IndexError: The cell is outside of the map.
+
+        Examples:
+          >>> tilemap = TileMap('debug', [[[0, 0], [0, 0]]])
+          >>> tilemap.set_tile(1, 0, 0, 5)
+          >>> list(tilemap.tile_ids[0])
+          [1, 6, 1, 1]
+
+        """
+
+        self.set_region(x, y, z, [[tile_id]])
+
+    def set_region(self, x, y, z, rows):
+        """Change the tiles of a rectangular area of one layer,
+        see set_tile(). Costs as much as the cells it changes.
+
+        Args:
+            x (int): left column of the area, in tiles.
+            y (int): top row of the area, in tiles.
+            z (int): layer.
+            rows (list[list[int]]): the tile IDs of the area, row
+                after row, as in set_tile().
+
+        Raises:
+            BadTileID: No tilesheet has one of the tiles.
+            IndexError: The area is not inside of the map.
+
+        Examples:
+          >>> tilemap = TileMap('debug', [[[0, 0], [0, 0]]])
+          >>> tilemap.set_region(0, 1, 0, [[-1, 4]])
+          >>> list(tilemap.tile_ids[0])
+          [1, 1, 0, 5]
+
+        """
+
+        width_tiles, height_tiles, depth_tiles = self.dimensions_in_tiles
+        region_height = len(rows)
+        region_width = len(rows[0]) if rows else 0
+
+        if (x < 0 or y < 0 or not 0 <= z < depth_tiles or
+                x + region_width > width_tiles or
+                y + region_height > height_tiles or
+                any(len(row) != region_width for row in rows)):
+
+            raise IndexError('(%d, %d, %d) %dx%d is not inside of the map'
+                             % (x, y, z, region_width, region_height))
+
+        # every tile is checked before any cell is changed
+        global_ids = self.layer_from_rows(rows)
+
+        for global_id in set(global_ids):
+            self.resolve_tile(global_id)
+
+        # new flags may need larger bitmasks
+        flags_typecode = self.flag_registry.typecode()
+
+        if flags_typecode != self.cell_flags.typecode:
+            self.cell_flags = array.array(flags_typecode, self.cell_flags)
+
+        tile_width, tile_height = self.tilesheet.tile_size
+        layer = self.tile_ids[z]
+
+        for i, global_id in enumerate(global_ids):
+            region_y, region_x = divmod(i, region_width)
+            cell_x = x + region_x
+            cell_y = y + region_y
+            tile_index = coord_to_index(width_tiles, cell_x, cell_y)
+            old_global_id = layer[tile_index]
+
+            if global_id == old_global_id:
+
+                continue
+
+            layer[tile_index] = global_id
+            tile, tile_animation = self._resolved_tiles[global_id][:2]
+            old_tile_animation = self._resolved_tiles[old_global_id][1]
+            tile_position = (cell_x * tile_width, cell_y * tile_height)
+
+            # the animated tile
+            chunk_coord = (cell_x // self.CHUNK_SIZE,
+                           cell_y // self.CHUNK_SIZE)
+            chunk_animated_tiles = self.animated_tile_stack[z]
+
+            # no empty sets are left behind, nor created
+            if old_tile_animation is not None:
+                animated_tiles = chunk_animated_tiles.get(chunk_coord)
+
+                if animated_tiles is not None:
+                    animated_tiles.discard((old_tile_animation,
+                                            tile_position))
+
+                    if not animated_tiles:
+                        del chunk_animated_tiles[chunk_coord]
+
+            if tile_animation is not None:
+                (chunk_animated_tiles.setdefault(chunk_coord, set()).
+                 add((tile_animation, tile_position)))
+
+            # flags and passability, merged from all layers again
+            bits = 0
+
+            for cell_layer in self.tile_ids:
+                bits |= self._resolved_tiles[cell_layer[tile_index]][2]
+
+            self.cell_flags[tile_index] = bits
+            self.passability.set_flags(cell_x, cell_y,
+                                       self.flag_registry.flags(bits))
+
+            self.redraw_cell(cell_x, cell_y, z, tile)
+
+        if global_ids:
+            self._changed_rects.append(pygame.Rect(x * tile_width,
+                                                   y * tile_height,
+                                                   region_width * tile_width,
+                                                   region_height *
+                                                   tile_height))
+
+    def redraw_cell(self, x, y, z, tile):
+        """Draw tile over a cell of its layer's chunk, if that
+        chunk is baked; otherwise it is drawn when baked.
+
+        Args:
+            x (int): column, in tiles.
+            y (int): row, in tiles.
+            z (int): layer.
+            tile (Tile): the empty Tile clears the cell.
+
+        """
+
+        chunk = self.chunk_cache.peek((z,
+                                       x // self.CHUNK_SIZE,
+                                       y // self.CHUNK_SIZE))
+
+        if chunk is None:
+
+            return
+
+        tile_width, tile_height = self.tilesheet.tile_size
+        cell_rect = pygame.Rect((x % self.CHUNK_SIZE) * tile_width,
+                                (y % self.CHUNK_SIZE) * tile_height,
+                                tile_width,
+                                tile_height)
+        chunk.fill([0, 0, 0, 0], cell_rect)
+
+        # the empty tile leaves the cell cleared
+        if tile.subsurface is not None:
+            chunk.blit(tile.subsurface, cell_rect)
+
+    def pop_changed_rects(self):
+        """Return the areas changed by set_tile() and set_region()
+        since the last call, and forget them.
+
+        Used for dirty rect rendering.
+
+        Returns:
+            list[pygame.Rect]: absolute pixel areas.
+
+        """
+
+        changed_rects = self._changed_rects
+        self._changed_rects = []
+
+        return changed_rects
+
+    def chunk_rect_in_tiles(self, chunk_x, chunk_y):
+        """The area of the map a chunk covers, in tiles.
+
+        Args:
+            chunk_x (int): chunk column, in chunks.
+            chunk_y (int): chunk row, in chunks.
+
+        Returns:
+            pygame.Rect: clipped to the map's dimensions.
+
+        """
+
+        width_tiles, height_tiles = self.dimensions_in_tiles[:2]
+        chunk_rect = pygame.Rect(chunk_x * self.CHUNK_SIZE,
+                                 chunk_y * self.CHUNK_SIZE,
+                                 self.CHUNK_SIZE,
+                                 self.CHUNK_SIZE)
+
+        return chunk_rect.clip(pygame.Rect(0, 0, width_tiles, height_tiles))
+
+    def __getitem__(self, coord):
+        """Fetch TileInfo by tile coordinate.
+
+        The Tile is that of the bottom layer, with the flags of the
+        cell, i.e., merged from all layers. If they differ from its
+        own, it is a copy of the Tile with those flags.
+
+        Args:
+          coord (tuple): (x, y) coordinate; z always just
+            z-index (it's not a pixel value)
+
+        Returns:
+          Tile: --
+
+        Examples:
+          >>> tiles = [[[0, 0], [0, 0]]]
+          >>> tilemap = TileMap('debug', tiles)
+          >>> 'impass_all' in tilemap[(1, 1)].flags
+          True
+
+        """
+
+        x, y = coord
+        width_in_tiles = self.dimensions_in_tiles[0]
+        tile_index = coord_to_index(width_in_tiles, x, y)
+        key = (self.tile_ids[0][tile_index], self.cell_flags[tile_index])
+
+        try:
+
+            return self._cell_tiles[key]
+
+        except KeyError:
+            global_id, bits = key
+            tile = self.tile(global_id)
+            flags = self.flag_registry.flags(bits)
+
+            if flags != tile.flags:
+                tile = tile.with_flags(flags)
+
+            self._cell_tiles[key] = tile
+
+            return tile
+
+    def get_info(self, coord):
+        """Fetch TileProperties by pixel coordinate.
+
+        Args:
+          coord (tuple): (int x, int y) coordinate;  units in pixels.
+            Coord only has to be in the area of tile.
+
+        Returns:
+          Tile: see __getitem__().
+
+        Examples:
+          Let's assume 10x10 tiles...
+          >>> tiles = [[[0, 10], [-1, 4]]]
+          >>> tilemap = TileMap('debug', tiles)
+          >>> 'impass_all' in tilemap.get_info((12, 12)).flags
+          True
+
+        """
+
+        tile_width, tile_height = self.tilesheet.tile_size
+        pixel_x, pixel_y = coord
+        tile_x = pixel_x // tile_width
+        tile_y = pixel_y // tile_height
+
+        return self[(tile_x, tile_y)]
+
+    def chunk_coords_in_rect(self, rect):
+        """Return the chunks of a layer which intersect rect.
+
+        Args:
+            rect (pygame.Rect): absolute pixel area, e.g., the
+                viewport rect.
+
+        Returns:
+            list[tuple]: (chunk_x, chunk_y), in chunks, row
+                after row.
+
+        Examples:
+          >>> tilemap = TileMap('debug', [[[0] * 40] * 20])
+          >>> tilemap.chunk_coords_in_rect(pygame.Rect(150, 0, 100, 10))
+          [(0, 0), (1, 0)]
+
+        """
+
+        width_tiles, height_tiles = self.dimensions_in_tiles[:2]
+        tile_width, tile_height = self.tilesheet.tile_size
+        chunk_width = self.CHUNK_SIZE * tile_width
+        chunk_height = self.CHUNK_SIZE * tile_height
+        rect = rect.clip(pygame.Rect(0, 0,
+                                     width_tiles * tile_width,
+                                     height_tiles * tile_height))
+
+        if not rect.width or not rect.height:
+
+            return []
+
+        first_chunk_x = rect.left // chunk_width
+        last_chunk_x = (rect.right - 1) // chunk_width
+        first_chunk_y = rect.top // chunk_height
+        last_chunk_y = (rect.bottom - 1) // chunk_height
+
+        return [(chunk_x, chunk_y)
+                for chunk_y in range(first_chunk_y, last_chunk_y + 1)
+                for chunk_x in range(first_chunk_x, last_chunk_x + 1)]
+
+    def animated_tiles_in_rect(self, layer, rect):
+        """Yield the animated tiles of a layer which are in rect.
+
+        Only the chunks which intersect rect are looked at, see
+        animated_tile_stack.
+
+        Args:
+            layer (int): --
+            rect (pygame.Rect): absolute pixel area, e.g., the
+                viewport rect.
+
+        Yields:
+            tuple: (AnimatedSprite, (x, y) absolute pixel position).
+
+        """
+
+        tile_width, tile_height = self.tilesheet.tile_size
+        left = rect.left - tile_width
+        top = rect.top - tile_height
+        right = rect.right
+        bottom = rect.bottom
+        layer_chunks = self.animated_tile_stack[layer]
+
+        for chunk_coord in self.chunk_coords_in_rect(rect):
+
+            for animation_info in layer_chunks.get(chunk_coord, ()):
+                x, y = animation_info[1]
+
+                if left < x < right and top < y < bottom:
+
+                    yield animation_info
+
+    def blit_layer_animated_tiles(self, viewport, layer):
+        """Blit the animated tiles of a designated layer which are
+        in view to the supplied viewport.
+
+        Args:
+            viewport (render.Viewport): --
+            layer (int): The nth layer of animated tiles
+                which to blit to viewport.
+
+        """
+
+        surface = viewport.surface
+        offset_x, offset_y = viewport.rect.topleft
+
+        for tile_anim, (x, y) in self.animated_tiles_in_rect(layer,
+                                                             viewport.rect):
+            surface.blit(tile_anim.image, (x - offset_x, y - offset_y))
+
+    def changed_animated_tile_rects(self, rect):
+        """Yield the absolute area of each animated tile within
+        rect whose animation changed frame during the last update.
+
+        Used for dirty rect rendering.
+
+        Args:
+            rect (pygame.Rect): absolute area to look in,
+                typically the viewport rect.
+
+        Yields:
+            pygame.Rect: --
+
+        """
+
+        for layer in self.animated_tile_stack:
+
+            for tile_anim, position in self.animated_tiles_in_rect(layer,
+                                                                   rect):
+
+                if not tile_anim.frame_changed:
+
+                    continue
+
+                tile_rect = pygame.Rect(position, tile_anim.image.get_size())
+
+                if tile_rect.colliderect(rect):
+
+                    yield tile_rect
+
+    def runtime_setup(self):
+        """This is for game.py. These need to be launched after pygame
+        has started.
+
+        """
+
+        # chunks baked before the display existed are unconverted
+        self.chunk_cache.clear()
+
+        for tilesheet in self.tilesheets:
+
+            for i, tile_animation in tilesheet.animated_tiles.items():
+                tile_animation.convert_alpha()
+
+        return None
+
+    def to_string(self, separator=' '):
+        """Create the user-unfriendly string for the tilemap.
+
+        Used for creating tilemap.txt.
+
+        Args:
+          separator (str): can be ''
+
+        Returns:
+            str: --
+
+        """
+
+        output_string = ''
+
+        # create map layers
+        layers = []
+        last_global_id = (self.first_global_ids[-1] +
+                          len(self.tilesheets[-1].tiles) - 1)
+        max_digits = len(str(last_global_id)) - 1
+        id_format = '%0' + str(max_digits) + 'd'
+        width_tiles, height_tiles, __ = self.dimensions_in_tiles
+
+        # every stored tile ID is only formatted once
+        formatted_ids = {}
+
+        for layer in self.tile_ids:
+
+            for global_id in set(layer) - set(formatted_ids):
+                formatted_ids[global_id] = id_format % (global_id - 1)
+
+            cells = [formatted_ids[global_id] for global_id in layer]
+            layer_lines = [separator.join(cells[row_start:
+                                                row_start + width_tiles])
+                           for row_start
+                           in range(0, width_tiles * height_tiles,
+                                    width_tiles)]
+
+            layer_string = '\n'.join(layer_lines)
+            layers.append(layer_string)
+
+        layers_string = '\n\n'.join(layers)
+        output_string += layers_string
+
+        return self.tilesheets_to_string() + '\n' + output_string
+
+    @classmethod
+    def from_string(cls, map_string, separator=' '):
+        """This is a debug feature. Create a 3D list of tile names using
+        ASCII symbols. Supports layers.
+
+        Used for reading tilemap.txt.
+
+        Returns:
+            TileMap: --
+
+        """
+
+        return TileMap(*cls.parse_string(map_string, separator))
+
+    @staticmethod
+    def merge_layer_flags(layers, global_id_flags, typecode, cell_count):
+        """OR the bitmasks of the flags of the tiles of every layer
+        together, cell by cell.
+
+        Note:
+          Uses NumPy when it is available: the bitmasks are looked
+          up for a whole layer at once. Otherwise, each layer is
+          mapped to bitmasks, then OR'd into the layers below,
+          cell by cell.
+
+        Args:
+          layers (list[array.array]): global tile IDs, as in
+            TileMap.tile_ids.
+          global_id_flags (dict): global tile ID -> bitmask.
+          typecode (str): of the array to return, see
+            FlagRegistry.typecode().
+          cell_count (int): the number of cells of a layer.
+
+        Returns:
+          array.array: a bitmask per cell, as in TileMap.cell_flags.
+
+        Examples:
+          >>> layers = [array.array('H', [0, 1, 2]),
+          ...           array.array('H', [2, 0, 0])]
+          >>> flags = {0: 0, 1: 1, 2: 2}
+          >>> list(TileMap.merge_layer_flags(layers, flags, 'B', 3))
+          [2, 1, 2]
+
+        """
+
+        if numpy is None:
+            cell_flags = array.array(typecode, [0]) * cell_count
+
+            for layer in layers:
+                layer_flags = map(global_id_flags.__getitem__, layer)
+                cell_flags = array.array(typecode,
+                                         map(operator.or_, cell_flags,
+                                             layer_flags))
+
+            return cell_flags
+
+        # global tile ID -> bitmask, as a lookup table
+        flags_dtype = numpy.dtype(typecode)
+        flag_table = numpy.zeros(max(global_id_flags) + 1,
+                                 dtype=flags_dtype)
+
+        for global_id, bits in global_id_flags.items():
+            flag_table[global_id] = bits
+
+        merged_flags = numpy.zeros(cell_count, dtype=flags_dtype)
+
+        for layer in layers:
+            merged_flags |= flag_table[numpy.asarray(layer)]
+
+        return array.array(typecode, merged_flags.tobytes())
+
+    @classmethod
+    def parse_string(cls, map_string, separator=' '):
+        """The part of TileMap.from_string() which creates no pygame
+        object, thus may run in any thread.
+
+        Returns:
+            tuple: (tilesheet specs, layers, width in tiles), the
+                arguments of TileMap().
+
+        Examples:
+          >>> TileMap.parse_string('debug\\n0 1\\n2 3')[2]
+          2
+
+        """
+
+        # GET TILESHEET NAMES FROM THE FIRST LINE, REMOVE FIRST LINE
+        tilesheets_string, layers_string = map_string.split('\n', 1)
+
+        # NOTE: I'm using strip('\n') because I can't seem to make
+        # the \n at the end of map-string.txt to go away.
+        # watch the quirky wording; layers_string >> layer_strings
+        layer_strings = layers_string.strip('\n').split('\n\n')
+        width_tiles = len(layer_strings[0].split('\n', 1)[0].
+                          split(separator))
+
+        # every distinct tile ID string is only parsed once
+        stored_tile_ids = _StoredTileIDs()
+        layers = []
+
+        for layer_string in layer_strings:
+            cells = layer_string.replace('\n', separator).split(separator)
+            layer = array.array('H', map(stored_tile_ids.__getitem__, cells))
+            layers.append(layer)
+
+        return (cls.tilesheets_from_string(tilesheets_string),
+                layers,
+                width_tiles)
+
+    def tilesheets_to_string(self):
+        """The tilesheets of this map, for the tilemap formats: the
+        tilesheet names, separated by spaces, each followed by
+        :first global ID unless it is 1.
+
+        Returns:
+            str: --
+
+        Examples:
+          >>> TileMap('debug', [[[0]]]).tilesheets_to_string()
+          'debug'
+
+        """
+
+        tilesheet_strings = []
+
+        for tilesheet, first_global_id in zip(self.tilesheets,
+                                              self.first_global_ids):
+
+            if first_global_id == 1:
+                tilesheet_strings.append(tilesheet.name)
+            else:
+                tilesheet_strings.append('%s:%d' % (tilesheet.name,
+                                                    first_global_id))
+
+        return ' '.join(tilesheet_strings)
+
+    @staticmethod
+    def tilesheets_from_string(tilesheets_string):
+        """Parse what TileMap.tilesheets_to_string() creates.
+
+        Args:
+            tilesheets_string (str): --
+
+        Returns:
+            list[tuple]: (name, first global ID) of each tilesheet.
+
+        Examples:
+          >>> TileMap.tilesheets_from_string('debug other:121')
+          [('debug', 1), ('other', 121)]
+
+        """
+
+        tilesheet_specs = []
+
+        for tilesheet_string in tilesheets_string.split():
+            name, __, first_global_id = tilesheet_string.partition(':')
+            tilesheet_specs.append((name, int(first_global_id or 1)))
+
+        return tilesheet_specs
+
+    def to_bytes(self, compress=True):
+        """Create the binary format of the tilemap: BINARY_HEADER,
+        the tilesheets as UTF-8, then each layer as
+        little-endian unsigned 16-bit integers, as in
+        TileMap.tile_ids.
+
+        Args:
+            compress (bool): whether to zlib-compress the layers.
+
+        Returns:
+            bytes: --
+
+        Examples:
+          >>> tilemap = TileMap('debug', [[[0, -1], [3, 0]]])
+          >>> data = tilemap.to_bytes()
+          >>> list(TileMap.from_bytes(data).tile_ids[0])
+          [1, 0, 4, 1]
+
+        """
+
+        tilesheets_string = self.tilesheets_to_string().encode('utf-8')
+        width_tiles, height_tiles, depth_tiles = self.dimensions_in_tiles
+        flags = self.BINARY_ZLIB if compress else 0
+        layers = array.array('H')
+
+        for layer in self.tile_ids:
+            layers.extend(layer)
+
+        if sys.byteorder == 'big':
+            layers.byteswap()
+
+        layers_data = layers.tostring() if bytes is str else layers.tobytes()
+
+        if compress:
+            layers_data = zlib.compress(layers_data)
+
+        header = self.BINARY_HEADER.pack(self.BINARY_MAGIC,
+                                         flags,
+                                         width_tiles,
+                                         height_tiles,
+                                         depth_tiles,
+                                         len(tilesheets_string))
+
+        return header + tilesheets_string + layers_data
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a TileMap from the binary format, see
+        TileMap.to_bytes().
+
+        Args:
+            data (bytes): --
+
+        Returns:
+            TileMap: --
+
+        Raises:
+            ValueError: data is not of the binary format.
+
+        """
+
+        header_size = cls.BINARY_HEADER.size
+
+        if len(data) < header_size:
+
+            raise ValueError('not a binary tilemap')
+
+        (magic,
+         flags,
+         width_tiles,
+         height_tiles,
+         depth_tiles,
+         name_length) = cls.BINARY_HEADER.unpack_from(data, 0)
+
+        if magic != cls.BINARY_MAGIC:
+
+            raise ValueError('not a binary tilemap')
+
+        name_end = header_size + name_length
+        tilesheets_string = data[header_size:name_end].decode('utf-8')
+        layers_data = data[name_end:]
+
+        if flags & cls.BINARY_ZLIB:
+            layers_data = zlib.decompress(layers_data)
+
+        layers = array.array('H')
+
+        if bytes is str:
+            layers.fromstring(layers_data)
+        else:
+            layers.frombytes(layers_data)
+
+        if sys.byteorder == 'big':
+            layers.byteswap()
+
+        layer_length = width_tiles * height_tiles
+
+        if len(layers) != layer_length * depth_tiles:
+
+            raise ValueError('truncated binary tilemap')
+
+        tile_ids = [layers[z * layer_length:(z + 1) * layer_length]
+                    for z in range(depth_tiles)]
+
+        return TileMap(cls.tilesheets_from_string(tilesheets_string),
+                       tile_ids,
+                       width_tiles)
+
+    @staticmethod
+    def layer_from_rows(rows):
+        """Create a layer of TileMap.tile_ids from the rows of
+        Tilesheet tile IDs of a layer.
+
+        Args:
+            rows (list[list[int]]): --
+
+        Returns:
+            array.array: --
+
+        Raises:
+            BadTileID: A tile ID is under -1, or too large to
+                be stored.
+
+        Examples:
+          >>> list(TileMap.layer_from_rows([[0, -1], [5, 2]]))
+          [1, 0, 6, 3]
+
+        """
+
+        layer = array.array('H')
+
+        for row in rows:
+
+            try:
+                layer.extend([tile_id + 1 for tile_id in row])
+            except OverflowError:
+                bad_tile_id = [tile_id for tile_id in row
+                               if not -1 <= tile_id < 0xffff][0]
+
+                raise BadTileID(bad_tile_id)
+
+        return layer
+
+
+class _StoredTileIDs(dict):
+    """Tile ID string -> tile ID + 1, computed on first lookup,
+    for TileMap.from_string().
+
+    """
+
+    def __missing__(self, tile_id_string):
+        stored_tile_id = int(tile_id_string) + 1
+
+        if not 0 <= stored_tile_id <= 0xffff:
+
+            raise BadTileID(stored_tile_id - 1)
+
+        self[tile_id_string] = stored_tile_id
+
+        return stored_tile_id
+
+
+class ChunkedLayer(object):
+    """A single TileMap layer, drawn from lazily baked chunks.
+
+    Stands in for the full-map layer surface: it is what
+    :meth:`render.Viewport.blit` receives, so only the chunks
+    intersecting the viewport are ever baked and drawn.
+
+    Attributes:
+        tilemap (TileMap): the map this layer belongs to.
+        z (int): which layer of tilemap this is.
+
+    """
+
+    def __init__(self, tilemap, z):
+        """
 
-    Args:
-        bad_tile_id (int): the tile id referenced which
-            does not actually exist in a Tilesheet.
+        Args:
+            tilemap (TileMap): --
+            z (int): layer index in tilemap.
+
+        """
+
+        self.tilemap = tilemap
+        self.z = z
+
+    def get_rect(self):
+        """Mimics pygame.Surface.get_rect().
+
+        Returns:
+            pygame.Rect: the full pixel area of the layer.
+
+        Examples:
+          >>> tiles = [[[0, 0, 0], [0, 0, 0]]]
+          >>> TileMap('debug', tiles).layer_images[0].get_rect()
+          <rect(0, 0, 30, 20)>
+
+        """
+
+        width_tiles, height_tiles = self.tilemap.dimensions_in_tiles[:2]
+        tile_width, tile_height = self.tilemap.tilesheet.tile_size
+
+        return pygame.Rect(0, 0,
+                           width_tiles * tile_width,
+                           height_tiles * tile_height)
+
+    def chunks_in_rect(self, rect):
+        """Yield the chunks which intersect rect, baking the
+        ones which are not in the TileMap's ChunkCache yet.
+
+        Args:
+            rect (pygame.Rect): pixel area of the layer, e.g.,
+                the viewport rect.
+
+        Yields:
+            tuple: (pygame.Surface chunk, (x, y) absolute pixel
+                position of the chunk's top left corner).
+
+        """
+
+        tilemap = self.tilemap
+        tile_width, tile_height = tilemap.tilesheet.tile_size
+        chunk_width = tilemap.CHUNK_SIZE * tile_width
+        chunk_height = tilemap.CHUNK_SIZE * tile_height
+
+        for chunk_x, chunk_y in tilemap.chunk_coords_in_rect(rect):
+            key = (self.z, chunk_x, chunk_y)
+            chunk = tilemap.chunk_cache.get(key)
+
+            if chunk is None:
+                chunk = tilemap.bake_chunk(*key)
+                tilemap.chunk_cache.add(key, chunk)
+
+            yield chunk, (chunk_x * chunk_width, chunk_y * chunk_height)
+
+
+class ChunkCache(object):
+    """Least recently used store for baked layer chunks.
 
     Attributes:
-        bad_tile_id (int): the tile ID referenced
-            which does not exist.
+        max_chunks (int): once exceeded, the least recently used
+            chunk is evicted (and baked again when next needed).
+
+    Example:
+        >>> cache = ChunkCache(2)
+        >>> cache.add((0, 0, 0), 'a')
+        >>> cache.add((0, 1, 0), 'b')
+        >>> cache.get((0, 0, 0))
+        'a'
+        >>> cache.add((0, 2, 0), 'c')
+        >>> cache.get((0, 1, 0)) is None
+        True
+        >>> len(cache)
+        2
 
     """
 
-    def __init__(self, bad_tile_id):
-        message = ('no tile by id #%d' % bad_tile_id)
-        super(BadTileID, self).__init__(message)
-        self.bad_tile_id = bad_tile_id
+    def __init__(self, max_chunks):
+        """
 
+        Args:
+            max_chunks (int): how many chunks may be stored.
 
-class TileMap(object):
-    """Layers created from graphical tiles specified in a tilesheet.
+        """
 
-    Note:
-      Makes map-specific data accessible.
+        self.max_chunks = max_chunks
+        self._chunks = collections.OrderedDict()
+
+    def __len__(self):
+
+        return len(self._chunks)
+
+    def __contains__(self, key):
+
+        return key in self._chunks
+
+    def get(self, key):
+        """Return the chunk stored as key, marking it as the most
+        recently used, or None if it is not stored.
+
+        Args:
+            key (tuple): (z, chunk_x, chunk_y)
+
+        """
+
+        try:
+            chunk = self._chunks.pop(key)
+        except KeyError:
+
+            return None
+
+        self._chunks[key] = chunk
+
+        return chunk
+
+    def add(self, key, chunk):
+        """Store chunk as key, evicting the least
+        recently used chunks if over capacity.
+
+        Args:
+            key (tuple): (z, chunk_x, chunk_y)
+            chunk (pygame.Surface): --
+
+        """
+
+        self._chunks.pop(key, None)
+        self._chunks[key] = chunk
+
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+
+    def peek(self, key):
+        """Like get(), without marking the chunk as the most
+        recently used.
+
+        Args:
+            key (tuple): (z, chunk_x, chunk_y)
+
+        """
+
+        return self._chunks.get(key)
+
+    def discard(self, key):
+        """Forget the chunk stored as key, if any.
+
+        Args:
+            key (tuple): (z, chunk_x, chunk_y)
+
+        """
+
+        self._chunks.pop(key, None)
+
+    def clear(self):
+        """Forget every chunk."""
+
+        self._chunks.clear()
+
+
+class FlagRegistry(object):
+    """Numbers the tile flag names of a map, so that the flags of
+    a cell are stored as one integer: flag number n is bit 1 << n.
+
+    Constants:
+        TYPECODES (tuple): array typecodes for bitmasks, smallest
+            first, see typecode().
 
     Attributes:
-      tilesheet:
-      dimensions_in_tiles:
-      layer_images:
-      flags:
-      impassability:
-      animated_tiles:
+        names (list[str]): flag names, by number.
+
+    Example:
+        >>> registry = FlagRegistry()
+        >>> registry.bits(['impass_all', 'water'])
+        3
+        >>> sorted(registry.flags(2))
+        ['water']
 
     """
 
-    def __init__(self, tilesheet_name, tile_ids):
-        """Stitch tiles from swatch to layer surfaces.
+    TYPECODES = ('B', 'H', 'L', 'Q')
 
-        Piece together layers/surfaces from corresponding tile graphic
-        names, using the specified tile swatch. Keep track of
-        metadata, including passability.
+    def __init__(self):
+        self.names = []
+
+        # flag name -> bit
+        self._bits = {}
+
+        # bitmask -> frozenset of flag names
+        self._flags = {0: Tile.NO_FLAGS}
+
+    def bit(self, name):
+        """Return the bit of a flag name, numbering it if it is
+        new.
 
         Args:
-          tilesheet_name (str): directory name of the swatch to use
-          tile_ids (list): 3d list where list[layer][row][tile]
+            name (str): --
 
-        Examples:
-          Make a 2x2x1 tilemap:
-          >>> tiles = [[[0, 0], [0, 0]]]
-          >>> tilemap = TileMap('debug', tiles)
+        Returns:
+            int: --
 
         """
 
-        # create the layer images and tile properties
-        tilesheet = Tilesheet.from_resources(tilesheet_name)
-        first_layer = tile_ids[0]
+        try:
 
-        width_tiles = len(first_layer[0])
-        height_tiles = len(first_layer)
-        depth_tiles = len(tile_ids)
-        dimensions_in_tiles = (width_tiles, height_tiles, depth_tiles)
+            return self._bits[name]
 
-        tile_size = tilesheet.tiles[0].size
-        tile_width, tile_height = tile_size
-        layer_width = len(first_layer[0]) * tile_width
-        layer_height = len(first_layer) * tile_height
-        layer_size = (layer_width, layer_height)
+        except KeyError:
+            bit = 1 << len(self.names)
+            self.names.append(name)
+            self._bits[name] = bit
 
-        tiles = []
-        layer_images = []
-        impassable_rects = []
-        animated_tile_stack = {i: set() for i in range(depth_tiles)}
+            return bit
 
-        for z, layer in enumerate(tile_ids):
-            new_layer = pygame.Surface(layer_size, pygame.SRCALPHA, 32)
-            new_layer.fill([0, 0, 0, 0])
+    def bits(self, flags):
+        """Return the bitmask of flags.
+
+        Args:
+            flags (iter): flag names, e.g., Tile.flags.
 
-            for y, row_of_tile_ids in enumerate(layer):
+        Returns:
+            int: --
 
-                for x, tile_id in enumerate(row_of_tile_ids):
-                    # is this right...?
-                    tile_index = (((z - 1) * height_tiles * width_tiles) +
-                                  (y * width_tiles) + x)
-                    tile = tilesheet[tile_id]
+        """
 
-                    # if not on first layer, merge flags down to first
-                    if z:
-                        tile_index = (y * width_tiles) + x
-                        tiles[tile_index].flags.update(tile.flags)
-                    else:
-                        tiles.append(tile)
+        bits = 0
 
-                    # -1 is air/nothing
-                    if tile.tilesheet_id == -1:
+        for name in flags:
+            bits |= self.bit(name)
 
-                        continue
+        return bits
 
-                    # blit tile subsurface onto respective layer
-                    tile_position = (x * tile_width, y * tile_height)
-                    new_layer.blit(tile.subsurface, tile_position)
+    def flags(self, bits):
+        """Return the flag names of a bitmask.
 
-                    # is this tile an animation?
-                    if tile.tilesheet_id in tilesheet.animated_tiles:
-                        animated_tile = (tilesheet.
-                                         animated_tiles[tile.tilesheet_id])
-                        animation_info = (animated_tile, tile_position)
-                        animated_tile_stack[z].add(animation_info)
+        Args:
+            bits (int): --
 
-                    # finally passability!
-                    if 'impass_all' in tile.flags:
-                        impassable_rects.append(pygame.Rect(tile_position,
-                                                            tile_size))
+        Returns:
+            frozenset: the same one for the same bits.
 
-            layer_images.append(new_layer)
+        """
 
-        self.tilesheet = tilesheet
-        self.layer_images = layer_images
-        self.tiles = tiles
-        self.impassable_rects = impassable_rects
-        self.animated_tile_stack = animated_tile_stack
-        self.dimensions_in_tiles = dimensions_in_tiles
+        try:
 
-        # the 3D list of Tilesheet tile IDs
-        # which constructed this TileMap. It
-        # is not updated when self.tiles is.
-        self._tile_ids = tile_ids
+            return self._flags[bits]
 
-    def __getitem__(self, coord):
-        """Fetch TileInfo by tile coordinate.
+        except KeyError:
+            flags = frozenset(name for i, name in enumerate(self.names)
+                              if bits & (1 << i))
+            self._flags[bits] = flags
 
-        Args:
-          coord (tuple): (x, y) coordinate; z always just
-            z-index (it's not a pixel value)
+            return flags
+
+    def typecode(self):
+        """Return the typecode of the smallest array.array which
+        holds bitmasks of every flag numbered so far.
 
         Returns:
-          TileProperties
+            str: --
 
-        Examples:
-          >>> tiles = [[[0, 0], [0, 0]]]
-          >>> tilemap = TileMap('debug', tiles)
-          >>> 'impass_all' in tilemap[(1, 1)].flags
-          True
+        Raises:
+            ValueError: There are more flags than bits in the
+                largest typecode.
+
+        """
+
+        for typecode in self.TYPECODES:
+
+            if array.array(typecode).itemsize * 8 >= len(self.names):
+
+                return typecode
+
+        raise ValueError('too many tile flags: %d' % len(self.names))
+
+
+class PassabilityGrid(object):
+    """Compact passability of every cell of a map: one byte per
+    cell in a bytearray, one bit per passability flag.
+
+    Checking an area is done by slicing rows out of the bytearray,
+    so no pygame.Rect objects are involved, and memory is a single
+    byte per cell regardless of how many tiles are impassable.
+
+    Constants:
+        FLAGS (tuple): tile flag names which affect passability.
+            The flag at index n is stored as bit 1 << n.
+        IMPASS_ALL (int): bit for the "impass_all" flag.
+
+    Attributes:
+        width (int): width of the map in cells.
+        height (int): height of the map in cells.
+        cell_size (tuple): (x, y) pixel dimensions of a cell.
+        cells (bytearray): width * height bytes, row by row.
+
+    Example:
+        >>> grid = PassabilityGrid(3, 2, (10, 10))
+        >>> grid.add_flags(1, 1, set(['impass_all']))
+        >>> grid[(1, 1)] == PassabilityGrid.IMPASS_ALL
+        True
+        >>> grid.blocked(0, 0, 10, 10)
+        False
+        >>> grid.blocked(5, 5, 15, 15)
+        True
+
+    """
+
+    FLAGS = ('impass_all',)
+    IMPASS_ALL = 1 << FLAGS.index('impass_all')
+
+    # mask -> bytes.translate() table which zeroes the other bits
+    _translation_tables = {}
+
+    def __init__(self, width, height, cell_size):
+        """
+
+        Args:
+            width (int): width of the map in cells.
+            height (int): height of the map in cells.
+            cell_size (tuple): (x, y) pixel dimensions of a cell.
 
         """
 
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.cells = bytearray(width * height)
+
+    def __getitem__(self, coord):
+        """The flag bits of the cell at (x, y), in cells."""
+
         x, y = coord
-        width_in_tiles = self.dimensions_in_tiles[0]
 
-        return self.tiles[coord_to_index(width_in_tiles, x, y)]
+        return self.cells[coord_to_index(self.width, x, y)]
 
-    def get_info(self, coord):
-        """Fetch TileProperties by pixel coordinate.
+    @classmethod
+    def flags_to_bits(cls, flags):
+        """Return the bits representing the passability flags
+        in flags; other flags are ignored.
 
         Args:
-          coord (tuple): (int x, int y) coordinate;  units in pixels.
-            Coord only has to be in the area of tile.
+            flags (iter): flag names, e.g., Tile.flags.
 
         Returns:
-          TileInfo
-
-        Examples:
-          Let's assume 10x10 tiles...
-          >>> tiles = [[[0, 10], [-1, 4]]]
-          >>> tilemap = TileMap('debug', tiles)
-          >>> 'impass_all' in tilemap.get_info((12, 12)).flags
-          True
+            int: --
 
         """
 
-        tile_width, tile_height = self.tilesheet.tile_size
-        pixel_x, pixel_y = coord
-        tile_x = pixel_x // tile_width
-        tile_y = pixel_y // tile_height
+        bits = 0
 
-        return self[(tile_x, tile_y)]
+        for flag in flags:
 
-    def blit_layer_animated_tiles(self, viewport, layer):
-        """Blit all of the animated tiles from a
-        designated layer to the supplied viewport.
+            if flag in cls.FLAGS:
+                bits |= 1 << cls.FLAGS.index(flag)
+
+        return bits
+
+    def add_flags(self, x, y, flags):
+        """Merge the passability flags from flags into
+        the cell at (x, y), in cells.
 
         Args:
-            viewport (render.Viewport): --
-            layer (int): The nth layer of animated tiles
-                which to blit to viewport.
+            x (int): --
+            y (int): --
+            flags (iter): flag names, e.g., Tile.flags.
 
         """
 
-        # i have to start using sprite groups for this
-        for tile_anim, position in self.animated_tile_stack[layer]:
-            viewport.surface.blit(tile_anim.image,
-                                  viewport.relative_position(position))
+        index = coord_to_index(self.width, x, y)
+        self.cells[index] |= self.flags_to_bits(flags)
 
-    def runtime_setup(self):
-        """This is for game.py. These need to be launched after pygame
-        has started.
+    def set_cells(self, cell_flags, flag_registry):
+        """Replace the passability of every cell with that of
+        bitmasks of flags.
+
+        Args:
+            cell_flags (array.array): a bitmask of flags per cell,
+                row by row, as in TileMap.cell_flags.
+            flag_registry (FlagRegistry): what the bits of
+                cell_flags stand for.
 
         """
 
-        layer_images = self.layer_images
+        # bitmask of flags -> passability bits
+        passability_bits = {bits: self.flags_to_bits(flag_registry.
+                                                     flags(bits))
+                            for bits in set(cell_flags)}
+        self.cells = bytearray(map(passability_bits.__getitem__,
+                                   cell_flags))
 
-        for image in layer_images:
-            image.convert()
-            image.convert_alpha()
+    def set_flags(self, x, y, flags):
+        """Replace the passability of the cell at (x, y), in
+        cells, with that of flags.
 
-        for i, tile_animation in self.tilesheet.animated_tiles.items():
-            tile_animation.convert_alpha()
+        Args:
+            x (int): --
+            y (int): --
+            flags (iter): flag names, e.g., Tile.flags.
 
-        return None
+        """
 
-    def to_string(self, separator=' '):
-        """Create the user-unfriendly string for the tilemap.
+        index = coord_to_index(self.width, x, y)
+        self.cells[index] = self.flags_to_bits(flags)
 
-        Used for creating tilemap.txt.
+    def blocked(self, left, top, right, bottom, mask=IMPASS_ALL):
+        """Check whether any cell which overlaps the pixel area
+        has any of the bits in mask set.
+
+        The area outside of the map is not blocked.
 
         Args:
-          separator (str): can be ''
+            left (int): --
+            top (int): --
+            right (int): exclusive, like pygame.Rect.right.
+            bottom (int): exclusive, like pygame.Rect.bottom.
+            mask (int): bits to look for.
 
         Returns:
-            str: --
+            bool: --
 
         """
 
-        output_string = ''
+        if right <= left or bottom <= top:
 
-        # create map layers
-        layers = []
-        max_digits = len(str(len(self.tilesheet.tiles))) - 1
-        id_format = '%0' + str(max_digits) + 'd'
+            return False
 
-        for layer in self._tile_ids:
-            layer_lines = []
+        cell_width, cell_height = self.cell_size
+        first_x = max(left // cell_width, 0)
+        last_x = min((right - 1) // cell_width, self.width - 1)
+        first_y = max(top // cell_height, 0)
+        last_y = min((bottom - 1) // cell_height, self.height - 1)
 
-            for row in layer:
-                row_string = separator.join([id_format % i for i in row])
+        if first_x > last_x or first_y > last_y:
 
-                layer_lines.append(row_string)
+            return False
 
-            layer_string = '\n'.join(layer_lines)
-            layers.append(layer_string)
+        try:
+            table = self._translation_tables[mask]
+        except KeyError:
+            table = bytes(bytearray(i & mask for i in range(256)))
+            self._translation_tables[mask] = table
 
-        layers_string = '\n\n'.join(layers)
-        output_string += layers_string
+        cells = self.cells
+        width = self.width
 
-        return self.tilesheet.name + '\n' + output_string
+        for y in range(first_y, last_y + 1):
+            row_start = y * width
+            row = cells[row_start + first_x:row_start + last_x + 1]
 
-    @classmethod
-    def from_string(cls, map_string, separator=' '):
-        """This is a debug feature. Create a 3D list of tile names using
-        ASCII symbols. Supports layers.
+            if row.translate(table).strip(b'\x00'):
 
-        Used for reading tilemap.txt.
+                return True
 
-        Returns:
-            TileMap: --
+        return False
 
-        """
+    def rects(self, mask):
+        """Yield a pygame.Rect for each cell with any
+        of the bits in mask set.
 
-        # GET TILESHEET NAME FROM THE FIRST LINE, REMOVE FIRST LINE
-        tilesheet_name, layers_string = map_string.split('\n', 1)
+        Args:
+            mask (int): --
 
-        # NOTE: I'm using strip('\n') because I can't seem to make
-        # the \n at the end of map-string.txt to go away.
-        # watch the quirky wording; layers_string >> layer_strings
-        layer_strings = layers_string.strip('\n').split('\n\n')
+        """
 
-        # transform our characters into a 3D list of tile graphic names
-        layers = []
+        cell_width, cell_height = self.cell_size
 
-        for layer_string in layer_strings:
-            layer = [[int(tile_id) for tile_id in row.split(separator)]
-                     for row in layer_string.split('\n')]
-            layers.append(layer)
+        for i, bits in enumerate(self.cells):
 
-        return TileMap(tilesheet_name, layers)
+            if bits & mask:
+                x, y = index_to_coord(self.width, i)
+
+                yield pygame.Rect(x * cell_width, y * cell_height,
+                                  cell_width, cell_height)
 
 
 class Tilesheet(object):
@@ -310,25 +1696,32 @@ class Tilesheet(object):
     Attributes:
         name (str): --
         surface (pygame.Surface): --
-        tiles (iter): --
+        tiles (list): the Tile of every tile ID, or None for those
+            which have not been created yet, see __getitem__().
         tile_size (tuple): (x, y) pixel dimensions of the tiles which
             comprise the Tilesheet surface.
+        flags (dict): tile_id -> frozenset of flag names, for the
+            tiles which have flags.
         animated_tiles (dict): tile_id -> pyganimation
         animated_tiles_group (pygame.sprite.Group): --
 
     """
 
-    def __init__(self, name, surface, tiles, tile_size, animated_tiles=None):
+    def __init__(self, name, surface, tiles, tile_size, animated_tiles=None,
+                 flags=None):
         """
 
         Args:
           name (str): --
           surface (pygame.Surface): --
-          tiles (iter): --
+          tiles (list): Tile or None for every tile ID; the tiles
+            which are None are created when first accessed.
           tile_size (tuple): (x, y) pixel dimensions of the tiles which
             comprise the Tilesheet surface.
           animated_tiles (dict): tile_id -> AnimatedSprite:
             {0: AnimatedSprite(...), 1: AnimatedSprite(...), ...}.
+          flags (dict): tile_id -> flag names, used for the tiles
+            created when first accessed.
 
         """
 
@@ -336,20 +1729,53 @@ class Tilesheet(object):
         self.surface = surface
         self.tiles = tiles
         self.tile_size = tile_size
-        self.animated_tiles = animated_tiles
+        self.flags = flags or {}
+        self.animated_tiles = animated_tiles or {}
         self.animated_tiles_group = (pygame.sprite.
-                                     Group(*animated_tiles.values()))
+                                     Group(*self.animated_tiles.values()))
+
+    def pack(self, atlas):
+        """Pack the frames of the animated tiles into atlas.
+
+        Frames which are tiles of this Tilesheet are left alone,
+        since they already share the tilesheet's surface.
+
+        Args:
+            atlas (atlas.TextureAtlas): --
+
+        """
+
+        for tile_id, tile_animation in self.animated_tiles.items():
+            name = 'tilesheets/%s/%d' % (self.name, tile_id)
+            atlas.add_animation(tile_animation, name)
 
     def __getitem__(self, tile_id):
+        """Return the Tile of tile_id, creating it if it is the
+        first time it is accessed.
 
-        try:
+        Negative tile IDs count from the end, as with lists.
+
+        Raises:
+          BadTileID: There is no such tile on this Tilesheet.
 
-            return self.tiles[tile_id]
+        """
 
+        try:
+            tile = self.tiles[tile_id]
         except IndexError:
 
             raise BadTileID(tile_id)
 
+        if tile is None:
+            tile_id %= len(self.tiles)
+            tile = Tile(tilesheet_id=tile_id,
+                        tilesheet_surface=self.surface,
+                        tile_size=self.tile_size,
+                        flags=self.flags.get(tile_id, None))
+            self.tiles[tile_id] = tile
+
+        return tile
+
     @classmethod
     def from_resources(cls, tilesheet_name):
         """Create a Tilesheet from a name, corresponding to a path
@@ -365,17 +1791,20 @@ class Tilesheet(object):
 
         """
 
-        # path to the zip containing tilesheet.png and tilesheet.ini
-        resource = resources.Resource('tilesheets', tilesheet_name)
-        zip_path = os.path.join('resources',
-                                'tilesheets',
-                                tilesheet_name + '.zip')
-
-        tilesheet_surface = pygame.image.load(resource['tilesheet.png'])
+        # the zip containing tilesheet.png and tilesheet.ini, which
+        # may have been decoded already, see resources.preload()
+        resource = resources.cache.get('tilesheets', tilesheet_name)
+        tilesheet_surface = resource.surface('tilesheet.png')
         config = resource['tilesheet.ini']
 
-        # build the meta
-        flags = {int(k): set(v.split(',')) for k, v in config.items('flags')}
+        # build the meta; tiles with the same flags share one frozenset
+        flags = {}
+        flag_sets = {}
+
+        for tile_id, flag_names in config.items('flags'):
+            tile_flags = frozenset(flag_names.split(','))
+            flags[int(tile_id)] = flag_sets.setdefault(tile_flags, tile_flags)
+
         tile_width = config.getint('meta', 'tile_width')
         tile_height = config.getint('meta', 'tile_height')
         tile_size = (tile_width, tile_height)
@@ -384,15 +1813,11 @@ class Tilesheet(object):
         tilesheet_height_in_tiles = tilesheet_height // tile_height
         total_tiles = tilesheet_width_in_tiles * tilesheet_height_in_tiles
 
-        # tile initialization; buid all the tiles
-        tiles = []
-
-        for tilesheet_id in range(total_tiles):
-            tile = Tile(tilesheet_id=tilesheet_id,
-                        tilesheet_surface=tilesheet_surface,
-                        tile_size=tile_size,
-                        flags=flags.get(tilesheet_id, None))
-            tiles.append(tile)
+        # tiles are only created once accessed, most maps only
+        # use a fraction of a tilesheet
+        tiles = [None] * total_tiles
+        tilesheet = Tilesheet(tilesheet_name, tilesheet_surface, tiles,
+                              tile_size, flags=flags)
 
         # for effects and animations
         animated_tiles = {}
@@ -409,7 +1834,7 @@ class Tilesheet(object):
                 frame_duration, next_tile_id = animation_string.split(',')
                 frame_duration = int(frame_duration)  # frame dur is in MS
                 next_tile_id = int(next_tile_id)
-                frame_buffer.append((tiles[tile_id].subsurface,
+                frame_buffer.append((tilesheet[tile_id].subsurface,
                                      frame_duration))
 
                 # NOTE: outdated needs to use new anim sys
@@ -429,21 +1854,41 @@ class Tilesheet(object):
 
             for tile_id, effect in config.items('animate_effect'):
                 tile_id = int(tile_id)
-                corresponding_tile = tiles[tile_id].subsurface
+                corresponding_tile = tilesheet[tile_id].subsurface
                 animated_tiles[tile_id] = effects[effect](corresponding_tile)
 
-        return Tilesheet(tilesheet_name, tilesheet_surface,
-                         tiles, tile_size, animated_tiles)
+        tilesheet.animated_tiles = animated_tiles
+        tilesheet.animated_tiles_group = (pygame.sprite.
+                                          Group(*animated_tiles.values()))
+
+        return tilesheet
 
 
 class Tile(object):
     """A graphical map tile, referencing a rectangular area on a
     tilesheet (reference surface), with meta data.
 
+    Tiles are immutable and shared: every cell of every TileMap
+    which uses a tile ID of a Tilesheet uses the same Tile.
+
+    Constants:
+      NO_FLAGS (frozenset): the flags of every tile without flags.
+
     Attributes:
+      area_on_tilesheet (pygame.Rect): --
+      subsurface (pygame.Surface): area_on_tilesheet of the
+        tilesheet surface.
+      flags (frozenset): names of the flags, e.g., "impass_all."
+      tilesheet_id (int): -1 for the empty Tile.
+      size (tuple): --
 
     """
 
+    NO_FLAGS = frozenset()
+
+    __slots__ = ('area_on_tilesheet', 'subsurface', 'flags',
+                 'tilesheet_id', 'size')
+
     def __init__(self, tilesheet_id, tilesheet_surface, tile_size, flags=None):
         """create subsurface of tilesheet surface using topleft
         position on tilesheet.
@@ -460,7 +1905,7 @@ class Tile(object):
 
         """
 
-        tilesheet_width_in_tiles = (tilesheet_surface.get_size()[0] /
+        tilesheet_width_in_tiles = (tilesheet_surface.get_size()[0] //
                                     tile_size[0])
         top_left_in_tiles = index_to_coord(tilesheet_width_in_tiles,
                                            tilesheet_id)
@@ -469,10 +1914,55 @@ class Tile(object):
         position_rect = pygame.Rect(subsurface_top_left, tile_size)
         self.area_on_tilesheet = position_rect
         self.subsurface = tilesheet_surface.subsurface(position_rect)
-        self.flags = flags or set()
+        self.flags = frozenset(flags) if flags else self.NO_FLAGS
         self.tilesheet_id = tilesheet_id
         self.size = tile_size
 
+    @classmethod
+    def empty(cls, tile_size):
+        """Return a Tile of nothing, that of global tile ID 0: it
+        has no tilesheet and no flags, and draws nothing (its
+        subsurface and area_on_tilesheet are None).
+
+        Args:
+          tile_size (tuple): --
+
+        Returns:
+          Tile: --
+
+        Examples:
+          >>> tile = Tile.empty((10, 10))
+          >>> tile.tilesheet_id, tile.subsurface, tile.flags
+          (-1, None, frozenset())
+
+        """
+
+        tile = cls.__new__(cls)
+        tile.area_on_tilesheet = None
+        tile.subsurface = None
+        tile.flags = cls.NO_FLAGS
+        tile.tilesheet_id = -1
+        tile.size = tile_size
+
+        return tile
+
+    def with_flags(self, flags):
+        """Return a copy of this Tile, with other flags. The copy
+        shares the subsurface of this Tile.
+
+        Args:
+          flags (iter): names of the flags of the copy.
+
+        Returns:
+          Tile: --
+
+        """
+
+        tile = copy.copy(self)
+        tile.flags = frozenset(flags) if flags else self.NO_FLAGS
+
+        return tile
+
 
 def coord_to_index(width, x, y):
     """Return the 1D index which corresponds to 2D position (x, y).
@@ -14,13 +14,313 @@ Example:
 """
 
 import os
+import timeit
 
 import pygame
 import pytest
 
 from hypatia import render
+from hypatia import tiles
+from hypatia import sprites
+from hypatia import animatedsprite
 
 try:
     os.chdir('demo')
 except OSError:
     pass
+
+
+def test_walkabout_dirty_rects():
+    """Test that Walkabout reports the areas it changed, for
+    dirty rect rendering.
+
+    """
+
+    walkabout = sprites.Walkabout('debug', position=(10, 20))
+    walkabout.image = walkabout.current_animation().image
+    size = walkabout.image.get_size()
+
+    # the first time, only the area now covered is reported
+    assert walkabout.dirty_rects() == [pygame.Rect((10, 20), size)]
+
+    # nothing changed, nothing to report
+    assert walkabout.dirty_rects() == []
+
+    # moving reports both the new and the old area
+    walkabout.topleft_float = (15.0, 20.0)
+    assert walkabout.dirty_rects() == [pygame.Rect((15, 20), size),
+                                       pygame.Rect((10, 20), size)]
+    assert walkabout.dirty_rects() == []
+
+
+def test_palette_cycle():
+    """Test that palette_cycle() cycles through the colors of a
+    surface, and that the NumPy implementation produces the same
+    frames as the pixel by pixel one.
+
+    """
+
+    pytest.importorskip('numpy')
+
+    # column by column: red, green, then blue
+    surface = pygame.Surface((2, 2), pygame.SRCALPHA, 32)
+    surface.fill((255, 0, 0, 255))
+    surface.set_at((1, 0), (0, 255, 0, 128))
+    surface.set_at((1, 1), (0, 0, 255, 255))
+
+    animation = sprites.palette_cycle(surface)
+    assert len(animation.frames) == 3
+
+    # each pixel takes on the previous color in the list
+    first_frame = animation.frames[0].surface
+    assert tuple(first_frame.get_at((0, 0))) == (0, 0, 255, 255)
+    assert tuple(first_frame.get_at((1, 0))) == (255, 0, 0, 255)
+    assert tuple(first_frame.get_at((1, 1))) == (0, 255, 0, 128)
+
+    # the last frame is the original surface
+    last_frame = animation.frames[-1].surface
+    assert (pygame.image.tostring(last_frame, 'RGBA') ==
+            pygame.image.tostring(surface, 'RGBA'))
+
+    tilesheet = tiles.Tilesheet.from_resources('debug')
+
+    for test_surface in (surface, tilesheet[21].subsurface):
+        surfarray_frames = sprites.palette_cycle_surfaces_surfarray(
+            test_surface)
+        get_at_frames = sprites.palette_cycle_surfaces_get_at(test_surface)
+        assert len(surfarray_frames) == len(get_at_frames)
+
+        for surfarray_frame, get_at_frame in zip(surfarray_frames,
+                                                 get_at_frames):
+            assert (pygame.image.tostring(surfarray_frame, 'RGBA') ==
+                    pygame.image.tostring(get_at_frame, 'RGBA'))
+
+
+def test_palette_cycle_palette_mode(monkeypatch):
+    """Test that palette_cycle() of an opaque surface is a palette
+    animation: one 8-bit surface, a palette per frame, and the same
+    images as cycling the colors of RGBA copies.
+
+    """
+
+    surface = pygame.Surface((3, 2), 0, 32)
+    surface.fill((255, 0, 0))
+    surface.set_at((0, 1), (0, 255, 0))
+    surface.set_at((2, 0), (0, 0, 255))
+
+    animation = sprites.palette_cycle(surface)
+    assert len(animation.frames) == 3
+    indexed_surface = animation.frames[0].surface
+    assert indexed_surface.get_bitsize() == 8
+    assert all(frame.surface is indexed_surface
+               for frame in animation.frames)
+
+    # the pure Python fallback finds the same colors and indexes
+    expected_colors_and_indexes = sprites.palette_cycle_color_indexes(surface)
+    monkeypatch.setattr(sprites, 'numpy', None)
+    assert (sprites.palette_cycle_color_indexes(surface) ==
+            expected_colors_and_indexes)
+
+    for frame, rgba_surface in zip(
+            animation.frames,
+            sprites.palette_cycle_surfaces_get_at(surface)):
+        frame.surface.set_palette(frame.palette)
+        assert (pygame.image.tostring(frame.surface, 'RGB') ==
+                pygame.image.tostring(rgba_surface, 'RGB'))
+
+    # advancing a frame swaps in the frame's palette
+    class Clock(object):
+
+        def get_time(self):
+
+            return 250
+
+    animation.update(Clock(), (0, 0), None)
+    assert animation.frame_changed
+    assert animation.image is indexed_surface
+    assert animation.active_frame_index == 1
+    assert (tuple(indexed_surface.get_at((0, 0)))[:3] ==
+            tuple(animation.active_frame.palette[0]))
+
+
+def test_animation_clock():
+    """Test that AnimationClock advances each AnimatedSprite once
+    per tick, and only reports those whose frame changed.
+
+    """
+
+    surface = pygame.Surface((1, 1))
+    surface_duration_list = [(surface, 100), (surface, 50), (surface, 100)]
+    animation = (animatedsprite.AnimatedSprite.
+                 from_surface_duration_list(surface_duration_list))
+    other_animation = (animatedsprite.AnimatedSprite.
+                       from_surface_duration_list([(surface, 1000),
+                                                   (surface, 1000)]))
+
+    animation_clock = animatedsprite.AnimationClock()
+    animation_clock.add(animation)
+    animation_clock.add(other_animation)
+    assert len(animation_clock) == 2
+
+    assert animation_clock.tick(99) == []
+    assert animation.active_frame_index == 0
+    assert animation_clock.tick(1) == [animation]
+    assert animation.active_frame_index == 1
+    assert animation.frame_changed
+
+    # frame_changed only lasts until the next tick
+    assert animation_clock.tick(10) == []
+    assert not animation.frame_changed
+
+    # long ticks may skip frames and wrap around (260 % 250 = 10)
+    assert animation_clock.tick(150) == [animation]
+    assert animation.animation_position == 10
+    assert animation.active_frame_index == 0
+
+    # a sprite driven by a clock ignores update()
+    class Clock(object):
+
+        def get_time(self):
+
+            return 100
+
+    animation.update(Clock(), (0, 0), None)
+    assert animation.animation_position == 10
+
+    # other_animation changes at 1000 (1100 % 250 = 100)
+    assert animation_clock.tick(840) == [animation, other_animation]
+
+    animation_clock.remove(animation)
+    assert animation not in animation_clock
+    assert animation.animation_clock is None
+    assert animation_clock.tick(1000) == [other_animation]
+    assert animation.animation_position == 100
+
+
+def test_frame_index_at():
+    """Test that a frame is displayed from its start time up to,
+    but not including, its end time, whether the frames all last
+    as long or not.
+
+    """
+
+    surface = pygame.Surface((1, 1))
+
+    for durations in ([100, 50, 0, 100], [40, 40, 40], [70]):
+        surface_duration_list = [(surface, duration)
+                                 for duration in durations]
+        animation = (animatedsprite.AnimatedSprite.
+                     from_surface_duration_list(surface_duration_list))
+
+        for position in range(animation.total_duration):
+            expected_index = [i for i, frame in enumerate(animation.frames)
+                              if frame.start_time <= position <
+                              frame.end_time][0]
+            assert animation.frame_index_at(position) == expected_index
+
+
+def test_animated_sprite_update():
+    """Test that AnimatedSprite.update() displays the frame at the
+    animation position, including after long delays.
+
+    """
+
+    class Clock(object):
+
+        def __init__(self, time):
+            self.time = time
+
+        def get_time(self):
+
+            return self.time
+
+    surfaces = [pygame.Surface((i, i)) for i in range(1, 4)]
+    surface_duration_list = list(zip(surfaces, [100, 50, 100]))
+    animation = (animatedsprite.AnimatedSprite.
+                 from_surface_duration_list(surface_duration_list))
+    assert animation.image is surfaces[0]
+
+    animation.update(Clock(99), (0, 0), None)
+    assert animation.active_frame_index == 0
+    assert animation.image is surfaces[0]
+    assert not animation.frame_changed
+
+    animation.update(Clock(1), (0, 0), None)
+    assert animation.active_frame_index == 1
+    assert animation.image is surfaces[1]
+    assert animation.active_frame is animation.frames[1]
+    assert animation.rect.size == (2, 2)
+    assert animation.frame_changed
+
+    animation.update(Clock(50), (0, 0), None)
+    assert animation.image is surfaces[2]
+
+    # 150 + 250 * 40 + 110 wraps around to 10
+    animation.update(Clock(250 * 40 + 110), (0, 0), None)
+    assert animation.animation_position == 10
+    assert animation.image is surfaces[0]
+
+
+def test_animation_clip_and_cursor():
+    """Test that copies of an AnimatedSprite share one immutable
+    AnimationClip, each with an AnimationCursor of its own.
+
+    """
+
+    surfaces = [pygame.Surface((1, 1)), pygame.Surface((2, 2))]
+    animation = (animatedsprite.AnimatedSprite.
+                 from_surface_duration_list(list(zip(surfaces, [100, 50]))))
+    copy = animation.copy()
+    assert copy.clip is animation.clip
+    assert copy.cursor is not animation.cursor
+
+    with pytest.raises(AttributeError):
+        animation.clip.total_duration = 0
+
+    # cursors have no room for anything but playback state
+    with pytest.raises(AttributeError):
+        animation.cursor.image = surfaces[0]
+
+    copy.seek(120)
+    assert copy.image is surfaces[1]
+    assert copy.active_frame is animation.clip[1]
+    assert animation.animation_position == 0
+    assert animation.image is surfaces[0]
+
+
+@pytest.mark.skipif(not os.environ.get('HYPATIA_BENCHMARK'),
+                    reason='set HYPATIA_BENCHMARK=1 to run benchmarks')
+def test_palette_cycle_benchmark():
+    """Time the three ways palette_cycle() builds its frames: the
+    8-bit palette animation, NumPy (surfarray) and the original
+    get_at()/set_at() per pixel, which is the fallback.
+
+    Run with:
+
+      $ HYPATIA_BENCHMARK=1 py.test tests -k benchmark -s
+
+    """
+
+    pytest.importorskip('numpy')
+
+    # an opaque 64x64 surface of 16 colors in stripes
+    surface = pygame.Surface((64, 64), 0, 32)
+
+    for x in range(64):
+        pygame.draw.line(surface, (x // 4 * 16, 255 - x // 4 * 16, 128),
+                         (x, 0), (x, 63))
+
+    implementations = (
+        ('palette', sprites.palette_cycle),
+        ('surfarray', sprites.palette_cycle_surfaces_surfarray),
+        ('get_at', sprites.palette_cycle_surfaces_get_at),
+    )
+    timings = {}
+
+    for name, implementation in implementations:
+        timer = timeit.Timer(lambda: implementation(surface))
+        timings[name] = min(timer.repeat(repeat=3, number=1))
+        print('palette_cycle %-9s %8.2f ms' % (name, timings[name] * 1000))
+
+    assert timings['palette'] < timings['get_at']
+    assert timings['surfarray'] < timings['get_at']
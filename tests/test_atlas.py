@@ -0,0 +1,175 @@
+# This module is part of Hypatia and is released under the
+# MIT license: http://opensource.org/licenses/MIT
+
+"""py.test unit testing for hypatia/atlas.py
+
+Run py.test on this module to assert hypatia.atlas
+is completely functional.
+
+"""
+
+import os
+
+import pygame
+import pytest
+
+from hypatia import atlas
+from hypatia import sprites
+from hypatia import constants
+from hypatia import animatedsprite
+
+try:
+    os.chdir('demo')
+except OSError:
+    pass
+
+
+def test_texture_atlas(tmpdir):
+    """Test packing surfaces and animations into a TextureAtlas,
+    and saving and loading it.
+
+    """
+
+    texture_atlas = atlas.TextureAtlas((32, 32))
+
+    # first shelf is 16 tall, the second 8 tall
+    surfaces = [pygame.Surface(size, pygame.SRCALPHA, 32)
+                for size in ((16, 16), (8, 8), (8, 16), (20, 8), (8, 4))]
+
+    for i, surface in enumerate(surfaces):
+        surface.fill((i * 40, 255 - i * 40, 0, 100 + i))
+
+    packed = [texture_atlas.add(surface, str(i))
+              for i, surface in enumerate(surfaces)]
+    assert [surface.get_offset() for surface in packed] == [(0, 0),
+                                                            (16, 0),
+                                                            (24, 0),
+                                                            (0, 16),
+                                                            (20, 16)]
+    assert len(texture_atlas.pages) == 1
+
+    # no room left on the first page, nor room for an oversized surface
+    texture_atlas.add(pygame.Surface((32, 16), pygame.SRCALPHA, 32))
+    texture_atlas.add(pygame.Surface((64, 8), pygame.SRCALPHA, 32))
+    assert ([page.get_size() for page in texture_atlas.pages] ==
+            [(32, 32), (32, 32), (64, 8)])
+
+    # copies are exact, alpha included
+    for surface, packed_surface in zip(surfaces, packed):
+        assert (pygame.image.tostring(surface, 'RGBA') ==
+                pygame.image.tostring(packed_surface, 'RGBA'))
+
+    atlas_path = str(tmpdir.join('atlas.zip'))
+    texture_atlas.save(atlas_path)
+    loaded_atlas = atlas.TextureAtlas.load(atlas_path)
+    assert loaded_atlas.regions == texture_atlas.regions
+
+    for i, surface in enumerate(surfaces):
+        assert (pygame.image.tostring(loaded_atlas[str(i)], 'RGBA') ==
+                pygame.image.tostring(surface, 'RGBA'))
+
+    # walkabouts of the same resource share their frames
+    walkabout = sprites.Walkabout('slime')
+    other_walkabout = sprites.Walkabout('slime')
+    unpacked_walkabout = sprites.Walkabout('slime')
+    texture_atlas = atlas.TextureAtlas()
+    walkabout.pack(texture_atlas)
+    other_walkabout.pack(texture_atlas)
+    animation = walkabout.current_animation()
+    frame = animation.frames[0]
+    other_frame = other_walkabout.current_animation().frames[0]
+    assert frame.surface.get_parent() is texture_atlas.pages[0]
+    assert frame is other_frame
+    assert animation.image is frame.surface
+
+    # the clip the walkabouts shared with the others is left alone
+    unpacked_frame = unpacked_walkabout.current_animation().frames[0]
+    assert unpacked_frame is not frame
+    assert unpacked_frame.surface.get_parent() is not texture_atlas.pages[0]
+
+    for file_name, animation in unpacked_walkabout.animation_files.items():
+        assert animation.clip is walkabout.resource[file_name].clip
+
+
+def test_texture_atlas_on_disk(tmpdir, monkeypatch):
+    """Test that a saved atlas is reused by open_atlas(), except
+    for the frames of resources modified since.
+
+    """
+
+    atlas_path = str(tmpdir.join('atlas.zip'))
+    monkeypatch.setattr(atlas, 'DEFAULT_PATH', atlas_path)
+
+    # nothing saved yet
+    texture_atlas = atlas.open_atlas()
+    assert not texture_atlas.regions
+
+    walkabout = sprites.Walkabout('slime')
+    walkabout.pack(texture_atlas)
+    assert texture_atlas.modified
+    assert 'walkabouts/slime' in texture_atlas.sources
+    texture_atlas.save(atlas_path)
+    assert not texture_atlas.modified
+
+    # the next run finds the frames already packed
+    loaded_atlas = atlas.open_atlas()
+    assert loaded_atlas.regions == texture_atlas.regions
+    assert not loaded_atlas.modified
+    walkabout = sprites.Walkabout('slime')
+    walkabout.pack(loaded_atlas)
+    assert not loaded_atlas.modified
+    assert len(loaded_atlas.pages) == len(texture_atlas.pages)
+    frame = walkabout.current_animation().frames[0]
+    assert frame.surface.get_parent() is loaded_atlas.pages[0]
+
+    # modifying the resource drops its frames
+    zip_path = os.path.join('resources', 'walkabouts', 'slime.zip')
+    modification_time = os.path.getmtime(zip_path)
+
+    try:
+        os.utime(zip_path, (modification_time, modification_time + 10))
+        stale_atlas = atlas.open_atlas()
+    finally:
+        os.utime(zip_path, (modification_time, modification_time))
+
+    assert not stale_atlas.regions
+    assert not stale_atlas.pages
+    assert stale_atlas.modified
+
+    # not an atlas
+    with open(atlas_path, 'wb') as atlas_file:
+        atlas_file.write(b'not an atlas')
+
+    assert not atlas.open_atlas().regions
+
+
+def test_walkabout_lazy_animations(monkeypatch):
+    """Test that the animations of a Walkabout are converted and
+    packed whether they are loaded before or after runtime_setup()
+    and pack().
+
+    """
+
+    converted = []
+    monkeypatch.setattr(animatedsprite.AnimatedSprite, 'convert_alpha',
+                        lambda animated_sprite:
+                        converted.append(animated_sprite))
+
+    # a walk animation loaded before the setup
+    walkabout = sprites.Walkabout('slime')
+    walk_north = walkabout.animation(constants.Action.walk,
+                                     constants.Direction.north)
+    walkabout.runtime_setup()
+    assert sorted(converted, key=id) == sorted(
+        walkabout.animation_files.values(), key=id)
+    texture_atlas = atlas.TextureAtlas()
+    walkabout.pack(texture_atlas)
+    assert walkabout.atlas is texture_atlas
+    assert walk_north.frames[0].surface.get_parent() in texture_atlas.pages
+
+    # and one loaded after it
+    walk_east = walkabout.animation(constants.Action.walk,
+                                    constants.Direction.east)
+    assert converted[-1] is walk_east
+    assert walk_east.frames[0].surface.get_parent() in texture_atlas.pages
+    assert 'walkabouts/slime/walk_east.gif/0' in texture_atlas
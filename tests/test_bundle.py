@@ -0,0 +1,113 @@
+# This module is part of Hypatia and is released under the
+# MIT license: http://opensource.org/licenses/MIT
+
+"""py.test unit testing for hypatia/bundle.py
+
+Run py.test on this module to assert hypatia.bundle
+is completely functional.
+
+"""
+
+import os
+
+import pygame
+import pytest
+
+from hypatia import bundle
+from hypatia import resources
+
+try:
+    os.chdir('demo')
+except OSError:
+    pass
+
+
+def test_bundle(tmpdir, monkeypatch):
+    """Test that compiled resources load the same as the
+    originals, and only while they are up to date.
+
+    """
+
+    bundle_path = str(tmpdir.join('resources.bundle'))
+    resources.compile_bundle(bundle_path)
+    monkeypatch.setattr(bundle, 'DEFAULT_PATH', bundle_path)
+
+    resource = resources.Resource('walkabouts', 'slime')
+    original = resources.Resource('walkabouts', 'slime', use_bundle=False)
+    assert resource.bundle_entry is not None
+    assert original.bundle_entry is None
+    assert resource.raw_files == original.raw_files
+    assert 'walk_north.gif' in resource.bundle_entry
+    assert 'walk_north.ini' in resource.bundle_entry
+
+    for file_name in original.file_names('.gif'):
+        frames = resource[file_name].frames
+        original_frames = original[file_name].frames
+        assert len(frames) == len(original_frames)
+
+        for frame, original_frame in zip(frames, original_frames):
+            assert (pygame.image.tostring(frame.surface, 'RGBA') ==
+                    pygame.image.tostring(original_frame.surface, 'RGBA'))
+            assert frame.start_time == original_frame.start_time
+            assert frame.duration == original_frame.duration
+            assert (frame.anchors['head_anchor'].as_tuple() ==
+                    original_frame.anchors['head_anchor'].as_tuple())
+
+    # the frames of a GIF are views of one surface over the bundle
+    frames = resource['walk_north.gif'].frames
+    sheet = frames[0].surface.get_parent()
+    assert sheet is not None
+    assert all(frame.surface.get_parent() is sheet for frame in frames)
+
+    # drawing on a frame does not modify the bundle
+    frames[0].surface.fill((1, 2, 3, 4))
+    reloaded = bundle.Bundle(bundle_path).entry('walkabouts', 'slime')
+    reloaded_surface = reloaded.load('walk_north.gif').frames[0].surface
+    assert (pygame.image.tostring(reloaded_surface, 'RGBA') ==
+            pygame.image.tostring(original['walk_north.gif'].frames[0].
+                                  surface, 'RGBA'))
+
+    # the other categories are compiled as well
+    assert resources.Resource('tilesheets', 'debug').bundle_entry
+    assert resources.Resource('scenes', 'debug').bundle_entry
+
+    # so are images, and INI files, which are parsed already
+    tilesheet = resources.Resource('tilesheets', 'debug')
+    original = resources.Resource('tilesheets', 'debug', use_bundle=False)
+    assert tilesheet.bundle_entry.has_surface('tilesheet.png')
+    assert not tilesheet.bundle_entry.has_surface('tilesheet.ini')
+    assert tilesheet.undecoded_file_names() == []
+    surface = tilesheet.surface('tilesheet.png')
+    original_surface = original.surface('tilesheet.png')
+    assert surface.get_size() == original_surface.get_size()
+    assert surface.get_bitsize() == original_surface.get_bitsize()
+    original_palette = original_surface.get_palette()
+    assert surface.get_palette()[:len(original_palette)] == original_palette
+    assert surface.get_colorkey() == original_surface.get_colorkey()
+    assert (pygame.image.tostring(surface, 'RGBA') ==
+            pygame.image.tostring(original_surface, 'RGBA'))
+
+    config = tilesheet['tilesheet.ini']
+    original_config = original['tilesheet.ini']
+    assert config.sections() == original_config.sections()
+
+    for section in original_config.sections():
+        assert (config.items(section, raw=True) ==
+                original_config.items(section, raw=True))
+
+    # modifying a resource makes it read from the original again
+    zip_path = os.path.join('resources', 'walkabouts', 'slime.zip')
+    modification_time = os.path.getmtime(zip_path)
+
+    try:
+        os.utime(zip_path, (modification_time, modification_time + 10))
+        assert resources.Resource('walkabouts', 'slime').bundle_entry is None
+    finally:
+        os.utime(zip_path, (modification_time, modification_time))
+
+    # not a bundle
+    with open(bundle_path, 'wb') as bundle_file:
+        bundle_file.write(b'not a bundle')
+
+    with pytest.raises(bundle.BadBundle):
+        bundle.Bundle(bundle_path)
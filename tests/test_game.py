@@ -0,0 +1,278 @@
+# This module is part of Hypatia and is released under the
+# MIT license: http://opensource.org/licenses/MIT
+
+"""py.test unit testing for hypatia/game.py
+
+Run py.test on this module to assert hypatia.game
+is completely functional.
+
+"""
+
+import os
+import gzip
+import zlib
+import time
+import base64
+import struct
+import threading
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+import pygame
+import pytest
+
+from hypatia import game
+from hypatia import atlas
+from hypatia import render
+from hypatia import resources
+
+try:
+    os.chdir('demo')
+except OSError:
+    pass
+
+
+def test_scene_loader():
+    """Test that SceneLoader loads the scene in another thread,
+    without creating any pygame object there, and hands it over,
+    or what it raised, once it is done.
+
+    """
+
+    resources.cache.clear()
+    loader = game.SceneLoader(game.Scene.prepare_resource, 'debug')
+
+    while not loader.done():
+        time.sleep(0.001)
+
+    # the walkabouts were decoded in the background, but their
+    # surfaces are only created by result(), in this thread
+    slime = resources.cache.get('walkabouts', 'slime')
+    tilesheet = resources.cache.get('tilesheets', 'debug')
+    assert slime.files == {}
+    assert tilesheet.surfaces == {}
+
+    scene = loader.result()
+    assert loader.done()
+    assert isinstance(scene, game.Scene)
+    assert loader.result() is scene
+    assert sorted(slime.files) == sorted(slime.file_names('.gif'))
+    assert list(tilesheet.surfaces) == ['tilesheet.png']
+
+    # the scene renders the same as one created in this thread
+    screen = render.Screen()
+
+    try:
+        rendered = []
+
+        for rendered_scene in (scene, game.Scene.from_resource('debug')):
+            rendered_scene.runtime_setup()
+            viewport = render.Viewport((120, 80))
+            rendered_scene.render(viewport, screen.clock)
+            rendered.append(pygame.image.tostring(viewport.surface, 'RGB'))
+
+        assert rendered[0] == rendered[1]
+        assert len(set(rendered[0])) > 1
+
+    finally:
+        pygame.display.quit()
+
+    # nothing is handed over before it is done
+    release = threading.Event()
+
+    def preparer(scene_name):
+        release.wait()
+
+        raise KeyError(scene_name)
+
+    loader = game.SceneLoader(preparer, 'nowhere')
+    assert not loader.done()
+    assert loader.result(timeout=0.01) is None
+    release.set()
+
+    with pytest.raises(KeyError):
+        loader.result()
+
+    assert loader.done()
+
+
+def test_scene_atlas(tmpdir):
+    """Test that Scene.runtime_setup() only saves the atlas when
+    given a path, and reuses it from there.
+
+    """
+
+    atlas_path = str(tmpdir.join('atlas.zip'))
+    screen = render.Screen()
+
+    try:
+        scene = game.Scene.from_resource('debug')
+        scene.runtime_setup()
+        assert scene.atlas.regions
+        assert not os.path.exists(atlas.DEFAULT_PATH)
+
+        scene = game.Scene.from_resource('debug')
+        scene.runtime_setup(atlas_path)
+        assert os.path.exists(atlas_path)
+        assert not os.path.exists(atlas.DEFAULT_PATH)
+
+        # the next run finds every frame packed already
+        modification_time = os.path.getmtime(atlas_path)
+        scene = game.Scene.from_resource('debug')
+        scene.runtime_setup(atlas_path)
+        assert not scene.atlas.modified
+        assert os.path.getmtime(atlas_path) == modification_time
+
+    finally:
+        pygame.display.quit()
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'gzip'])
+def test_tmx_base64_layers(compression):
+    """Test that TMX layers encoded in base64, compressed or not,
+    load the same as CSV layers.
+
+    """
+
+    tmx_path = os.path.join('resources', 'scenes', 'debug.tmx')
+    csv_tmx = game.TMX(tmx_path)
+    tree = ET.parse(tmx_path)
+
+    for layer_data in tree.getroot().findall('.//layer/data'):
+        global_ids = [int(global_id) for global_id
+                      in layer_data.text.strip().split(',')]
+        layer_bytes = struct.pack('<%dI' % len(global_ids), *global_ids)
+
+        if compression == 'zlib':
+            layer_bytes = zlib.compress(layer_bytes)
+        elif compression == 'gzip':
+            gzip_file = BytesIO()
+
+            with gzip.GzipFile(fileobj=gzip_file, mode='wb') as gzip_writer:
+                gzip_writer.write(layer_bytes)
+
+            layer_bytes = gzip_file.getvalue()
+
+        layer_data.text = base64.b64encode(layer_bytes).decode('ascii')
+        layer_data.set('encoding', 'base64')
+
+        if compression is not None:
+            layer_data.set('compression', compression)
+
+    tmx_file = BytesIO()
+    tree.write(tmx_file)
+    tmx_file.seek(0)
+    base64_tmx = game.TMX(tmx_file)
+
+    assert base64_tmx.layers == csv_tmx.layers
+    assert base64_tmx.tilemap.to_string() == csv_tmx.tilemap.to_string()
+
+
+def test_tmx_unsupported_layers():
+    """Test that layers of unsupported encodings or compressions
+    raise TMXLayersNotCSV, and that flipped tiles are unflipped.
+
+    """
+
+    layer_data = ET.fromstring('<data encoding="base64" '
+                               'compression="zstd">AAAA</data>')
+
+    with pytest.raises(game.TMXLayersNotCSV):
+        game.TMX.decode_layer(layer_data)
+
+    with pytest.raises(game.TMXLayersNotCSV):
+        game.TMX.decode_layer(ET.fromstring('<data><tile gid="1"/></data>'))
+
+    flipped = 3 | 0x80000000 | 0x40000000
+    layer_data = ET.fromstring('<data encoding="csv">%d,0</data>' % flipped)
+    assert list(game.TMX.decode_layer(layer_data)) == [3, 0]
+
+
+def test_tmx_streaming():
+    """Test that TMX only keeps the decoded layers, not their XML,
+    and checks the version as soon as it is read.
+
+    """
+
+    tmx_path = os.path.join('resources', 'scenes', 'debug.tmx')
+    tmx = game.TMX(tmx_path)
+    assert tmx.root.tag == 'map'
+    assert len(tmx.layers) == len(list(tmx.root.iter('layer')))
+    assert all(len(layer) == 0 and not layer.attrib
+               for layer in tmx.root.iter('layer'))
+    assert tmx.root.find('.//tileset') is not None
+
+    with pytest.raises(game.TMXVersionUnsupported):
+        game.TMX(BytesIO(b'<map version="0.9"><layer>'))
+
+
+def test_tmx_tilesets():
+    """Test that a TMX map may use several tilesets, and that only
+    the tilesets which are used are loaded.
+
+    """
+
+    tmx_path = os.path.join('resources', 'scenes', 'debug.tmx')
+    tree = ET.parse(tmx_path)
+    root = tree.getroot()
+    tileset = root.find('tileset')
+
+    # never used, and there is no such tilesheet
+    unused_tileset = ET.Element('tileset', firstgid='200', name='missing')
+    root.insert(list(root).index(tileset) + 1, unused_tileset)
+    tmx_file = BytesIO()
+    tree.write(tmx_file)
+    tmx_file.seek(0)
+    tmx = game.TMX(tmx_file)
+    assert [tilesheet.name for tilesheet in tmx.tilemap.tilesheets] == [
+        'debug']
+
+    # the first layer's top left tile is from an external tileset
+    external_tileset = ET.Element('tileset', firstgid='300',
+                                  source='../tilesets/debug.tsx')
+    root.insert(list(root).index(tileset) + 1, external_tileset)
+    layer_data = root.find('.//layer/data')
+    global_ids = layer_data.text.strip().split(',')
+    global_ids[0] = '305'
+    layer_data.text = ','.join(global_ids)
+    tmx_file = BytesIO()
+    tree.write(tmx_file)
+    tmx_file.seek(0)
+    tmx = game.TMX(tmx_file)
+    assert tmx.tilemap.first_global_ids == [1, 300]
+    assert tmx.tilemap[(0, 0)] is tmx.tilemap.tilesheets[1][5]
+
+
+def test_tmx_second_tileset_only():
+    """Test that a TMX map which only uses the tiles of its second
+    tileset, and nothing (0), does not load the first tileset.
+
+    """
+
+    tmx_path = os.path.join('resources', 'scenes', 'debug.tmx')
+    tree = ET.parse(tmx_path)
+    root = tree.getroot()
+    tileset = root.find('tileset')
+    tileset.attrib['firstgid'] = '200'
+
+    # first, never used, and there is no such tilesheet
+    unused_tileset = ET.Element('tileset', firstgid='1', name='missing')
+    root.insert(list(root).index(tileset), unused_tileset)
+
+    for layer_data in root.findall('.//layer/data'):
+        global_ids = [int(global_id) for global_id
+                      in layer_data.text.strip().split(',')]
+        global_ids = [global_id and global_id + 199
+                      for global_id in global_ids]
+        global_ids[-1] = 0
+        layer_data.text = ','.join(str(global_id)
+                                   for global_id in global_ids)
+
+    tmx_file = BytesIO()
+    tree.write(tmx_file)
+    tmx_file.seek(0)
+    tmx = game.TMX(tmx_file)
+    assert tmx.tilesheet_specs == [('debug', 200)]
+    assert tmx.tilemap.first_global_ids == [200]
+    assert tmx.tilemap[(0, 0)] is tmx.tilemap.tilesheets[0][
+        tmx.layers[0][0] - 200]
@@ -39,3 +39,35 @@ def test_velocity():
     velocity = physics.Velocity(-22, 55)
     assert (constants.Direction.from_velocity(velocity) ==
             constants.Direction.south_west)
+
+
+def test_collision_grid():
+    """Test physics.CollisionGrid, the spatial hash
+    used for collision checks.
+
+    """
+
+    grid = physics.CollisionGrid((10, 10))
+
+    # a rect spanning several cells is indexed in each of them
+    assert (list(grid.cells(pygame.Rect(5, 5, 10, 10))) ==
+            [(0, 0), (1, 0), (0, 1), (1, 1)])
+    assert list(grid.cells(pygame.Rect(10, 10, 10, 10))) == [(1, 1)]
+    assert list(grid.cells(pygame.Rect(0, 0, 0, 0))) == []
+
+    # rects can be moved, ignored and removed
+    assert not grid.collides(pygame.Rect(0, 0, 20, 10))
+    npc = object()
+    grid.add(npc, pygame.Rect(0, 0, 5, 5))
+    assert grid.collides(pygame.Rect(0, 0, 20, 10))
+    assert not grid.collides(pygame.Rect(0, 0, 20, 10), ignore=npc)
+
+    grid.move(npc, pygame.Rect(100, 100, 5, 5))
+    assert not grid.collides(pygame.Rect(0, 0, 20, 10))
+    assert grid.collides(pygame.Rect(90, 90, 20, 20))
+
+    grid.remove(npc)
+    assert not grid.collides(pygame.Rect(90, 90, 20, 20))
+
+    with pytest.raises(KeyError):
+        grid.remove(npc)
@@ -27,3 +27,109 @@ try:
     os.chdir('demo')
 except OSError:
     pass
+
+
+@pytest.fixture
+def screen():
+    """A Screen on the display, which is 1024x768 under the
+    dummy video driver.
+
+    """
+
+    screen = render.Screen()
+    yield screen
+    pygame.display.quit()
+
+
+def test_screen_update(screen, monkeypatch):
+    """Test that Screen.update() scales straight onto the display
+    when the formats match, and otherwise reuses one surface.
+
+    """
+
+    # same format: nothing is allocated
+    surface = pygame.Surface((512, 384), 0, screen.screen)
+    assert render.Screen.same_format(surface, screen.screen)
+    surface.fill((255, 0, 0))
+    screen.update(surface)
+    assert screen._scaled_surface is None
+    assert screen.screen.get_at((1023, 767)) == (255, 0, 0, 255)
+
+    # another format: scaled onto the same surface every frame
+    surface = pygame.Surface((512, 384), 0, 24)
+    surface.fill((0, 0, 255))
+    assert not render.Screen.same_format(surface, screen.screen)
+    screen.update(surface)
+    scaled_surface = screen._scaled_surface
+    assert scaled_surface is not None
+    screen.update(surface)
+    assert screen._scaled_surface is scaled_surface
+    assert screen.screen.get_at((1023, 767)) == (0, 0, 255, 255)
+
+    # filters are applied to the reused surface, never the display
+    filtered = []
+
+    def filter_function(filtered_surface):
+        filtered.append(filtered_surface)
+
+        return filtered_surface
+
+    screen.filters = [filter_function]
+    surface = pygame.Surface((512, 384), 0, screen.screen)
+    screen.update(surface)
+    screen.update(surface)
+    assert len(filtered) == 2
+    assert filtered[0] is filtered[1]
+    assert filtered[0] is not screen.screen
+
+
+def test_screen_update_rects(screen, monkeypatch):
+    """Test the areas of the display which Screen.update() updates
+    when supplied dirty rects.
+
+    """
+
+    updated = []
+    monkeypatch.setattr(pygame.display, 'update', updated.append)
+    scale2x_calls = []
+    scale2x = pygame.transform.scale2x
+
+    def spy_scale2x(*args):
+        scale2x_calls.append(args)
+
+        return scale2x(*args)
+
+    monkeypatch.setattr(pygame.transform, 'scale2x', spy_scale2x)
+
+    # exactly twice the size: scale2x, twice the geometry
+    screen.scale2x = True
+    surface = pygame.Surface((512, 384), 0, screen.screen)
+    surface.fill((0, 255, 0))
+    screen.update(surface, [pygame.Rect(10, 20, 30, 40),
+                            pygame.Rect(500, 380, 50, 50)])
+    assert updated == [[pygame.Rect(20, 40, 60, 80),
+                        pygame.Rect(1000, 760, 24, 8)]]
+    assert len(scale2x_calls) == 2
+    assert screen.screen.get_at((20, 40)) == (0, 255, 0, 255)
+    assert screen.screen.get_at((19, 40)) != (0, 255, 0, 255)
+
+    # an empty list updates nothing
+    del updated[:]
+    screen.update(surface, [])
+    assert updated == []
+
+    # not an integer multiple: edges are scaled as for the
+    # whole surface, so neighbouring areas line up
+    surface = pygame.Surface((300, 200), 0, screen.screen)
+    screen.update(surface, [pygame.Rect(10, 10, 30, 30),
+                            pygame.Rect(40, 10, 30, 30)])
+    first, second = updated[0]
+    assert first == pygame.Rect(34, 38, 102, 115)
+    assert first.right == second.left
+    assert second.right == 70 * 1024 // 300
+
+    # another format is scaled, then blitted
+    del updated[:]
+    surface = pygame.Surface((300, 200), 0, 24)
+    screen.update(surface, [pygame.Rect(10, 10, 30, 30)])
+    assert updated == [[pygame.Rect(34, 38, 102, 115)]]
@@ -9,6 +9,7 @@ is completely functional.
 """
 
 import os
+from io import BytesIO
 
 try:
     import ConfigParser as configparser
@@ -17,8 +18,11 @@ except ImportError:
 
 import pygame
 import pytest
+from PIL import Image
 
+from hypatia import sprites
 from hypatia import resources
+from hypatia import constants
 from hypatia import animatedsprite
 
 try:
@@ -45,3 +49,194 @@ def test_resource():
 
     # Assure INI files are loading as ConfigParser objects
     assert isinstance(resource['only.ini'], configparser.ConfigParser)
+
+
+def test_resource_cache():
+    """Test that ResourceCache loads each resource once, again
+    when it was modified, and evicts the least recently used.
+
+    """
+
+    cache = resources.ResourceCache()
+    debug = cache.get('walkabouts', 'debug')
+    assert cache.get('walkabouts', 'debug') is debug
+    assert cache.size == resources.ResourceCache.estimate_size(debug)
+
+    # neither on disk nor in the bundle
+    with pytest.raises((IOError, OSError)):
+        cache.get('walkabouts', 'missing')
+
+    assert cache.size == resources.ResourceCache.estimate_size(debug)
+
+    # only the most recently used resource fits
+    cache.max_bytes = cache.size + 1
+    slime = cache.get('walkabouts', 'slime')
+    assert ('walkabouts', 'debug') not in cache
+    assert len(cache) == 1
+    assert cache.size == resources.ResourceCache.estimate_size(slime)
+    assert cache.get('walkabouts', 'debug') is not debug
+
+    # decoding the files of a cached resource counts towards the
+    # cap, and may evict the others
+    cache = resources.ResourceCache()
+    debug = cache.get('walkabouts', 'debug')
+    slime = cache.get('walkabouts', 'slime')
+    cache.max_bytes = cache.size + 1
+
+    for file_name in slime.file_names('.gif'):
+        slime[file_name]
+
+    assert cache.size == resources.ResourceCache.estimate_size(slime)
+    assert ('walkabouts', 'debug') not in cache
+    assert debug.cache is None
+    assert slime.cache is cache
+
+    # an evicted resource no longer counts
+    size = cache.size
+    debug['only.gif']
+    assert cache.size == size
+
+    # modifying a resource invalidates it
+    cache = resources.ResourceCache()
+    debug = cache.get('walkabouts', 'debug')
+    zip_path = os.path.join('resources', 'walkabouts', 'debug.zip')
+    modification_time = os.path.getmtime(zip_path)
+
+    try:
+        os.utime(zip_path, (modification_time, modification_time + 10))
+        assert cache.get('walkabouts', 'debug') is not debug
+    finally:
+        os.utime(zip_path, (modification_time, modification_time))
+
+
+def test_walkabouts_share_resources():
+    """Test that Walkabouts of the same resource share their
+    frames, but not their playback state.
+
+    """
+
+    walkabout = sprites.Walkabout('slime')
+    other_walkabout = sprites.Walkabout('slime')
+    assert walkabout.resource is other_walkabout.resource
+
+    animation = walkabout.current_animation()
+    other_animation = other_walkabout.current_animation()
+    assert animation is not other_animation
+    assert animation.frames is other_animation.frames
+
+    class Clock(object):
+
+        def get_time(self):
+
+            return 1000
+
+    animation.update(Clock(), (0, 0), None)
+    assert other_animation.animation_position == 0
+
+
+def test_lazy_resource():
+    """Test that files are only run through their file handler
+    when accessed, and only once.
+
+    """
+
+    resource = resources.Resource('walkabouts', 'slime')
+    assert resource.files == {}
+    assert 'walk_north.gif' in resource
+    assert len(resource.file_names('.gif')) == 8
+
+    animation = resource['walk_north.gif']
+    assert resource['walk_north.gif'] is animation
+    assert list(resource.files) == ['walk_north.gif']
+
+    assert len(resource.get_type('.gif')) == 8
+    assert len(resource.files) == 8
+
+    # a walkabout only decodes the animations it shows
+    walkabout = sprites.Walkabout('bow')
+    assert list(walkabout.animation_files) == ['stand_south.gif']
+    walkabout.direction = constants.Direction.north
+    walkabout.current_animation()
+    assert sorted(walkabout.animation_files) == ['stand_north.gif',
+                                                 'stand_south.gif']
+
+
+def test_preload():
+    """Test that preload() decodes the files of the resources in
+    worker threads, the same as accessing them would, and reports
+    its progress.
+
+    """
+
+    resources.cache.clear()
+    progress = []
+    resource_keys = [('walkabouts', 'slime'),
+                     ('tilesheets', 'debug'),
+                     ('walkabouts', 'slime')]
+    slime, tilesheet, __ = resources.preload(resource_keys, workers=4,
+                                             progress=lambda *args:
+                                             progress.append(args))
+    assert len(slime.files) == 8
+    assert list(tilesheet.surfaces) == ['tilesheet.png']
+    assert progress == [(i, 9) for i in range(1, 10)]
+    assert resources.cache.get('walkabouts', 'slime') is slime
+
+    # nothing is left to decode
+    assert resources.preload([('walkabouts', 'slime')],
+                             progress=progress.append) == [slime]
+    assert len(progress) == 9
+
+    original = resources.Resource('walkabouts', 'slime', use_bundle=False)
+
+    for file_name, animation in slime.files.items():
+        original_frames = original[file_name].frames
+
+        for frame, original_frame in zip(animation.frames, original_frames):
+            assert (pygame.image.tostring(frame.surface, 'RGBA') ==
+                    pygame.image.tostring(original_frame.surface, 'RGBA'))
+            assert frame.duration == original_frame.duration
+
+    tilesheet_surface = pygame.image.load(tilesheet['tilesheet.png'])
+    assert (pygame.image.tostring(tilesheet.surface('tilesheet.png'), 'RGBA')
+            == pygame.image.tostring(tilesheet_surface, 'RGBA'))
+
+
+def test_decode_png():
+    """Test that an image decoded in a worker thread makes the same
+    surface as pygame.image.load(), palette and colorkey included.
+
+    """
+
+    resource = resources.Resource('tilesheets', 'debug', use_bundle=False)
+
+    # palette: as is, one transparent index (a colorkey), several
+    # translucent ones; then RGB, and RGBA
+    paletted = Image.new('P', (4, 2))
+    paletted.putpalette([0, 0, 0, 255, 0, 0, 0, 255, 0, 0, 0, 255])
+    paletted.putdata([0, 1, 2, 3, 3, 2, 1, 0])
+    images = [(paletted, {}),
+              (paletted, {'transparency': 2}),
+              (paletted, {'transparency': b'\xff\xff\x00\xff'}),
+              (paletted, {'transparency': b'\x00\x80\xff\xff'}),
+              (paletted.convert('RGB'), {}),
+              (paletted.convert('RGBA'), {})]
+
+    for i, (image, save_options) in enumerate(images):
+        png_file = BytesIO()
+        image.save(png_file, 'PNG', **save_options)
+        resource.raw_files['%d.png' % i] = png_file.getvalue()
+
+    resource.raw_files['debug.png'] = resource.raw_files['tilesheet.png']
+
+    for file_name in resource.file_names('.png'):
+        loaded = pygame.image.load(BytesIO(resource.raw_files[file_name]))
+        resource.finish_decoding(file_name, resource.decode(file_name))
+        surface = resource.surface(file_name)
+        assert surface.get_bitsize() == loaded.get_bitsize(), file_name
+        assert surface.get_colorkey() == loaded.get_colorkey(), file_name
+        assert (pygame.image.tostring(surface, 'RGBA') ==
+                pygame.image.tostring(loaded, 'RGBA')), file_name
+
+        if loaded.get_bitsize() == 8:
+            palette = loaded.get_palette()
+            assert surface.get_palette()[:len(palette)] == palette
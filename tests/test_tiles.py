@@ -17,6 +17,7 @@ Example:
 """
 
 import os
+import array
 import zipfile
 from io import BytesIO
 
@@ -116,6 +117,23 @@ def test_tilesheet():
     # in the debug tilesheet is defined as impassable.
     assert tilesheet[99].flags == set(['impass_all'])
 
+    # tiles are created once, when first accessed, and share
+    # their flags with the other tiles which have the same flags
+    assert tilesheet.tiles[98] is None
+    assert tilesheet[98] is tilesheet[98]
+    assert tilesheet[-1] is tilesheet[len(tilesheet.tiles) - 1]
+    impassable = [tile_id for tile_id, flags in tilesheet.flags.items()
+                  if flags == set(['impass_all'])]
+    assert len(impassable) > 1
+    assert all(tilesheet[tile_id].flags is tilesheet[99].flags
+               for tile_id in impassable)
+    no_flags = [tile_id for tile_id in range(len(tilesheet.tiles))
+                if tile_id not in tilesheet.flags]
+    assert tilesheet[no_flags[0]].flags is tiles.Tile.NO_FLAGS
+
+    with pytest.raises(AttributeError):
+        tilesheet[99].color = (255, 0, 0)
+
     # test tile animations
 
     # The debug tilesheet has three animated tiles. Chained water
@@ -144,8 +162,10 @@ def test_tilemap():
     map_string = resource['tilemap.txt'].strip()
     tilemap = tiles.TileMap.from_string(map_string)
 
-    # there are 208 impassable rects in the debug tilemap
-    assert len(tilemap.impassable_rects) == 208
+    # there are 207 impassable cells in the debug tilemap
+    assert len(tilemap.impassable_rects) == 207
+    assert (bytes(tilemap.passability.cells).count(
+            tiles.PassabilityGrid.IMPASS_ALL) == 207)
 
     # make sure from string/to string works reproducibly
     assert map_string == tilemap.to_string()
@@ -154,3 +174,306 @@ def test_tilemap():
     assert tilemap[(2, 4)] is tilemap.tilesheet[11]
     assert tilemap.get_info((2 * 10, 4 * 10)) is tilemap.tilesheet[11]
     assert tilemap.get_info((2 * 10, 4 * 10)) is tilemap[(2, 4)]
+
+    # merging the flags of the layers leaves the tilesheet alone
+    layered = tiles.TileMap('debug', [[[0, 119]], [[119, 0]]])
+    assert 'impass_all' in layered[(1, 0)].flags
+    assert layered[(1, 0)].subsurface is layered.tilesheet[119].subsurface
+    assert layered.tilesheet[119].flags == set()
+
+    # the merged flags of each cell are a bitmask
+    impass_all = layered.flag_registry.bit('impass_all')
+    assert list(layered.cell_flags) == [impass_all, impass_all]
+    assert layered.flag_registry.flags(impass_all) == set(['impass_all'])
+    assert layered[(1, 0)] is layered[(1, 0)]
+    assert layered[(0, 0)] is layered.tilesheet[0]
+
+
+def test_tilemap_merge_layer_flags(monkeypatch):
+    """Test that the flags of the layers merge the same with and
+    without NumPy.
+
+    """
+
+    resource = resources.Resource('scenes', 'debug')
+    tilemap = tiles.TileMap.from_string(resource['tilemap.txt'].strip())
+    global_id_flags = {global_id: bits for global_id, (__, __, bits)
+                       in tilemap._resolved_tiles.items()}
+    typecode = tilemap.flag_registry.typecode()
+    cell_count = len(tilemap.cell_flags)
+    merged_flags = tiles.TileMap.merge_layer_flags(tilemap.tile_ids,
+                                                   global_id_flags,
+                                                   typecode, cell_count)
+    assert merged_flags == tilemap.cell_flags
+    assert merged_flags.typecode == typecode
+
+    monkeypatch.setattr(tiles, 'numpy', None)
+    assert (tiles.TileMap.merge_layer_flags(tilemap.tile_ids,
+                                            global_id_flags,
+                                            typecode, cell_count) ==
+            merged_flags)
+    assert (tiles.TileMap.merge_layer_flags([], global_id_flags,
+                                            typecode, cell_count) ==
+            array.array(typecode, [0]) * cell_count)
+
+
+def test_tilemap_binary():
+    """Test the binary format of TileMap, and that tile IDs are
+    stored in arrays.
+
+    """
+
+    resource = resources.Resource('scenes', 'debug')
+    map_string = resource['tilemap.txt'].strip()
+    tilemap = tiles.TileMap.from_string(map_string)
+    width_tiles, height_tiles, depth_tiles = tilemap.dimensions_in_tiles
+    assert len(tilemap.tile_ids) == depth_tiles
+    assert all(layer.typecode == 'H' and
+               len(layer) == width_tiles * height_tiles
+               for layer in tilemap.tile_ids)
+
+    for compress in (True, False):
+        data = tilemap.to_bytes(compress)
+        loaded_tilemap = tiles.TileMap.from_bytes(data)
+        assert loaded_tilemap.tile_ids == tilemap.tile_ids
+        assert loaded_tilemap.dimensions_in_tiles == (width_tiles,
+                                                      height_tiles,
+                                                      depth_tiles)
+        assert loaded_tilemap.to_string() == map_string
+
+    uncompressed_length = len(tilemap.to_bytes(False))
+    assert len(tilemap.to_bytes()) < uncompressed_length
+    assert uncompressed_length == (tiles.TileMap.BINARY_HEADER.size +
+                                   len('debug') +
+                                   width_tiles * height_tiles *
+                                   depth_tiles * 2)
+
+    with pytest.raises(ValueError):
+        tiles.TileMap.from_bytes(b'not a tilemap')
+
+    with pytest.raises(ValueError):
+        tiles.TileMap.from_bytes(tilemap.to_bytes(False)[:-2])
+
+    with pytest.raises(tiles.BadTileID):
+        tiles.TileMap('debug', [[[0, -2]]])
+
+
+def test_tilemap_tilesheets():
+    """Test TileMaps of several tilesheets, resolved by their
+    ranges of global tile IDs.
+
+    """
+
+    tilemap = tiles.TileMap([('debug', 121), ('debug', 1)],
+                            [[[0, 120], [-1, 125]]])
+    assert tilemap.first_global_ids == [1, 121]
+    assert len(tilemap.tilesheets) == 2
+    assert tilemap.tilesheet is tilemap.tilesheets[0]
+    assert tilemap.resolve(121) == (1, 0)
+    assert tilemap.resolve(126) == (1, 5)
+    assert tilemap[(0, 0)] is tilemap.tilesheets[0][0]
+    assert tilemap[(0, 1)].tilesheet_id == -1
+    assert tilemap[(1, 0)] is tilemap.tilesheets[1][0]
+    assert tilemap.tile(126) is tilemap.tilesheets[1][5]
+
+    # the tilesheets are kept by both formats
+    map_string = tilemap.to_string()
+    assert map_string.split('\n')[0] == 'debug debug:121'
+    assert tiles.TileMap.from_string(map_string).to_string() == map_string
+    loaded_tilemap = tiles.TileMap.from_bytes(tilemap.to_bytes())
+    assert loaded_tilemap.first_global_ids == [1, 121]
+    assert loaded_tilemap.tile_ids == tilemap.tile_ids
+
+    with pytest.raises(tiles.BadTileID):
+        tiles.TileMap([('debug', 5)], [[[1]]])
+
+
+def test_tilemap_chunks():
+    """Test that TileMap layers are baked lazily, in chunks, and
+    that only the chunks in view are drawn.
+
+    """
+
+    resource = resources.Resource('scenes', 'debug')
+    map_string = resource['tilemap.txt'].strip()
+    tilemap = tiles.TileMap.from_string(map_string)
+    tile_width, tile_height = tilemap.tilesheet.tile_size
+    chunk_width = tilemap.CHUNK_SIZE * tile_width
+    chunk_height = tilemap.CHUNK_SIZE * tile_height
+
+    # nothing is baked until something is drawn
+    assert len(tilemap.chunk_cache) == 0
+
+    # a rect inside of the first chunk only touches the first chunk
+    first_layer = tilemap.layer_images[0]
+    view = pygame.Rect((0, 0), (chunk_width // 2, chunk_height // 2))
+    chunks = list(first_layer.chunks_in_rect(view))
+    assert len(chunks) == 1
+    assert chunks[0][1] == (0, 0)
+    assert (0, 0, 0) in tilemap.chunk_cache
+
+    # the layer still reports the size of the whole map
+    width_tiles, height_tiles, __ = tilemap.dimensions_in_tiles
+    assert first_layer.get_rect().size == (width_tiles * tile_width,
+                                           height_tiles * tile_height)
+
+    # the least recently used chunks are evicted
+    tilemap.chunk_cache.max_chunks = 1
+    second_layer = tilemap.layer_images[1]
+    list(second_layer.chunks_in_rect(view))
+    assert len(tilemap.chunk_cache) == 1
+    assert (0, 0, 0) not in tilemap.chunk_cache
+    assert (1, 0, 0) in tilemap.chunk_cache
+
+    # only the animated tiles in view are looked at
+    animated = tiles.TileMap('debug', [[[29] * 100] * 100])
+    view = pygame.Rect(5, 5, 3 * tile_width, 2 * tile_height)
+    in_view = list(animated.animated_tiles_in_rect(0, view))
+    assert len(in_view) == 4 * 3
+    assert all(pygame.Rect(position, (tile_width, tile_height)).
+               colliderect(view) for __, position in in_view)
+
+
+def test_tilemap_edit():
+    """Test that TileMap.set_tile() and set_region() only update
+    the cells they change, and that the result is the same as a
+    map built with those tiles.
+
+    """
+
+    resource = resources.Resource('scenes', 'debug')
+    map_string = resource['tilemap.txt'].strip()
+    tilemap = tiles.TileMap.from_string(map_string)
+    tile_width, tile_height = tilemap.tilesheet.tile_size
+
+    # bake the first chunk of each layer
+    view = pygame.Rect(0, 0, tile_width, tile_height)
+
+    for layer_image in tilemap.layer_images:
+        list(layer_image.chunks_in_rect(view))
+
+    # a passable cell of the first chunk, made impassable
+    passable = [(x, y) for x in range(tilemap.CHUNK_SIZE)
+                for y in range(tilemap.CHUNK_SIZE)
+                if not tilemap.passability[(x, y)]]
+    x, y = passable[0]
+    tilemap.set_tile(x, y, 1, 99)
+    assert tilemap.passability[(x, y)] == tiles.PassabilityGrid.IMPASS_ALL
+    assert 'impass_all' in tilemap[(x, y)].flags
+    assert tilemap.pop_changed_rects() == [pygame.Rect(x * tile_width,
+                                                       y * tile_height,
+                                                       tile_width,
+                                                       tile_height)]
+    assert tilemap.pop_changed_rects() == []
+
+    # an animated tile, in a region
+    water = tilemap.tilesheet.animated_tiles[29]
+    tilemap.set_region(x, y, 0, [[29]])
+    position = (x * tile_width, y * tile_height)
+    map_rect = tilemap.layer_images[0].get_rect()
+    assert (water, position) in tilemap.animated_tiles_in_rect(0, map_rect)
+    tilemap.set_region(x, y, 0, [[11, 11], [11, 11]])
+    assert ((water, position) not in
+            tilemap.animated_tiles_in_rect(0, map_rect))
+
+    # the edited chunks are drawn as if they had been baked so
+    rebuilt = tiles.TileMap.from_bytes(tilemap.to_bytes())
+    assert list(rebuilt.cell_flags) == list(tilemap.cell_flags)
+    assert rebuilt.passability.cells == tilemap.passability.cells
+
+    # editing leaves no chunk with an empty set of animated tiles
+    small = tiles.TileMap('debug', [[[0, 0], [0, 0]]])
+    small.set_tile(0, 0, 0, 11)
+    assert small.animated_tile_stack[0] == {}
+    small.set_tile(0, 0, 0, 29)
+    assert list(small.animated_tile_stack[0]) == [(0, 0)]
+    small.set_tile(0, 0, 0, 11)
+    assert small.animated_tile_stack[0] == {}
+
+    for z, chunk_animated_tiles in tilemap.animated_tile_stack.items():
+        assert all(chunk_animated_tiles.values())
+        assert (sorted(chunk_animated_tiles) ==
+                sorted(rebuilt.animated_tile_stack[z]))
+
+    for z in range(len(tilemap.layer_images)):
+        chunk = tilemap.chunk_cache.get((z, 0, 0))
+        assert (pygame.image.tostring(chunk, 'RGBA') ==
+                pygame.image.tostring(rebuilt.bake_chunk(z, 0, 0), 'RGBA'))
+
+    # nothing is changed by a bad edit
+    tile_ids = [layer[:] for layer in tilemap.tile_ids]
+
+    with pytest.raises(tiles.BadTileID):
+        tilemap.set_region(0, 0, 0, [[11, 999]])
+
+    width_tiles, height_tiles, __ = tilemap.dimensions_in_tiles
+
+    with pytest.raises(IndexError):
+        tilemap.set_tile(width_tiles, 0, 0, 11)
+
+    assert tilemap.tile_ids == tile_ids
+
+
+def test_tilemap_empty_tile():
+    """Test that tile ID -1 (global tile ID 0) is nothing: it draws
+    nothing and has no flags, baked or set.
+
+    """
+
+    bottom = [[0, 0], [0, 0]]
+    tilemap = tiles.TileMap('debug', [bottom, [[-1, -1], [-1, -1]]])
+    bottom_only = tiles.TileMap('debug', [bottom])
+    assert list(tilemap.cell_flags) == list(bottom_only.cell_flags)
+    assert tilemap.passability.cells == bottom_only.passability.cells
+
+    chunk = tilemap.bake_chunk(1, 0, 0)
+    empty = pygame.Surface(chunk.get_size(), pygame.SRCALPHA, 32)
+    empty.fill([0, 0, 0, 0])
+    assert (pygame.image.tostring(chunk, 'RGBA') ==
+            pygame.image.tostring(empty, 'RGBA'))
+
+    # clearing a cell again leaves it as it was before
+    list(tilemap.layer_images[1].chunks_in_rect(chunk.get_rect()))
+    tilemap.set_tile(0, 0, 1, 99)
+    tilemap.set_tile(0, 0, 1, -1)
+    assert list(tilemap.tile_ids[1]) == [0, 0, 0, 0]
+    assert list(tilemap.cell_flags) == list(bottom_only.cell_flags)
+    assert (pygame.image.tostring(tilemap.chunk_cache.get((1, 0, 0)),
+                                  'RGBA') ==
+            pygame.image.tostring(empty, 'RGBA'))
+
+    # a cell with nothing in its bottom layer
+    nothing = tiles.TileMap('debug', [[[-1]]])
+    assert nothing[(0, 0)].tilesheet_id == -1
+    assert nothing[(0, 0)].flags == tiles.Tile.NO_FLAGS
+    assert not nothing.passability[(0, 0)]
+
+
+def test_passability_grid():
+    """Test the bytearray-backed PassabilityGrid from tiles.py"""
+
+    grid = tiles.PassabilityGrid(4, 3, (10, 10))
+    assert len(grid.cells) == 4 * 3
+
+    # flags which aren't about passability are ignored
+    grid.add_flags(2, 1, set(['impass_all', 'not_passability']))
+    grid.add_flags(0, 2, set(['not_passability']))
+    assert grid[(2, 1)] == tiles.PassabilityGrid.IMPASS_ALL
+    assert grid[(0, 2)] == 0
+
+    # areas are in pixels; right and bottom are exclusive
+    assert grid.blocked(20, 10, 30, 20)
+    assert grid.blocked(29, 19, 31, 21)
+    assert not grid.blocked(0, 0, 20, 30)
+    assert not grid.blocked(30, 0, 40, 30)
+    assert not grid.blocked(20, 10, 20, 20)
+
+    # outside of the map nothing is blocked
+    assert not grid.blocked(-100, -100, 0, 0)
+    assert grid.blocked(-100, -100, 100, 100)
+
+    # another mask than impass_all
+    assert not grid.blocked(0, 0, 40, 30, mask=0)
+
+    rects = list(grid.rects(tiles.PassabilityGrid.IMPASS_ALL))
+    assert rects == [pygame.Rect(20, 10, 10, 10)]